@@ -0,0 +1,121 @@
+"""
+DOCX Extraction Benchmark
+Compares the streaming extractor (utils.file_utils) with the python-docx object model
+
+Usage:
+    python benchmarks/bench_docx_extraction.py [CORPUS_DIR] [--repeat N]
+
+Without CORPUS_DIR, a synthetic corpus of table-heavy CVs is generated in a
+temp directory.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+import io
+from typing import Callable, Dict, List
+
+import docx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.file_utils import FileTextExtractor
+
+
+def extract_with_python_docx(path: str) -> str:
+    """Previous extraction path: python-docx object model, body paragraphs only"""
+    document = docx.Document(path)
+    return "\n".join(p.text for p in document.paragraphs if p.text.strip())
+
+
+def extract_streaming(path: str) -> str:
+    """Streaming extractor (paragraphs and table rows)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return FileTextExtractor.extract_from_docx(path) or ""
+
+
+def build_corpus(directory: str, count: int = 50) -> List[str]:
+    """Write `count` synthetic CVs with a skills table and long experience sections"""
+    paths = []
+    for n in range(count):
+        document = docx.Document()
+        document.add_heading(f"Candidate {n}", level=1)
+        document.add_paragraph(f"candidate{n}@example.com | +91 98765 {n:05d}")
+
+        table = document.add_table(rows=0, cols=2)
+        for label, value in (
+            ("Technical Skills", "Python, Django, PostgreSQL, AWS, Docker"),
+            ("Tools", "Git, Jenkins, Jira"),
+            ("Domain", "Fintech, Payments"),
+        ):
+            cells = table.add_row().cells
+            cells[0].text = label
+            cells[1].text = value
+
+        for job in range(12):
+            document.add_heading(f"Company {job} - Senior Engineer", level=2)
+            for line in range(15):
+                document.add_paragraph(f"Delivered feature {line} for project {job} using Python and Kafka.")
+
+        path = os.path.join(directory, f"cv_{n}.docx")
+        document.save(path)
+        paths.append(path)
+    return paths
+
+
+def measure(extract: Callable[[str], str], paths: List[str], repeat: int) -> Dict:
+    """Best-of-`repeat` wall time, peak traced memory and output size over the corpus"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            extract(path)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    chars = sum(len(extract(path)) for path in paths)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "docs_per_second": len(paths) / best if best else 0.0,
+        "peak_mb": peak / 1024 / 1024,
+        "chars": chars
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOCX text extraction")
+    parser.add_argument("corpus", nargs="?", help="Directory of .docx files (default: synthetic corpus)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per extractor (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="docx_bench_") as tmp:
+        if args.corpus:
+            paths = sorted(
+                os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+                if name.lower().endswith(".docx")
+            )
+        else:
+            paths = build_corpus(tmp)
+
+        if not paths:
+            print("❌ No .docx files found")
+            return
+
+        print(f"📄 {len(paths)} documents, best of {args.repeat} runs\n")
+        print(f"{'extractor':<14}{'seconds':>10}{'docs/s':>10}{'peak MB':>10}{'chars':>12}")
+        for name, extract in (("python-docx", extract_with_python_docx), ("streaming", extract_streaming)):
+            result = measure(extract, paths, args.repeat)
+            print(
+                f"{name:<14}{result['seconds']:>10.3f}{result['docs_per_second']:>10.1f}"
+                f"{result['peak_mb']:>10.2f}{result['chars']:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
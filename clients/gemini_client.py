@@ -6,11 +6,21 @@ Cost: $0.30 input / $2.50 output per 1M tokens
 
 import os
 import json
+import asyncio
+import weakref
 import google.generativeai as genai
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 import time
 
+# Import config from parent directory
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from config import config
+from clients.rate_limiter import get_rate_limiter
+from clients.response_cache import ResponseCache
+from utils.token_utils import estimate_tokens
+
 class GeminiClient:
     """
     Centralized Gemini 2.5 Flash client for all AI operations.
@@ -29,26 +39,249 @@ class GeminiClient:
         genai.configure(api_key=self.api_key)
         
         # Use Gemini 2.5 Flash (stable, best for structured extraction)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = 'gemini-2.5-flash'
+        self.generation_config: Dict[str, Any] = {}
+        self.model = genai.GenerativeModel(
+            self.model_name,
+            generation_config=self.generation_config or None
+        )
+        
+        # Rate limiting (token buckets shared across threads and worker processes)
+        self.rate_limiter = get_rate_limiter()
+        
+        # Async concurrency: one semaphore per event loop (asyncio primitives are loop-bound)
+        self.max_concurrent_requests = config.GEMINI_MAX_CONCURRENT_REQUESTS
+        self._async_semaphores = weakref.WeakKeyDictionary()
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        # Optional persistent response cache (successful responses only)
+        self.response_cache = None
+        if config.GEMINI_CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                path=config.GEMINI_CACHE_PATH,
+                max_entries=config.GEMINI_CACHE_MAX_ENTRIES,
+                max_bytes=config.GEMINI_CACHE_MAX_MB * 1024 * 1024,
+                ttl_seconds=config.GEMINI_CACHE_TTL_HOURS * 3600
+            )
         
         print("✅ Gemini 2.5 Flash Client initialized")
     
-    def _wait_for_rate_limit(self):
-        """Ensure we don't exceed rate limits"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+    def _wait_for_rate_limit(self, prompt: str) -> int:
+        """
+        Block until the shared RPM/TPM buckets admit this prompt.
+        
+        Returns:
+            Estimated prompt tokens that were reserved
+        """
+        tokens = estimate_tokens(prompt)
+        self.rate_limiter.acquire(tokens)
+        return tokens
+    
+    async def _await_rate_limit(self, prompt: str) -> int:
+        """Async version of _wait_for_rate_limit (does not block the event loop)"""
+        tokens = estimate_tokens(prompt)
+        await self.rate_limiter.aacquire(tokens)
+        return tokens
+    
+    def _record_token_usage(self, response, estimated_tokens: int):
+        """Correct the TPM bucket with the real prompt token count, if reported"""
+        usage = getattr(response, "usage_metadata", None)
+        actual_tokens = getattr(usage, "prompt_token_count", None) if usage else None
+        if actual_tokens:
+            self.rate_limiter.record_usage(estimated_tokens, actual_tokens)
+    
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        """Cache key for a prompt, or None if caching is disabled"""
+        if self.response_cache is None:
+            return None
+        return ResponseCache.make_key(self.model_name, prompt, self.generation_config)
+    
+    def _get_cached(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        try:
+            return self.response_cache.get(cache_key)
+        except Exception as e:
+            print(f"⚠️ Response cache read failed: {e}")
+            return None
+    
+    def _store_cached(self, cache_key: Optional[str], parsed: Dict[str, Any]):
+        if cache_key is None:
+            return
+        try:
+            self.response_cache.set(cache_key, parsed)
+        except Exception as e:
+            print(f"⚠️ Response cache write failed: {e}")
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Response cache hit/miss counters and size"""
+        if self.response_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.response_cache.get_stats()}
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Rate limiter wait-time stats (latency added by quota throttling)"""
+        return self.rate_limiter.get_stats()
+    
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        """Get the in-flight request semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+            self._async_semaphores[loop] = semaphore
+        return semaphore
+    
+    @staticmethod
+    def _parse_response_text(response_text: str) -> Dict[str, Any]:
+        """Parse Gemini response text as JSON (strips markdown fences)"""
+        response_text = response_text.strip()
+        
+        # Clean response (remove markdown if present)
+        if response_text.startswith("```json"):
+            response_text = response_text.replace("```json", "").replace("```", "").strip()
+        
+        return json.loads(response_text)
+    
+    def _handle_attempt_failure(
+        self,
+        error: Exception,
+        attempt: int,
+        max_retries: int,
+        response_text: str = ""
+    ) -> Optional[float]:
+        """
+        Log a failed attempt and decide what happens next.
+        
+        Returns:
+            Seconds to wait before retrying, or None if retries are exhausted
+        """
+        if isinstance(error, json.JSONDecodeError):
+            print(f"⚠️ JSON parsing failed (attempt {attempt + 1}/{max_retries})")
+            print(f"   Error: {error}")
+            print(f"   Response preview: {response_text[:200]}...")
+            
+            if attempt < max_retries - 1:
+                print("   Retrying in 1 second...")
+                return 1
+            print(f"❌ All retries exhausted. Using fallback.")
+            return None
+        
+        print(f"❌ Gemini API error (attempt {attempt + 1}/{max_retries}): {error}")
+        
+        if attempt < max_retries - 1:
+            print("   Retrying in 2 seconds...")
+            return 2
+        print("❌ Using fallback after API errors")
+        return None
+    
+    async def agenerate_content(self, prompt: str):
+        """
+        Send a single prompt to Gemini without blocking the event loop.
+        
+        Bounded by the per-loop in-flight semaphore and the shared RPM/TPM limiter.
+        No retries - use agenerate_json for the full retry/fallback behaviour.
+        
+        Args:
+            prompt: The prompt to send
+        
+        Returns:
+            Raw Gemini response object
+        """
+        async with self._get_async_semaphore():
+            estimated_tokens = await self._await_rate_limit(prompt)
+            response = await self.model.generate_content_async(prompt)
+            self._record_token_usage(response, estimated_tokens)
+            return response
+    
+    def _json_attempts(self, max_retries: int):
+        """
+        Attempt/retry loop shared by generate_json and agenerate_json.
+        
+        A generator the caller drives: it yields the seconds to wait before the
+        next Gemini call (0 for the first) and is sent that call's response
+        text, or thrown the exception it raised. Returns the parsed JSON, or
+        None once retries are exhausted.
+        """
+        delay = 0
+        for attempt in range(max_retries):
+            response_text = ""
+            try:
+                response_text = yield delay
+                parsed = self._parse_response_text(response_text)
+                
+                print(f"✅ Gemini 2.5 Flash: Successful extraction (attempt {attempt + 1})")
+                return parsed
+                
+            except Exception as e:
+                delay = self._handle_attempt_failure(e, attempt, max_retries, response_text)
+                if delay is None:
+                    return None
+        return None
+    
+    def _generate_text(self, prompt: str) -> str:
+        """One rate-limited Gemini call (blocking)"""
+        estimated_tokens = self._wait_for_rate_limit(prompt)
+        response = self.model.generate_content(prompt)
+        self._record_token_usage(response, estimated_tokens)
+        return response.text
+    
+    async def agenerate_json(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        fallback: Optional[Dict] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async version of generate_json with the same retry/fallback semantics.
+        
+        At most `max_concurrent_requests` calls are in flight per event loop;
+        retry back-off uses asyncio.sleep and the response cache (SQLite) is
+        read and written in a worker thread, so other extractions keep running.
+        
+        Args:
+            prompt: The prompt to send
+            max_retries: Number of retry attempts on failure
+            fallback: Fallback response if all retries fail
+            use_cache: Serve/store the response from the persistent cache (if enabled)
+        
+        Returns:
+            Dict containing the parsed JSON response
+        """
+        cache_key = self._cache_key(prompt) if use_cache else None
+        if cache_key is not None:
+            cached = await asyncio.to_thread(self._get_cached, cache_key)
+            if cached is not None:
+                print("✅ Gemini 2.5 Flash: Served from response cache")
+                return cached
+        
+        attempts = self._json_attempts(max_retries)
+        try:
+            delay = next(attempts)
+            while True:
+                if delay:
+                    await asyncio.sleep(delay)
+                try:
+                    response_text = (await self.agenerate_content(prompt)).text
+                except Exception as e:
+                    delay = attempts.throw(e)
+                else:
+                    delay = attempts.send(response_text)
+        except StopIteration as done:
+            parsed = done.value
+        
+        if parsed is None:
+            return fallback or self._get_empty_fallback()
+        if cache_key is not None:
+            await asyncio.to_thread(self._store_cached, cache_key, parsed)
+        return parsed
     
     def generate_json(
         self, 
         prompt: str, 
         max_retries: int = 3,
-        fallback: Optional[Dict] = None
+        fallback: Optional[Dict] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Generate JSON response from Gemini 2.5 Flash.
@@ -57,56 +290,37 @@ class GeminiClient:
             prompt: The prompt to send
             max_retries: Number of retry attempts on failure
             fallback: Fallback response if all retries fail
+            use_cache: Serve/store the response from the persistent cache (if enabled).
+                Fallback responses are never cached.
         
         Returns:
             Dict containing the parsed JSON response
         """
-        for attempt in range(max_retries):
-            try:
-                # Rate limiting
-                self._wait_for_rate_limit()
-                
-                # Generate content with Gemini 2.5 Flash
-                response = self.model.generate_content(prompt)
-                
-                # Extract text
-                response_text = response.text.strip()
-                
-                # Clean response (remove markdown if present)
-                if response_text.startswith("```json"):
-                    response_text = response_text.replace("```json", "").replace("```", "").strip()
-                
-                # Parse JSON
-                parsed = json.loads(response_text)
-                
-                print(f"✅ Gemini 2.5 Flash: Successful extraction (attempt {attempt + 1})")
-                return parsed
-                
-            except json.JSONDecodeError as e:
-                print(f"⚠️ JSON parsing failed (attempt {attempt + 1}/{max_retries})")
-                print(f"   Error: {e}")
-                print(f"   Response preview: {response_text[:200]}...")
-                
-                if attempt < max_retries - 1:
-                    print("   Retrying in 1 second...")
-                    time.sleep(1)
-                    continue
-                else:
-                    print(f"❌ All retries exhausted. Using fallback.")
-                    return fallback or self._get_empty_fallback()
-            
-            except Exception as e:
-                print(f"❌ Gemini API error (attempt {attempt + 1}/{max_retries}): {e}")
-                
-                if attempt < max_retries - 1:
-                    print("   Retrying in 2 seconds...")
-                    time.sleep(2)
-                    continue
+        cache_key = self._cache_key(prompt) if use_cache else None
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            print("✅ Gemini 2.5 Flash: Served from response cache")
+            return cached
+        
+        attempts = self._json_attempts(max_retries)
+        try:
+            delay = next(attempts)
+            while True:
+                if delay:
+                    time.sleep(delay)
+                try:
+                    response_text = self._generate_text(prompt)
+                except Exception as e:
+                    delay = attempts.throw(e)
                 else:
-                    print("❌ Using fallback after API errors")
-                    return fallback or self._get_empty_fallback()
+                    delay = attempts.send(response_text)
+        except StopIteration as done:
+            parsed = done.value
         
-        return fallback or self._get_empty_fallback()
+        if parsed is None:
+            return fallback or self._get_empty_fallback()
+        self._store_cached(cache_key, parsed)
+        return parsed
     
     def _get_empty_fallback(self) -> Dict:
         """Default empty fallback structure"""
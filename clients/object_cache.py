@@ -0,0 +1,170 @@
+"""
+R2 Object Cache
+Size-bounded local disk cache for R2 objects, validated by ETag
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ObjectCache:
+    """
+    Disk-backed LRU cache of R2 object contents.
+
+    Every entry keeps the ETag of the object version it holds, so the caller
+    can revalidate with a conditional GET (If-None-Match) and only download
+    the object again when it changed. Contents live in one file per key; a
+    SQLite index tracks ETag, size and last access for LRU eviction once the
+    total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Maximum total size of cached objects
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), check_same_thread=False, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS objects (
+                key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_objects_last_access ON objects(last_access)")
+        self._conn.commit()
+
+    def _path(self, key: str) -> str:
+        """Content file of a key"""
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def get_etag(self, key: str) -> Optional[str]:
+        """ETag of the cached version of a key, or None if not cached"""
+        with self._lock:
+            row = self._conn.execute("SELECT etag FROM objects WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def read(self, key: str, etag: str) -> Optional[bytes]:
+        """
+        Cached contents of a key (after the caller confirmed `etag` is current); counts a hit
+
+        Returns:
+            Contents, or None if the entry is gone or holds another version
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+
+        with self._lock:
+            row = self._conn.execute("SELECT etag FROM objects WHERE key = ?", (key,)).fetchone()
+            if data is None or not row or row[0] != etag:
+                return None
+            self._conn.execute("UPDATE objects SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+
+        return data
+
+    def record_miss(self):
+        """Count a lookup that had to transfer the object (not cached, changed, or entry lost)"""
+        with self._lock:
+            self.misses += 1
+
+    def store(self, key: str, etag: str, data: bytes):
+        """Cache the contents of a key (replacing an older version) and evict LRU entries"""
+        if not etag or len(data) > self.max_bytes:
+            return
+
+        # Write to a temp file first, so readers never see a partial object
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"⚠️ R2 object cache write failed for {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO objects (key, etag, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, etag, len(data), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def invalidate(self, key: str):
+        """Drop a key from the cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM objects WHERE key = ?", (key,))
+            self._conn.commit()
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least-recently-used entries until the size limit is met"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = self._conn.execute("SELECT key, size FROM objects ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM objects WHERE key = ?", (key,))
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= size
+            evicted += 1
+
+        logger.debug(f"R2 object cache evicted {evicted} entries")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters (this process) and current cache size"""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes
+        }
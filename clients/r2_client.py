@@ -1,14 +1,19 @@
 
 """
 Cloudflare R2 Storage Client
-Downloads CV files from R2 bucket for extraction
+Downloads CV files from R2 bucket for extraction (to memory or to disk)
 """
 
 import os
+import time
+import threading
 import boto3
 from botocore.client import Config as BotoConfig
 from botocore.exceptions import ClientError
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+from itertools import islice
 import tempfile
 import logging
 
@@ -16,10 +21,57 @@ import logging
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from config import config
+from clients.object_cache import ObjectCache
 
 logger = logging.getLogger(__name__)
 
 
+class TransferStats:
+    """Download counters and per-object latency (thread-safe)"""
+    
+    def __init__(self, latency_window: int = 10000):
+        self.objects = 0
+        self.errors = 0
+        self.bytes = 0
+        self.started_at = time.time()
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+    
+    def record(self, size: int, seconds: float):
+        """Account for one downloaded object"""
+        with self._lock:
+            self.objects += 1
+            self.bytes += size
+            self._latencies.append(seconds)
+    
+    def record_error(self):
+        """Account for one failed download"""
+        with self._lock:
+            self.errors += 1
+    
+    def as_dict(self) -> Dict:
+        """Totals, throughput and latency percentiles (over the last `latency_window` objects)"""
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            latencies = sorted(self._latencies)
+            objects, errors, total_bytes = self.objects, self.errors, self.bytes
+        
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else 0.0
+        
+        return {
+            "objects": objects,
+            "errors": errors,
+            "bytes": total_bytes,
+            "elapsed_seconds": round(elapsed, 2),
+            "bytes_per_second": round(total_bytes / elapsed) if elapsed > 0 else 0,
+            "objects_per_second": round(objects / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_avg_seconds": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "latency_p50_seconds": percentile(0.5),
+            "latency_p95_seconds": percentile(0.95)
+        }
+
+
 class R2Client:
     """
     Cloudflare R2 storage client for fetching CV files.
@@ -43,10 +95,21 @@ class R2Client:
             aws_secret_access_key=config.R2_SECRET_ACCESS_KEY,
             config=BotoConfig(
                 signature_version='s3v4',
-                region_name='auto'
+                region_name='auto',
+                max_pool_connections=config.R2_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True,
+                retries={'max_attempts': 5, 'mode': 'standard'}
             )
         )
         
+        # Cumulative download stats of this client
+        self.transfer_stats = TransferStats()
+        
+        # Local copies of downloaded objects, revalidated by ETag
+        self.object_cache = None
+        if config.R2_CACHE_ENABLED:
+            self.object_cache = ObjectCache(config.R2_CACHE_DIR, config.R2_CACHE_MAX_MB * 1024 * 1024)
+        
         logger.info(f"✅ R2 Client initialized (bucket: {self.bucket_name})")
     
     def download_file(self, r2_key: str, local_path: Optional[str] = None) -> str:
@@ -97,18 +160,196 @@ class R2Client:
             return local_path
             
         except ClientError as e:
-            error_code = e.response.get('Error', {}).get('Code', '')
-            if error_code == 'NoSuchKey' or error_code == '404':
-                logger.error(f"❌ File not found in R2: {r2_key}")
-                raise FileNotFoundError(f"File not found in R2 bucket: {r2_key}")
-            else:
-                logger.error(f"❌ R2 download failed: {e}")
-                raise Exception(f"R2 download error: {str(e)}")
+            self._raise_for_client_error(e, r2_key)
         
         except Exception as e:
             logger.error(f"❌ Download failed: {e}")
             raise
     
+    def open_stream(self, r2_key: str):
+        """
+        Open a file in R2 as a streaming body (nothing is written to disk).
+        
+        Args:
+            r2_key: File key in R2 (e.g., "cv_files/candidate_123.pdf")
+        
+        Returns:
+            (readable binary stream, content length); close the stream when done
+        
+        Raises:
+            FileNotFoundError: If file doesn't exist in R2
+            ValueError: If file is larger than MAX_FILE_SIZE_MB
+            Exception: On download failure
+        """
+        response = self._get_object(r2_key)
+        return response['Body'], response.get('ContentLength', 0)
+    
+    def _get_object(self, r2_key: str, if_none_match: Optional[str] = None) -> Optional[dict]:
+        """
+        GET an object, optionally conditional on its ETag.
+        
+        Returns:
+            get_object response, or None if `if_none_match` is still current (304)
+        """
+        params = {'Bucket': self.bucket_name, 'Key': r2_key}
+        if if_none_match:
+            params['IfNoneMatch'] = if_none_match
+        
+        try:
+            response = self.s3_client.get_object(**params)
+        except ClientError as e:
+            if if_none_match and self._is_not_modified(e):
+                return None
+            self._raise_for_client_error(e, r2_key)
+        
+        size = response.get('ContentLength', 0)
+        max_bytes = config.MAX_FILE_SIZE_MB * 1024 * 1024
+        if size > max_bytes:
+            response['Body'].close()
+            raise ValueError(f"File too large in R2: {r2_key} ({size} bytes, max {config.MAX_FILE_SIZE_MB} MB)")
+        
+        return response
+    
+    def download_bytes(self, r2_key: str) -> bytes:
+        """
+        Download a file from R2 into memory.
+        
+        Args:
+            r2_key: File key in R2 (e.g., "cv_files/candidate_123.pdf")
+        
+        Returns:
+            File content
+        
+        Raises:
+            FileNotFoundError: If file doesn't exist in R2
+            ValueError: If file is larger than MAX_FILE_SIZE_MB
+            Exception: On download failure or empty file
+        """
+        logger.debug(f"📥 Downloading from R2 (in memory): {r2_key}")
+        started = time.time()
+        
+        try:
+            # With a cached copy, one conditional GET either confirms it (304) or returns the new version
+            cached_etag = self.object_cache.get_etag(r2_key) if self.object_cache else None
+            data = None
+            response = self._get_object(r2_key, if_none_match=cached_etag)
+            if response is None:
+                data = self.object_cache.read(r2_key, cached_etag)
+                if data is None:
+                    # Cache entry vanished or changed under us - fetch unconditionally
+                    response = self._get_object(r2_key)
+            
+            if response is not None:
+                if self.object_cache:
+                    self.object_cache.record_miss()
+                body = response['Body']
+                try:
+                    data = body.read()
+                except Exception as e:
+                    logger.error(f"❌ R2 download failed: {e}")
+                    raise Exception(f"R2 download error: {str(e)}")
+                finally:
+                    body.close()
+                
+                if not data:
+                    raise Exception(f"Download failed - empty file in R2: {r2_key}")
+                if self.object_cache:
+                    self.object_cache.store(r2_key, response.get('ETag'), data)
+        except Exception:
+            self.transfer_stats.record_error()
+            raise
+        
+        self.transfer_stats.record(len(data), time.time() - started)
+        logger.debug(f"✅ {'Cached' if response is None else 'Downloaded'} {len(data)} bytes from {r2_key}")
+        return data
+    
+    def prefetch(
+        self,
+        keys: Iterable[Union[str, Dict]],
+        max_workers: Optional[int] = None,
+        stats: Optional[TransferStats] = None
+    ) -> Iterator[Tuple[str, Optional[bytes], Optional[Exception]]]:
+        """
+        Download a stream of keys in parallel, yielding files as they arrive.
+        
+        Up to `max_workers` GETs run at once over the shared connection pool;
+        at most 2x that many downloads are queued ahead of the consumer, so a
+        lazy key stream (e.g. iter_files) is never listed or buffered in full.
+        
+        Args:
+            keys: R2 keys, or iter_files dicts
+            max_workers: Parallel downloads (default R2_PREFETCH_WORKERS, capped
+                at R2_MAX_POOL_CONNECTIONS)
+            stats: Optional TransferStats to record this run into (bytes/s, latency)
+        
+        Yields:
+            (key, content, None) or (key, None, error), in completion order
+        """
+        workers = max(1, min(max_workers or config.R2_PREFETCH_WORKERS, config.R2_MAX_POOL_CONNECTIONS))
+        stats = stats if stats is not None else TransferStats()
+        
+        def fetch(key: str) -> Tuple[bytes, float]:
+            started = time.time()
+            return self.download_bytes(key), time.time() - started
+        
+        def collect(future, key):
+            try:
+                data, seconds = future.result()
+            except Exception as e:
+                stats.record_error()
+                return key, None, e
+            stats.record(len(data), seconds)
+            return key, data, None
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="r2-prefetch") as executor:
+            pending = {}
+            for key in keys:
+                if isinstance(key, dict):
+                    key = key["key"]
+                pending[executor.submit(fetch, key)] = key
+                
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield collect(future, pending.pop(future))
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield collect(future, pending.pop(future))
+        
+        summary = stats.as_dict()
+        logger.info(
+            f"📦 R2 prefetch: {summary['objects']} objects ({summary['errors']} failed), "
+            f"{summary['bytes_per_second'] / 1024 / 1024:.2f} MB/s, {summary['objects_per_second']} objects/s, "
+            f"latency avg {summary['latency_avg_seconds']}s / p95 {summary['latency_p95_seconds']}s"
+        )
+    
+    def get_transfer_stats(self) -> Dict:
+        """Cumulative download throughput and latency of this client"""
+        return self.transfer_stats.as_dict()
+    
+    def get_cache_stats(self) -> Optional[Dict]:
+        """Local object cache hit/miss counters and size, or None if the cache is disabled"""
+        return self.object_cache.get_stats() if self.object_cache else None
+    
+    @staticmethod
+    def _is_not_modified(error: ClientError) -> bool:
+        """Whether a ClientError is a 304 answer to a conditional GET"""
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        code = error.response.get('Error', {}).get('Code')
+        return status == 304 or code in ('304', 'NotModified')
+    
+    @staticmethod
+    def _raise_for_client_error(error: ClientError, r2_key: str):
+        """Re-raise a boto ClientError as FileNotFoundError or a plain download error"""
+        error_code = error.response.get('Error', {}).get('Code', '')
+        if error_code == 'NoSuchKey' or error_code == '404':
+            logger.error(f"❌ File not found in R2: {r2_key}")
+            raise FileNotFoundError(f"File not found in R2 bucket: {r2_key}")
+        logger.error(f"❌ R2 download failed: {error}")
+        raise Exception(f"R2 download error: {str(error)}")
+    
     def file_exists(self, r2_key: str) -> bool:
         """Check if file exists in R2 bucket"""
         try:
@@ -136,26 +377,47 @@ class R2Client:
             logger.error(f"❌ Failed to get file info: {e}")
             return {}
     
-    def list_files(self, prefix: str = "", max_files: int = 100) -> list:
-        """List files in R2 bucket with optional prefix"""
+    def iter_files(self, prefix: str = "", page_size: int = 1000) -> Iterator[dict]:
+        """
+        Iterate over every file under a prefix, one listing page at a time.
+        
+        Follows continuation tokens, so there is no cap on the number of keys;
+        only one page (at most `page_size` keys) is held in memory.
+        
+        Args:
+            prefix: Key prefix (e.g., "cv_files/")
+            page_size: Keys per list request (R2/S3 maximum is 1000)
+        
+        Yields:
+            Dicts with key, size, last_modified
+        
+        Raises:
+            Exception: On listing failure
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=prefix,
+            PaginationConfig={'PageSize': page_size}
+        )
+        
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix,
-                MaxKeys=max_files
-            )
-            
-            files = []
-            for obj in response.get('Contents', []):
-                files.append({
-                    "key": obj.get('Key'),
-                    "size": obj.get('Size'),
-                    "last_modified": obj.get('LastModified')
-                })
-            
-            return files
-            
+            for page in pages:
+                for obj in page.get('Contents', []):
+                    yield {
+                        "key": obj.get('Key'),
+                        "size": obj.get('Size'),
+                        "last_modified": obj.get('LastModified')
+                    }
         except ClientError as e:
+            logger.error(f"❌ Failed to list files: {e}")
+            raise Exception(f"R2 list error: {str(e)}")
+    
+    def list_files(self, prefix: str = "", max_files: int = 100) -> list:
+        """List up to `max_files` files in R2 bucket with optional prefix"""
+        try:
+            return list(islice(self.iter_files(prefix, page_size=max(1, min(max_files, 1000))), max_files))
+        except Exception as e:
             logger.error(f"❌ Failed to list files: {e}")
             return []
 
@@ -0,0 +1,258 @@
+"""
+Token-Bucket Rate Limiter
+Shares Gemini RPM/TPM quota across threads and processes (uvicorn workers)
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any, Optional
+
+try:
+    import fcntl
+    FILE_LOCK_AVAILABLE = True
+except ImportError:
+    # Windows: fall back to a process-local bucket
+    fcntl = None
+    FILE_LOCK_AVAILABLE = False
+
+# Import config from parent directory
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketRateLimiter:
+    """
+    Two token buckets (requests per minute and tokens per minute).
+
+    Bucket state lives in a small JSON file guarded by an exclusive flock,
+    so every thread and every worker process on the host draws from the
+    same quota. Without fcntl the state is kept in memory (per process).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        state_path: Optional[str] = None
+    ):
+        """
+        Initialize the limiter
+
+        Args:
+            requests_per_minute: Request quota (bucket capacity and refill per minute)
+            tokens_per_minute: Token quota (bucket capacity and refill per minute)
+            state_path: Shared state file. None keeps state in this process only.
+        """
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("❌ Rate limits must be positive")
+
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.state_path = state_path if FILE_LOCK_AVAILABLE else None
+
+        self._lock = threading.Lock()
+        self._fd = None
+        self._fd_pid = None
+        self._local_state = self._full_state(time.time())
+
+        # Wait-time stats (per process)
+        self._acquired = 0
+        self._waited = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+        if state_path and not FILE_LOCK_AVAILABLE:
+            logger.warning("⚠️ fcntl not available - rate limiter is process-local")
+
+    def _full_state(self, now: float) -> Dict[str, float]:
+        return {
+            "requests": float(self.requests_per_minute),
+            "tokens": float(self.tokens_per_minute),
+            "updated": now
+        }
+
+    def _get_fd(self) -> int:
+        """Open the state file once per process (flock locks are per open file)"""
+        pid = os.getpid()
+        if self._fd is None or self._fd_pid != pid:
+            self._fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_pid = pid
+        return self._fd
+
+    def _read_state(self, fd: int, now: float) -> Dict[str, float]:
+        os.lseek(fd, 0, os.SEEK_SET)
+        raw = os.read(fd, 4096)
+        try:
+            state = json.loads(raw) if raw else None
+        except ValueError:
+            state = None
+        if not state or not all(k in state for k in ("requests", "tokens", "updated")):
+            return self._full_state(now)
+        return state
+
+    @staticmethod
+    def _write_state(fd: int, state: Dict[str, float]):
+        data = json.dumps(state).encode()
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, data)
+        os.ftruncate(fd, len(data))
+
+    def _refill_and_take(self, state: Dict[str, float], now: float, tokens: int) -> float:
+        """
+        Refill both buckets and try to take one request plus `tokens` tokens.
+
+        Returns:
+            0 if taken, otherwise seconds until enough quota is available
+        """
+        elapsed = max(0.0, now - state["updated"])
+        state["requests"] = min(
+            float(self.requests_per_minute),
+            state["requests"] + elapsed * self.requests_per_minute / 60.0
+        )
+        state["tokens"] = min(
+            float(self.tokens_per_minute),
+            state["tokens"] + elapsed * self.tokens_per_minute / 60.0
+        )
+        state["updated"] = now
+
+        # A single prompt larger than the whole bucket would never fit
+        tokens = min(tokens, self.tokens_per_minute)
+
+        request_deficit = 1 - state["requests"]
+        token_deficit = tokens - state["tokens"]
+        if request_deficit <= 0 and token_deficit <= 0:
+            state["requests"] -= 1
+            state["tokens"] -= tokens
+            return 0.0
+
+        return max(
+            request_deficit * 60.0 / self.requests_per_minute,
+            token_deficit * 60.0 / self.tokens_per_minute
+        )
+
+    def _update_state(self, fn) -> float:
+        """Run fn(state, now) under the thread lock and (if shared) the file lock"""
+        with self._lock:
+            now = time.time()
+            if not self.state_path:
+                return fn(self._local_state, now)
+
+            fd = self._get_fd()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                state = self._read_state(fd, now)
+                result = fn(state, now)
+                self._write_state(fd, state)
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _try_acquire(self, tokens: int) -> float:
+        return self._update_state(lambda state, now: self._refill_and_take(state, now, tokens))
+
+    def _record_wait(self, waited: float):
+        with self._lock:
+            self._acquired += 1
+            if waited > 0:
+                self._waited += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            self._recent_waits.append(waited)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request and `tokens` tokens are available.
+
+        Args:
+            tokens: Estimated tokens for this request
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(tokens)
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+        self._record_wait(waited)
+        return waited
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """
+        Async version of acquire (does not block the event loop)
+
+        The state update takes a file lock another process may hold, so it
+        runs in a worker thread; the wait between attempts is an asyncio sleep.
+        """
+        waited = 0.0
+        while True:
+            delay = await asyncio.to_thread(self._try_acquire, tokens)
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+        self._record_wait(waited)
+        return waited
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """
+        Correct the token bucket once the real token count is known.
+
+        Debits (or refunds) the difference between actual and estimated tokens.
+        """
+        delta = actual_tokens - estimated_tokens
+        if not delta:
+            return
+
+        def adjust(state, now):
+            state["tokens"] = min(float(self.tokens_per_minute), state["tokens"] - delta)
+            return 0.0
+
+        self._update_state(adjust)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Wait-time statistics for this process"""
+        with self._lock:
+            recent = sorted(self._recent_waits)
+            acquired = self._acquired
+            stats = {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "shared": bool(self.state_path),
+                "acquired": acquired,
+                "waited": self._waited,
+                "total_wait_seconds": round(self._total_wait, 3),
+                "avg_wait_seconds": round(self._total_wait / acquired, 4) if acquired else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+            }
+        if recent:
+            stats["p50_wait_seconds"] = round(recent[len(recent) // 2], 4)
+            stats["p95_wait_seconds"] = round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 4)
+        return stats
+
+
+# Singleton instance
+_rate_limiter = None
+
+
+def get_rate_limiter() -> TokenBucketRateLimiter:
+    """Get or create the singleton Gemini rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucketRateLimiter(
+            requests_per_minute=config.GEMINI_RPM,
+            tokens_per_minute=config.GEMINI_TPM,
+            state_path=config.GEMINI_RATE_LIMIT_STATE_FILE or None
+        )
+    return _rate_limiter
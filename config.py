@@ -5,6 +5,7 @@ Centralized configuration for extraction and matching services
 """
 
 import os
+import tempfile
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -17,8 +18,25 @@ class Config:
     # Gemini API Configuration
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = "gemini-2.5-flash"
-    GEMINI_RATE_LIMIT_MS: int = 100  # Minimum ms between requests
+    GEMINI_RATE_LIMIT_MS: int = 100  # Legacy per-process spacing (superseded by GEMINI_RPM/GEMINI_TPM)
+    GEMINI_RPM: int = int(os.getenv("GEMINI_RPM", "1000"))  # Requests per minute (shared by all workers)
+    GEMINI_TPM: int = int(os.getenv("GEMINI_TPM", "1000000"))  # Input tokens per minute (shared by all workers)
+    GEMINI_RATE_LIMIT_STATE_FILE: str = os.getenv(
+        "GEMINI_RATE_LIMIT_STATE_FILE",
+        os.path.join(tempfile.gettempdir(), "ai_modules_gemini_rate_limit.json")
+    )  # Empty string = process-local limiter
+    
+    # Gemini Response Cache (parsed JSON responses, keyed by model + prompt + generation config)
+    GEMINI_CACHE_ENABLED: bool = os.getenv("GEMINI_CACHE_ENABLED", "false").lower() == "true"
+    GEMINI_CACHE_PATH: str = os.getenv(
+        "GEMINI_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "ai_modules_gemini_cache.sqlite3")
+    )
+    GEMINI_CACHE_MAX_ENTRIES: int = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "20000"))
+    GEMINI_CACHE_MAX_MB: int = int(os.getenv("GEMINI_CACHE_MAX_MB", "256"))
+    GEMINI_CACHE_TTL_HOURS: int = int(os.getenv("GEMINI_CACHE_TTL_HOURS", "720"))  # 0 = never expire
     GEMINI_MAX_RETRIES: int = 3
+    GEMINI_MAX_CONCURRENT_REQUESTS: int = int(os.getenv("GEMINI_MAX_CONCURRENT_REQUESTS", "16"))  # In-flight async calls per event loop
     
     # R2 Storage Configuration
     R2_ACCOUNT_ID: str = os.getenv("R2_ACCOUNT_ID", "")
@@ -26,17 +44,37 @@ class Config:
     R2_SECRET_ACCESS_KEY: str = os.getenv("R2_SECRET_ACCESS_KEY", "")
     R2_BUCKET_NAME: str = os.getenv("R2_BUCKET_NAME", "cv-pdf")
     R2_ENDPOINT_URL: Optional[str] = None  # Auto-generated from account_id
+    R2_MAX_POOL_CONNECTIONS: int = int(os.getenv("R2_MAX_POOL_CONNECTIONS", "32"))  # Reused HTTP connections (>= prefetch workers)
+    R2_PREFETCH_WORKERS: int = int(os.getenv("R2_PREFETCH_WORKERS", "16"))  # Parallel downloads in R2Client.prefetch
+    R2_CACHE_ENABLED: bool = os.getenv("R2_CACHE_ENABLED", "false").lower() == "true"  # ETag-validated local copies
+    R2_CACHE_DIR: str = os.getenv("R2_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ai_modules_r2_cache"))
+    R2_CACHE_MAX_MB: int = int(os.getenv("R2_CACHE_MAX_MB", "1024"))
     
     # File Processing Configuration
     PDF_MIN_WORDS: int = 50
     DOCX_MIN_WORDS: int = 50
     MAX_FILE_SIZE_MB: int = 10
+    PDF_MAX_PAGES: int = int(os.getenv("PDF_MAX_PAGES", "20"))  # Pages read per PDF (0 = all)
+    PDF_MAX_CHARS: int = int(os.getenv("PDF_MAX_CHARS", "60000"))  # Text kept per PDF (0 = unlimited)
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "0"))  # Multi-process extraction from this many pages (0 = off)
+    PDF_PARALLEL_WORKERS: int = int(os.getenv("PDF_PARALLEL_WORKERS", "4"))
     
     # Extraction Configuration
     CV_SNAPSHOT_MIN_WORDS: int = 120
     CV_SNAPSHOT_MAX_WORDS: int = 250
     JD_SNAPSHOT_TARGET_WORDS: int = 200
     CV_RECENT_EXPERIENCE_YEARS: int = 4
+    CV_PROMPT_MAX_TOKENS: int = int(os.getenv("CV_PROMPT_MAX_TOKENS", "3000"))  # CV text budget per extraction prompt (0 = no trimming)
+    JD_PROMPT_MAX_TOKENS: int = int(os.getenv("JD_PROMPT_MAX_TOKENS", "2000"))  # JD text budget per keywords prompt (0 = no trimming)
+    
+    # Bulk CV Extraction Pipeline (extractors/cv_pipeline.py)
+    CV_PIPELINE_FETCH_WORKERS: int = int(os.getenv("CV_PIPELINE_FETCH_WORKERS", "8"))  # R2 download threads
+    CV_PIPELINE_PARSE_WORKERS: int = int(os.getenv("CV_PIPELINE_PARSE_WORKERS", "0"))  # PDF/DOCX parse processes (0 = CPU count)
+    CV_PIPELINE_LLM_WORKERS: int = int(os.getenv("CV_PIPELINE_LLM_WORKERS", "8"))  # Concurrent Gemini extractions
+    CV_PIPELINE_QUEUE_SIZE: int = int(os.getenv("CV_PIPELINE_QUEUE_SIZE", "32"))  # Items buffered between stages
+    
+    # Skill Taxonomy (extra JSON alias table merged over utils/skill_aliases.json)
+    SKILL_ALIASES_PATH: str = os.getenv("SKILL_ALIASES_PATH", "")
     
     # Matching Configuration
     MATCH_MIN_SCORE: int = 0
@@ -47,6 +85,42 @@ class Config:
         "soft_skills": 15,
         "good_to_have_skills": 20
     }
+    MATCH_MAX_CONCURRENT_BATCHES: int = int(os.getenv("MATCH_MAX_CONCURRENT_BATCHES", "4"))  # Stage 2 Gemini batches in flight
+    MATCH_BATCH_MAX_PROMPT_TOKENS: int = int(os.getenv("MATCH_BATCH_MAX_PROMPT_TOKENS", "6000"))  # Per Stage 2 prompt
+    MATCH_BATCH_MAX_OUTPUT_TOKENS: int = int(os.getenv("MATCH_BATCH_MAX_OUTPUT_TOKENS", "6000"))  # Expected JSON response size
+    MATCH_BATCH_MAX_CVS: int = int(os.getenv("MATCH_BATCH_MAX_CVS", "40"))  # Hard cap on CVs per batch
+    # Similar-skill detection: "batch" = AI per CV batch, "jd_expansion" = one AI call per JD, resolved locally
+    MATCH_SIMILARITY_MODE: str = os.getenv("MATCH_SIMILARITY_MODE", "batch")
+    MATCH_EXPANSION_CACHE_SIZE: int = int(os.getenv("MATCH_EXPANSION_CACHE_SIZE", "256"))  # JDs kept in memory
+    # Learned skill-similarity graph (fed by Stage 2 AI results, lets known CVs skip the LLM). Opt-in:
+    # known edges replace the AI similarity verdict, so results depend on what earlier runs observed
+    MATCH_SKILL_GRAPH_ENABLED: bool = os.getenv("MATCH_SKILL_GRAPH_ENABLED", "false").lower() == "true"
+    MATCH_SKILL_GRAPH_MIN_OBSERVATIONS: int = int(os.getenv("MATCH_SKILL_GRAPH_MIN_OBSERVATIONS", "3"))
+    MATCH_SKILL_GRAPH_MIN_CONFIDENCE: float = float(os.getenv("MATCH_SKILL_GRAPH_MIN_CONFIDENCE", "0.6"))
+    # Inverted skill index: Stage 2 only sees CVs covering >= MIN_HITS of the JD's must-have skills
+    # (exactly or via a known equivalent). Opt-in: it changes results - CVs whose must-have skills only
+    # the AI similarity step would have matched ("Flask" for "Django" with no graph edge) are dropped.
+    MATCH_SKILL_INDEX_ENABLED: bool = os.getenv("MATCH_SKILL_INDEX_ENABLED", "false").lower() == "true"
+    MATCH_SKILL_INDEX_MIN_HITS: int = int(os.getenv("MATCH_SKILL_INDEX_MIN_HITS", "1"))
+    # Per-(JD, CV) score store: re-runs only re-score new/changed CVs. Opt-in: a stored score is reused
+    # until the JD, CV, scoring rules, alias table or skill graph verdicts change, not re-asked from the AI
+    MATCH_RESULT_STORE_ENABLED: bool = os.getenv("MATCH_RESULT_STORE_ENABLED", "false").lower() == "true"
+    # CV-to-JD matching: open JDs held in memory, LLM only for the best local candidates
+    MATCH_OPEN_JD_STATUS_FIELD: str = os.getenv("MATCH_OPEN_JD_STATUS_FIELD", "status")  # "" = every JD is open
+    MATCH_OPEN_JD_STATUSES: str = os.getenv("MATCH_OPEN_JD_STATUSES", "Open,Active")
+    MATCH_JD_INDEX_REFRESH_SECONDS: int = int(os.getenv("MATCH_JD_INDEX_REFRESH_SECONDS", "60"))
+    MATCH_CV_TO_JD_AI_TOP_N: int = int(os.getenv("MATCH_CV_TO_JD_AI_TOP_N", "10"))
+    MATCH_DB_READ_CHUNK_SIZE: int = int(os.getenv("MATCH_DB_READ_CHUNK_SIZE", "1000"))  # Stage 1 rows streamed per fetch
+    MATCH_DB_WRITE_CHUNK_SIZE: int = int(os.getenv("MATCH_DB_WRITE_CHUNK_SIZE", "1000"))  # Stage 3 rows per bulk UPDATE
+    MATCH_JOB_WORKERS: int = int(os.getenv("MATCH_JOB_WORKERS", "2"))  # Background matchmaking jobs run at once
+    MATCH_JOB_LEASE_SECONDS: int = int(os.getenv("MATCH_JOB_LEASE_SECONDS", "120"))  # Running job without heartbeat this long is requeued
+    
+    # Local Data (SQLite stores for matchmaking state; set AI_MODULES_DATA_DIR to keep them across reboots)
+    DATA_DIR: str = os.getenv("AI_MODULES_DATA_DIR", os.path.join(tempfile.gettempdir(), "ai_modules_data"))
+    MATCH_SKILL_GRAPH_PATH: str = os.getenv("MATCH_SKILL_GRAPH_PATH", os.path.join(DATA_DIR, "skill_graph.sqlite3"))
+    MATCH_RESULT_STORE_PATH: str = os.getenv("MATCH_RESULT_STORE_PATH", os.path.join(DATA_DIR, "match_results.sqlite3"))
+    MATCH_SKILL_INDEX_PATH: str = os.getenv("MATCH_SKILL_INDEX_PATH", os.path.join(DATA_DIR, "skill_index.sqlite3"))
+    MATCH_JOB_STORE_PATH: str = os.getenv("MATCH_JOB_STORE_PATH", os.path.join(DATA_DIR, "matchmaker_jobs.sqlite3"))
     
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
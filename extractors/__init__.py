@@ -6,8 +6,11 @@ CV and JD extraction services
 
 from .cv_extractor import CVExtractor
 from .jd_extractor import JDExtractorService
+from .cv_pipeline import CVExtractionPipeline, extract_many
 
 __all__ = [
     "CVExtractor",
-    "JDExtractorService"
+    "JDExtractorService",
+    "CVExtractionPipeline",
+    "extract_many"
 ]
\ No newline at end of file
@@ -8,9 +8,13 @@ import os
 from typing import Dict, Any, Optional
 
 # Import dependencies
+from config import config
 from clients.gemini_client import get_gemini_client
 from prompts.cv_extraction_prompt import get_cv_extraction_prompt
 from utils.file_utils import FileTextExtractor
+from utils.text_compaction import compact_cv_text
+from utils.skill_taxonomy import canonicalize_skills
+from utils.skill_index import get_skill_index
 
 # Try to import R2 client (optional, not yet implemented)
 try:
@@ -39,13 +43,14 @@ class CVExtractor:
             self.r2_client = None
             print("✅ CV Extractor initialized (Gemini 2.5 Flash only - R2 not available)")
     
-    def extract_from_file(self, file_path: str) -> Dict[str, Any]:
+    def extract_from_file(self, file_path: str, cv_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Extract keywords from CV file (PDF or DOCX).
         Supports both local paths and R2 keys.
         
         Args:
             file_path: Local path OR R2 key (e.g., "cv_files/candidate_123.pdf")
+            cv_id: Optional CV ID - updates the matchmaker skill index when given
         
         Returns:
             Dict with 7 fields matching DB columns
@@ -59,51 +64,41 @@ class CVExtractor:
         
         if is_r2_file:
             print(f"R2 File: {file_path}")
-            local_path = self._download_from_r2(file_path)
-            cleanup_after = True  # Delete temp file after extraction
+            source = self._download_from_r2(file_path)  # In memory - no temp file
         else:
             print(f"Local File: {file_path}")
-            local_path = file_path
-            cleanup_after = False
+            source = file_path
         
-        try:
-            # Step 2: Extract text from local file
-            print(f"\n🔍 Extracting text from: {os.path.basename(local_path)}")
-            cv_text = self.file_extractor.extract_text(local_path)
-            
-            if not cv_text:
-                print("❌ Text extraction failed")
-                return self._get_fallback()
-            
-            # Step 3: Validate text
-            print("\n✅ Validating extracted text...")
-            if not self.file_extractor.validate_text(cv_text, min_words=50):
-                print("❌ Text validation failed")
-                return self._get_fallback()
-            
-            # Step 4: Extract using AI
-            result = self.extract_from_text(cv_text)
-            
-            return result
-            
-        finally:
-            # Cleanup temp file if downloaded from R2
-            if cleanup_after and os.path.exists(local_path):
-                os.remove(local_path)
-                print(f"🗑️ Cleaned up temp file: {local_path}")
+        # Step 2: Extract text (the key/path extension selects PDF or DOCX)
+        print(f"\n🔍 Extracting text from: {os.path.basename(file_path)}")
+        cv_text = self.file_extractor.extract_text(source, filename=file_path)
+        
+        if not cv_text:
+            print("❌ Text extraction failed")
+            return self._get_fallback()
+        
+        # Step 3: Validate text
+        print("\n✅ Validating extracted text...")
+        if not self.file_extractor.validate_text(cv_text, min_words=50):
+            print("❌ Text validation failed")
+            return self._get_fallback()
+        
+        # Step 4: Extract using AI
+        return self.extract_from_text(cv_text, cv_id=cv_id)
     
-    def extract_from_r2(self, r2_key: str) -> Dict[str, Any]:
+    def extract_from_r2(self, r2_key: str, cv_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Extract keywords from CV stored in R2 bucket.
         Convenience method that explicitly uses R2.
         
         Args:
             r2_key: File key in R2 (e.g., "cv_files/candidate_123.pdf")
+            cv_id: Optional CV ID - updates the matchmaker skill index when given
         
         Returns:
             Dict with 7 fields matching DB columns
         """
-        return self.extract_from_file(r2_key)
+        return self.extract_from_file(r2_key, cv_id=cv_id)
     
     def _is_r2_key(self, path: str) -> bool:
         """
@@ -125,45 +120,36 @@ class CVExtractor:
         # Otherwise, assume it's R2 key
         return True
     
-    def _download_from_r2(self, r2_key: str) -> str:
-        """Download file from R2 and return local temp path"""
+    def _download_from_r2(self, r2_key: str) -> bytes:
+        """Download file from R2 into memory"""
         if not self.r2_client:
             raise NotImplementedError("R2 client not available. Please implement clients/r2_client.py")
         
         try:
-            # Check if file exists in R2
-            if not self.r2_client.file_exists(r2_key):
-                raise FileNotFoundError(f"File not found in R2: {r2_key}")
-            
-            # Get file info and download
-            file_info = self.r2_client.download_file(r2_key)
-            
-            if not file_info or 'local_path' not in file_info:
-                raise Exception(f"Failed to download from R2: {r2_key}")
-            
-            local_path = file_info['local_path']
-            print(f"✅ Downloaded from R2: {r2_key} → {local_path}")
-            
-            return local_path
+            # A missing key raises FileNotFoundError from the GET itself (no HEAD needed)
+            data = self.r2_client.download_bytes(r2_key)
+            print(f"✅ Downloaded from R2: {r2_key} ({len(data)} bytes, in memory)")
+            return data
             
         except Exception as e:
             print(f"❌ R2 download failed: {e}")
             raise
     
-    def extract_from_text(self, cv_text: str) -> Dict[str, Any]:
+    def extract_from_text(self, cv_text: str, cv_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Extract keywords from CV text using AI.
         
         Args:
             cv_text: CV content as text
+            cv_id: Optional CV ID - updates the matchmaker skill index when given
         
         Returns:
             Dict with 6 fields matching DB columns
         """
         print("\n🤖 Step 4/4: AI Extraction...")
         
-        # Step 1: Generate prompt
-        prompt = get_cv_extraction_prompt(cv_text)
+        # Step 1: Generate prompt (from compacted text)
+        prompt = get_cv_extraction_prompt(self._compact(cv_text))
         
         # Step 2: Extract using Gemini
         result = self.gemini.generate_json(
@@ -173,8 +159,47 @@ class CVExtractor:
         )
         
         # Step 3: Validate and fix
+        return self._finalize_result(result, cv_id)
+    
+    async def aextract_from_text(self, cv_text: str, cv_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Async version of extract_from_text.
+        
+        Uses the native async Gemini call so many CVs can be extracted
+        concurrently from async routes without tying up executor threads.
+        
+        Args:
+            cv_text: CV content as text
+            cv_id: Optional CV ID - updates the matchmaker skill index when given
+        
+        Returns:
+            Dict with 6 fields matching DB columns
+        """
+        print("\n🤖 Step 4/4: AI Extraction (async)...")
+        
+        prompt = get_cv_extraction_prompt(self._compact(cv_text))
+        
+        result = await self.gemini.agenerate_json(
+            prompt=prompt,
+            max_retries=3,
+            fallback=self._get_fallback()
+        )
+        
+        return self._finalize_result(result, cv_id)
+    
+    def _compact(self, cv_text: str) -> str:
+        """CV text compacted for the prompt (whitespace, duplicates, boilerplate, old roles over budget)"""
+        compacted = compact_cv_text(cv_text)
+        print(f"🗜️ Compacted CV text: {compacted.summary()}")
+        return compacted.text
+    
+    def _finalize_result(self, result: Dict, cv_id: Optional[int] = None) -> Dict:
+        """Validate AI output, update the skill index and print the extraction summary"""
         result = self._validate_and_fix(result)
         
+        if cv_id is not None and config.MATCH_SKILL_INDEX_ENABLED:
+            self._index_skills(cv_id, result)
+        
         print(f"\n{'='*70}")
         print(f"✅ CV EXTRACTION COMPLETED")
         print(f"{'='*70}")
@@ -182,6 +207,15 @@ class CVExtractor:
         
         return result
     
+    def _index_skills(self, cv_id: int, result: Dict):
+        """Keep the matchmaker skill index current (never fails the extraction)"""
+        if not result.get('cv_must_to_have'):
+            return
+        try:
+            get_skill_index().upsert_cv(cv_id, result['cv_must_to_have'])
+        except Exception as e:
+            print(f"⚠️ Skill index update failed for CV {cv_id}: {e}")
+    
     def _validate_and_fix(self, result: Dict) -> Dict:
         """
         Validate extraction and fix common issues.
@@ -189,6 +223,7 @@ class CVExtractor:
         Checks:
         - All required fields present
         - Skills are arrays (not strings)
+        - Skills use canonical IDs ("ReactJS" -> "react")
         - Accolades is array or empty
         - Snapshot has proper length
         """
@@ -215,6 +250,10 @@ class CVExtractor:
             if isinstance(result[field], str):
                 result[field] = [result[field]] if result[field] else []
         
+        # Map skills to canonical IDs so exact matching catches aliases
+        for field in ['cv_must_to_have', 'cv_good_to_have', 'cv_soft_skills']:
+            result[field] = canonicalize_skills(result[field])
+        
         # Critical check: Must-have skills should NEVER be empty
         must_have = result.get('cv_must_to_have', [])
         if not must_have or len(must_have) == 0:
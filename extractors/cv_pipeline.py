@@ -0,0 +1,453 @@
+"""
+Bulk CV Extraction Pipeline
+R2 download -> PDF/DOCX parsing -> Gemini extraction -> persist, as concurrent bounded stages
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Union
+
+from config import config
+from utils.file_utils import FileTextExtractor, disable_parallel_pages
+
+# Legacy .doc is not a zip container and cannot be parsed; such keys are skipped as unsupported
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+# End-of-stream marker passed between stages
+_DONE = object()
+
+
+class _Failure:
+    """A CV that dropped out of the pipeline at some stage"""
+
+    __slots__ = ('stage', 'error')
+
+    def __init__(self, stage: str, error: str):
+        self.stage = stage
+        self.error = error
+
+
+class StageStats:
+    """Item counts and busy time of one pipeline stage (thread-safe)"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._active = workers
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool = True):
+        """Account for one processed item"""
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += seconds
+            if not ok:
+                self.errors += 1
+
+    def worker_finished(self) -> bool:
+        """Mark one worker as done; True for the last one"""
+        with self._lock:
+            self._active -= 1
+            return self._active == 0
+
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        """Counters plus throughput over the pipeline run time"""
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "errors": self.errors,
+            "items_per_second": round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+            "avg_seconds_per_item": round(self.busy_seconds / self.items, 3) if self.items else 0.0,
+            "utilization": round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed > 0 else 0.0
+        }
+
+
+class _Checkpoint:
+    """
+    Append-only JSONL record of processed CVs.
+
+    One line per CV (key, cv_id, status, result or failing stage/error),
+    flushed as it is written. Keys with status "ok" are skipped on the next
+    run; failed keys are retried.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load_done(self) -> Set[str]:
+        """Keys already extracted successfully"""
+        done = set()
+        if not self.path or not os.path.exists(self.path):
+            return done
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from an interrupted run
+                if record.get("status") == "ok":
+                    done.add(record.get("key"))
+                else:
+                    done.discard(record.get("key"))
+        return done
+
+    def append(self, record: Dict):
+        """Write one record"""
+        if not self.path:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CVExtractionPipeline:
+    """
+    Bulk CV extraction with one bounded stage per resource.
+
+    - fetch: threads downloading files from R2 (network bound)
+    - parse: process pool extracting PDF/DOCX text (CPU bound)
+    - llm: threads running Gemini extraction (rate limited API calls)
+    - persist: the calling thread, writing the checkpoint and calling `persist`
+
+    Stages are connected by bounded queues, so a fast stage blocks instead
+    of buffering the backlog of a slower one. A CV that fails at any stage
+    is recorded as failed and does not stop the run.
+    """
+
+    def __init__(
+        self,
+        extractor,
+        r2_client=None,
+        checkpoint_path: Optional[str] = None,
+        persist: Optional[Callable[[str, Optional[int], Dict], None]] = None,
+        cv_id_for_key: Optional[Callable[[str], Optional[int]]] = None,
+        fetch_workers: Optional[int] = None,
+        parse_workers: Optional[int] = None,
+        llm_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        progress_every: int = 100
+    ):
+        """
+        Initialize the pipeline
+
+        Args:
+            extractor: CVExtractor used for the Gemini step
+            r2_client: R2Client for downloads (default: the extractor's client)
+            checkpoint_path: JSONL file of processed CVs, used to resume (None = no checkpoint)
+            persist: Called as persist(key, cv_id, result) for every extracted CV
+            cv_id_for_key: Maps a file key to its CV ID (skill index update, persist)
+            fetch_workers: Download threads (default CV_PIPELINE_FETCH_WORKERS)
+            parse_workers: Parse processes (default CV_PIPELINE_PARSE_WORKERS, 0 = CPU count)
+            llm_workers: Concurrent Gemini extractions (default CV_PIPELINE_LLM_WORKERS)
+            queue_size: Items buffered between stages (default CV_PIPELINE_QUEUE_SIZE)
+            progress_every: Print progress every N processed CVs
+        """
+        self.extractor = extractor
+        self.r2_client = r2_client if r2_client is not None else getattr(extractor, 'r2_client', None)
+        self.checkpoint = _Checkpoint(checkpoint_path)
+        self.persist = persist
+        self.cv_id_for_key = cv_id_for_key
+
+        self.fetch_workers = max(1, fetch_workers or config.CV_PIPELINE_FETCH_WORKERS)
+        self.parse_workers = max(1, parse_workers or config.CV_PIPELINE_PARSE_WORKERS or os.cpu_count() or 1)
+        self.llm_workers = max(1, llm_workers or config.CV_PIPELINE_LLM_WORKERS)
+        self.queue_size = max(1, queue_size or config.CV_PIPELINE_QUEUE_SIZE)
+        self.progress_every = max(1, progress_every)
+
+        self._fallback = extractor._get_fallback()
+
+    def run_prefix(self, prefix: str) -> Dict[str, Any]:
+        """Extract every CV file under an R2 prefix (see run)"""
+        if self.r2_client is None:
+            raise NotImplementedError("R2 client not available. Please implement clients/r2_client.py")
+        return self.run(f["key"] for f in self.r2_client.iter_files(prefix))
+
+    def run(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Extract CVs from R2 keys or local paths
+
+        Keys are consumed lazily; keys already in the checkpoint and files
+        with unsupported extensions are skipped.
+
+        Returns:
+            Run statistics: totals plus per-stage throughput
+        """
+        done = self.checkpoint.load_done()
+        if done:
+            print(f"♻️ Checkpoint: {len(done)} CVs already extracted, skipping them")
+
+        self._stats = {
+            "fetch": StageStats("fetch", self.fetch_workers),
+            "parse": StageStats("parse", self.parse_workers),
+            "llm": StageStats("llm", self.llm_workers),
+            "persist": StageStats("persist", 1)
+        }
+        self._skipped = {"checkpoint": 0, "unsupported": 0}
+        self._stop = threading.Event()
+
+        key_q = queue.Queue(self.queue_size)
+        parse_q = queue.Queue(self.queue_size)
+        llm_q = queue.Queue(self.queue_size)
+        self._results = queue.Queue(self.queue_size)
+
+        # Start the parse processes before any pipeline thread exists, so they
+        # are not forked while another thread holds a lock. They already run in
+        # parallel, so they extract PDF pages serially.
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers, initializer=disable_parallel_pages)
+        pool.submit(os.getpid).result()
+
+        threads = [threading.Thread(target=self._produce, args=(keys, done, key_q), daemon=True)]
+        threads += [
+            threading.Thread(
+                target=self._stage_worker,
+                args=(self._stats["fetch"], key_q, parse_q, self._fetch, self.parse_workers),
+                daemon=True
+            )
+            for _ in range(self.fetch_workers)
+        ]
+        threads += [
+            threading.Thread(
+                target=self._stage_worker,
+                args=(self._stats["parse"], parse_q, llm_q, lambda key, source: self._parse(pool, key, source), self.llm_workers),
+                daemon=True
+            )
+            for _ in range(self.parse_workers)
+        ]
+        threads += [
+            threading.Thread(
+                target=self._stage_worker,
+                args=(self._stats["llm"], llm_q, self._results, self._extract, 1),
+                daemon=True
+            )
+            for _ in range(self.llm_workers)
+        ]
+
+        print(
+            f"🚀 Bulk CV extraction: {self.fetch_workers} fetch threads, {self.parse_workers} parse processes, "
+            f"{self.llm_workers} Gemini workers, queue size {self.queue_size}"
+        )
+
+        start_time = time.time()
+        for thread in threads:
+            thread.start()
+
+        try:
+            succeeded, failed = self._persist_results(start_time)
+        finally:
+            self._stop.set()
+            self.checkpoint.close()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.time() - start_time
+        stats = {
+            "processed": succeeded + failed,
+            "succeeded": succeeded,
+            "failed": failed,
+            "skipped": dict(self._skipped),
+            "elapsed_seconds": round(elapsed, 2),
+            "cvs_per_second": round((succeeded + failed) / elapsed, 2) if elapsed > 0 else 0.0,
+            "stages": {name: stage.as_dict(elapsed) for name, stage in self._stats.items()}
+        }
+        self._print_stats(stats)
+        return stats
+
+    def _produce(self, keys: Iterable[Union[str, Dict]], done: Set[str], key_q: queue.Queue):
+        """Feed keys to the fetch stage (blocks while the pipeline is full)"""
+        try:
+            for key in keys:
+                if self._stop.is_set():
+                    break
+                if isinstance(key, dict):
+                    key = key["key"]
+                if key in done:
+                    self._skipped["checkpoint"] += 1
+                    continue
+                if os.path.splitext(key)[1].lower() not in SUPPORTED_EXTENSIONS:
+                    self._skipped["unsupported"] += 1
+                    continue
+                key_q.put((key, key))
+        except Exception as e:
+            print(f"❌ Listing CV files failed, finishing queued CVs: {e}")
+        finally:
+            for _ in range(self.fetch_workers):
+                key_q.put(_DONE)
+
+    def _stage_worker(
+        self,
+        stats: StageStats,
+        in_q: queue.Queue,
+        out_q: queue.Queue,
+        handler: Callable[[str, Any], Any],
+        downstream_workers: int
+    ):
+        """Run one stage worker until its input is exhausted"""
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                break
+
+            key, payload = item
+            started = time.time()
+            try:
+                output = handler(key, payload)
+            except Exception as e:
+                stats.record(time.time() - started, ok=False)
+                self._results.put((key, _Failure(stats.name, str(e) or type(e).__name__)))
+                continue
+
+            stats.record(time.time() - started)
+            out_q.put((key, output))
+
+        # The last worker of a stage closes the next one
+        if stats.worker_finished():
+            for _ in range(downstream_workers):
+                out_q.put(_DONE)
+
+    def _fetch(self, key: str, _) -> Union[str, bytes]:
+        """Download stage: file content in memory (local files are passed by path)"""
+        if os.path.exists(key):
+            return key
+        if self.r2_client is None:
+            raise NotImplementedError("R2 client not available. Please implement clients/r2_client.py")
+        return self.r2_client.download_bytes(key)
+
+    @staticmethod
+    def _parse(pool: ProcessPoolExecutor, key: str, source: Union[str, bytes]) -> str:
+        """Parse stage: CV text from the file content"""
+        # Worker processes only import utils.file_utils
+        text = pool.submit(FileTextExtractor.extract_text, source, key).result()
+
+        if not text or not FileTextExtractor.validate_text(text, min_words=config.PDF_MIN_WORDS):
+            raise ValueError("No usable text extracted")
+        return text
+
+    def _extract(self, key: str, cv_text: str) -> tuple:
+        """LLM stage: (cv_id, extraction result)"""
+        cv_id = self.cv_id_for_key(key) if self.cv_id_for_key else None
+        result = self.extractor.extract_from_text(cv_text, cv_id=cv_id)
+        if result == self._fallback:
+            raise ValueError("Gemini extraction failed")
+        return cv_id, result
+
+    def _persist_results(self, start_time: float) -> tuple:
+        """Persist stage (calling thread): checkpoint, persist callback, progress"""
+        succeeded = 0
+        failed = 0
+        persist_stats = self._stats["persist"]
+
+        while True:
+            item = self._results.get()
+            if item is _DONE:
+                break
+
+            key, outcome = item
+            if isinstance(outcome, _Failure):
+                record = {"key": key, "status": "failed", "stage": outcome.stage, "error": outcome.error}
+            else:
+                cv_id, result = outcome
+                started = time.time()
+                try:
+                    if self.persist:
+                        self.persist(key, cv_id, result)
+                    record = {"key": key, "cv_id": cv_id, "status": "ok", "result": result}
+                    persist_stats.record(time.time() - started)
+                except Exception as e:
+                    record = {"key": key, "cv_id": cv_id, "status": "failed", "stage": "persist", "error": str(e)}
+                    persist_stats.record(time.time() - started, ok=False)
+
+            self.checkpoint.append(record)
+            if record["status"] == "ok":
+                succeeded += 1
+            else:
+                failed += 1
+                print(f"⚠️ {key}: failed at {record['stage']} - {record['error']}")
+
+            processed = succeeded + failed
+            if processed % self.progress_every == 0:
+                elapsed = time.time() - start_time
+                print(f"📊 Bulk extraction: {processed} CVs ({failed} failed), {processed / elapsed:.2f} CVs/s")
+
+        return succeeded, failed
+
+    @staticmethod
+    def _print_stats(stats: Dict[str, Any]):
+        """Print run totals and per-stage throughput"""
+        print(f"\n{'='*70}")
+        print(f"✅ BULK CV EXTRACTION COMPLETED")
+        print(f"{'='*70}")
+        print(
+            f"   Processed: {stats['processed']} ({stats['succeeded']} ok, {stats['failed']} failed) "
+            f"in {stats['elapsed_seconds']}s → {stats['cvs_per_second']} CVs/s"
+        )
+        print(f"   Skipped: {stats['skipped']['checkpoint']} already done, {stats['skipped']['unsupported']} unsupported")
+        for name, stage in stats['stages'].items():
+            print(
+                f"   {name:<8} {stage['workers']:>3} workers  {stage['items']:>7} items  {stage['errors']:>5} errors  "
+                f"{stage['items_per_second']:>8} items/s  {stage['avg_seconds_per_item']:>7}s/item  "
+                f"{stage['utilization']:.0%} busy"
+            )
+
+
+def extract_many(
+    keys: Optional[Iterable[str]] = None,
+    prefix: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    persist: Optional[Callable[[str, Optional[int], Dict], None]] = None,
+    cv_id_for_key: Optional[Callable[[str], Optional[int]]] = None,
+    extractor=None,
+    **pipeline_options
+) -> Dict[str, Any]:
+    """
+    Extract many CVs through the bulk pipeline.
+
+    Args:
+        keys: R2 keys or local paths (either keys or prefix)
+        prefix: R2 prefix to extract every CV file under
+        checkpoint_path: JSONL checkpoint; re-running with the same file resumes
+        persist: Called as persist(key, cv_id, result) for every extracted CV
+        cv_id_for_key: Maps a file key to its CV ID
+        extractor: CVExtractor to use (default: a new one)
+        **pipeline_options: fetch_workers, parse_workers, llm_workers, queue_size, progress_every
+
+    Returns:
+        Run statistics (see CVExtractionPipeline.run)
+    """
+    if (keys is None) == (prefix is None):
+        raise ValueError("Pass either keys or prefix")
+
+    if extractor is None:
+        from extractors.cv_extractor import CVExtractor
+        extractor = CVExtractor()
+
+    pipeline = CVExtractionPipeline(
+        extractor,
+        checkpoint_path=checkpoint_path,
+        persist=persist,
+        cv_id_for_key=cv_id_for_key,
+        **pipeline_options
+    )
+    if prefix is not None:
+        return pipeline.run_prefix(prefix)
+    return pipeline.run(keys)
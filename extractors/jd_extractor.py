@@ -9,6 +9,8 @@ import logging
 from typing import Dict, Any, Tuple
 from datetime import datetime
 from clients.gemini_client import GeminiClient
+from utils.skill_taxonomy import canonicalize_skills
+from utils.text_compaction import compact_jd_text
 
 logger = logging.getLogger(__name__)
 
@@ -130,19 +132,28 @@ class JDExtractorService:
         try:
             from prompts.jd_extraction_prompt import get_jd_keywords_prompt
             
-            # Generate prompt
-            prompt = get_jd_keywords_prompt(jd_text)
+            # Generate prompt from compacted text (whitespace, duplicates, contact lines, budget)
+            compacted = compact_jd_text(jd_text)
+            logger.info(f"Compacted JD text: {compacted.summary()}")
+            prompt = get_jd_keywords_prompt(compacted.text)
             
-            # Call AI model (replace with your actual AI API call)
-            ai_response = await self._call_ai_model(prompt)
-            
-            # Parse JSON response
-            try:
-                keywords_data = json.loads(ai_response)
-            except json.JSONDecodeError:
-                # Try to extract JSON from response if wrapped in markdown
-                ai_response_clean = ai_response.replace("```json", "").replace("```", "").strip()
-                keywords_data = json.loads(ai_response_clean)
+            if self.ai_model == "gemini":
+                if not self.client:
+                    raise ValueError("Gemini client not initialized")
+                
+                # Retried JSON call, served from the response cache on repeat JDs
+                keywords_data = await self.client.agenerate_json(prompt)
+            else:
+                # Call AI model (replace with your actual AI API call)
+                ai_response = await self._call_ai_model(prompt)
+                
+                # Parse JSON response
+                try:
+                    keywords_data = json.loads(ai_response)
+                except json.JSONDecodeError:
+                    # Try to extract JSON from response if wrapped in markdown
+                    ai_response_clean = ai_response.replace("```json", "").replace("```", "").strip()
+                    keywords_data = json.loads(ai_response_clean)
             
             # Validate response has required fields
             required_fields = ["must_have_skills", "good_to_have_skills", "soft_skills", 
@@ -153,6 +164,10 @@ class JDExtractorService:
                     "error": "Keywords validation failed - missing required fields"
                 }
             
+            # Map skills to canonical IDs so CV matching is exact on aliases
+            for field in ["must_have_skills", "good_to_have_skills", "soft_skills", "exception_skills"]:
+                keywords_data[field] = self._canonicalize_field(keywords_data[field])
+            
             return {
                 "success": True,
                 "data": keywords_data
@@ -165,6 +180,15 @@ class JDExtractorService:
                 "error": str(e)
             }
     
+    @staticmethod
+    def _canonicalize_field(value):
+        """Canonicalize a skills field, keeping its shape (list or comma string, "none" untouched)"""
+        if isinstance(value, list):
+            return canonicalize_skills(str(v) for v in value)
+        if isinstance(value, str) and value.strip() and value.strip().lower() != "none":
+            return ", ".join(canonicalize_skills(value.split(",")))
+        return value
+    
     async def _generate_snapshot(self, keywords_data: dict, original_jd: str) -> Dict[str, Any]:
         """
         Step 2: Generate LinkedIn-style snapshot
@@ -220,12 +244,8 @@ Ready to make an impact? Apply now!
             if not self.client:
                 raise ValueError("Gemini client not initialized")
             
-            # Call Gemini synchronously (wrapped in async)
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.model.generate_content(prompt)
-            )
+            # Native async call (no executor thread, bounded by the client semaphore)
+            response = await self.client.agenerate_content(prompt)
             return response.text
             
         elif self.ai_model == "claude":
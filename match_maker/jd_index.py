@@ -0,0 +1,108 @@
+"""
+Open JD Index
+In-memory compiled profiles of every open JD, for CV-to-JD matching
+"""
+
+import time
+import threading
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from matchmaker_profiles import CompiledJDProfile, JDRecord, load_jd_records
+from match_store import fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class OpenJDIndex:
+    """
+    Compiled profiles of the open JDs, refreshed from the database.
+
+    A refresh reloads the (projected) open JD rows, but only recompiles JDs
+    whose fields changed since the last refresh; closed or deleted JDs drop
+    out. Refreshes happen at most every `refresh_seconds` unless forced.
+    """
+
+    def __init__(
+        self,
+        compile_jd: Callable[[JDRecord], CompiledJDProfile],
+        refresh_seconds: int = 60,
+        status_field: str = "",
+        open_statuses: Tuple[str, ...] = ()
+    ):
+        """
+        Initialize the index
+
+        Args:
+            compile_jd: Builds the scoring profile for a JD record
+            refresh_seconds: Minimum time between database refreshes
+            status_field: JD column holding the JD status ("" = every JD is open)
+            open_statuses: Status values that count as open
+        """
+        self.compile_jd = compile_jd
+        self.refresh_seconds = refresh_seconds
+        self.status_field = status_field
+        self.open_statuses = tuple(open_statuses)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[str, JDRecord, CompiledJDProfile]] = {}
+        self._refreshed_at = 0.0
+
+    def refresh(self, db, jd_model, force: bool = False) -> int:
+        """
+        Reload open JDs from the database if the index is stale
+
+        Args:
+            db: SQLAlchemy session
+            jd_model: JD model class
+            force: Refresh even if the last refresh is recent
+
+        Returns:
+            Number of open JDs in the index
+        """
+        with self._lock:
+            if not force and time.time() - self._refreshed_at < self.refresh_seconds:
+                return len(self._entries)
+
+            filters = []
+            status_column = getattr(jd_model, self.status_field, None) if self.status_field else None
+            if status_column is not None and self.open_statuses:
+                filters.append(status_column.in_(self.open_statuses))
+            elif self.status_field:
+                logger.warning(f"JD model has no '{self.status_field}' column - treating every JD as open")
+
+            entries = {}
+            compiled = 0
+            for record in load_jd_records(db, jd_model, filters):
+                jd_fp = fingerprint(record.as_dict())
+                previous = self._entries.get(record.id)
+                if previous is not None and previous[0] == jd_fp:
+                    entries[record.id] = previous
+                else:
+                    entries[record.id] = (jd_fp, record, self.compile_jd(record))
+                    compiled += 1
+
+            self._entries = entries
+            self._refreshed_at = time.time()
+
+        logger.info(f"Open JD index: {len(entries)} open JDs ({compiled} compiled)")
+        return len(entries)
+
+    def invalidate(self):
+        """Force a refresh on the next use (e.g. after a JD was created or edited)"""
+        with self._lock:
+            self._refreshed_at = 0.0
+
+    def entries(self) -> List[Tuple[JDRecord, CompiledJDProfile]]:
+        """Snapshot of (JD record, compiled profile) pairs"""
+        with self._lock:
+            return [(record, profile) for _, record, profile in self._entries.values()]
+
+    def get(self, jd_id: int) -> Optional[Tuple[JDRecord, CompiledJDProfile]]:
+        """(JD record, compiled profile) for one open JD, or None"""
+        with self._lock:
+            entry = self._entries.get(jd_id)
+        return (entry[1], entry[2]) if entry else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,175 @@
+"""
+Match Result Store
+Persistent (SQLite) per-(JD, CV) scores for incremental re-matching
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Score fields cached per CV (CV metadata is re-attached from the live row)
+SCORE_FIELDS = ('match_percentage', 'rating', 'breakdown', 'matched_skills', 'missing_skills')
+
+
+def fingerprint(data: Any) -> str:
+    """Stable content hash of JSON-serializable data"""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class MatchResultStore:
+    """
+    Scores from previous matching runs, keyed by (jd_id, cv_id).
+
+    Every entry records the fingerprint of the JD profile and of the CV's
+    keyword fields it was scored from. A cached score is only reused when
+    both fingerprints still match, so editing the JD invalidates all of its
+    entries and editing a CV invalidates just that CV.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the store
+
+        Args:
+            path: SQLite file path
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS match_results (
+                jd_id INTEGER NOT NULL,
+                cv_id INTEGER NOT NULL,
+                jd_fingerprint TEXT NOT NULL,
+                cv_fingerprint TEXT NOT NULL,
+                result TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (jd_id, cv_id)
+            )"""
+        )
+        self._conn.commit()
+
+    def load(
+        self,
+        jd_id: int,
+        jd_fingerprint: str,
+        cv_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Tuple[str, Dict]]:
+        """
+        Load the reusable scores for a JD
+
+        Entries scored against a different JD fingerprint are skipped.
+
+        Args:
+            jd_id: Job Description ID
+            jd_fingerprint: Fingerprint of the current JD profile
+            cv_ids: Only load these CVs (default: every CV stored for the JD)
+
+        Returns:
+            {cv_id: (cv_fingerprint, score_fields)}
+        """
+        query = """SELECT cv_id, cv_fingerprint, result FROM match_results
+            WHERE jd_id = ? AND jd_fingerprint = ?"""
+        if cv_ids is None:
+            batches = [()]
+        else:
+            cv_ids = list(cv_ids)
+            # Stay under SQLite's bound-parameter limit
+            batches = [cv_ids[i:i + 500] for i in range(0, len(cv_ids), 500)]
+
+        rows = []
+        with self._lock:
+            for batch in batches:
+                if batch:
+                    sql = f"{query} AND cv_id IN ({','.join('?' * len(batch))})"
+                else:
+                    sql = query
+                rows.extend(self._conn.execute(sql, (jd_id, jd_fingerprint, *batch)).fetchall())
+
+        return {cv_id: (cv_fp, json.loads(result)) for cv_id, cv_fp, result in rows}
+
+    def get(self, jd_id: int, jd_fingerprint: str, cv_id: int) -> Optional[Tuple[str, Dict]]:
+        """
+        Load the reusable score of one CV for a JD (primary-key lookup)
+
+        Returns:
+            (cv_fingerprint, score_fields), or None if missing or scored
+            against a different JD fingerprint
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT cv_fingerprint, result FROM match_results
+                WHERE jd_id = ? AND cv_id = ? AND jd_fingerprint = ?""",
+                (jd_id, cv_id, jd_fingerprint)
+            ).fetchone()
+
+        return (row[0], json.loads(row[1])) if row else None
+
+    def save(self, jd_id: int, jd_fingerprint: str, entries: Iterable[Tuple[int, str, Dict]]) -> int:
+        """
+        Store (or replace) scores for a JD
+
+        Args:
+            jd_id: Job Description ID
+            jd_fingerprint: Fingerprint of the JD profile the scores came from
+            entries: (cv_id, cv_fingerprint, score result) tuples
+
+        Returns:
+            Number of entries written
+        """
+        now = time.time()
+        rows = [
+            (
+                jd_id,
+                cv_id,
+                jd_fingerprint,
+                cv_fp,
+                json.dumps({k: result[k] for k in SCORE_FIELDS}, ensure_ascii=False),
+                now
+            )
+            for cv_id, cv_fp, result in entries
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._conn.executemany(
+                """INSERT OR REPLACE INTO match_results
+                (jd_id, cv_id, jd_fingerprint, cv_fingerprint, result, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            self._conn.commit()
+
+        return len(rows)
+
+    def delete_jd(self, jd_id: int) -> int:
+        """Forget every stored score for a JD (forces a full re-match)"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM match_results WHERE jd_id = ?", (jd_id,)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def get_stats(self) -> Dict:
+        """Entry counts for monitoring"""
+        with self._lock:
+            entries, jds = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT jd_id) FROM match_results"
+            ).fetchone()
+        return {"entries": entries, "jds": jds}
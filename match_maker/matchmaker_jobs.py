@@ -0,0 +1,313 @@
+"""
+Matchmaker Jobs
+Background JD-to-CV matching runs with job IDs, progress and persisted state
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+
+# Add ai_modules path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config import config
+from backend.models.database import get_db
+from matchmaker_service import get_matchmaker_service
+
+logger = logging.getLogger(__name__)
+
+# Job states; queued/running jobs are "active" and picked up again after a restart
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+_JOB_COLUMNS = (
+    'job_id', 'jd_id', 'min_match_percentage', 'status',
+    'scored_cvs', 'total_cvs', 'batches_done', 'total_batches', 'total_matched_cvs',
+    'error', 'created_at', 'started_at', 'finished_at'
+)
+
+
+class MatchmakerJobManager:
+    """
+    Runs matchmaking jobs on a local worker pool.
+
+    Job state, progress and the final MatchmakerResponse are kept in SQLite,
+    so a job outlives the HTTP request that submitted it. Several processes
+    (e.g. uvicorn workers) can share one store: a running job holds a lease
+    that its process renews every `lease_seconds / 4`. Queued jobs and jobs
+    whose lease expired (their process died) are picked up by any live
+    manager, on start and every `lease_seconds`; claiming is atomic, so each
+    job runs once. The match store keeps the scores of batches an
+    interrupted job had already finished.
+    Submitting a JD (with the same threshold) while a job for it is still
+    active returns that job instead of starting another one.
+    """
+
+    def __init__(self, path: str, max_workers: int = 2, lease_seconds: int = 120):
+        """
+        Initialize the manager, pick up orphaned jobs and start the lease thread
+
+        Args:
+            path: SQLite file path
+            max_workers: Jobs run at once
+            lease_seconds: Time without a heartbeat after which a running job is
+                considered orphaned
+        """
+        self.path = path
+        self.max_workers = max(1, max_workers)
+        self.lease_seconds = max(4, lease_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                jd_id INTEGER NOT NULL,
+                min_match_percentage INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                scored_cvs INTEGER NOT NULL DEFAULT 0,
+                total_cvs INTEGER NOT NULL DEFAULT 0,
+                batches_done INTEGER NOT NULL DEFAULT 0,
+                total_batches INTEGER NOT NULL DEFAULT 0,
+                total_matched_cvs INTEGER,
+                error TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                heartbeat_at REAL
+            )"""
+        )
+        # Stores created before leases existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_jd_status ON jobs(jd_id, status)")
+        self._conn.commit()
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="matchmaker-job")
+        self._submitted = set()
+        self._stopped = threading.Event()
+        self._requeue()
+        self._lease_thread = threading.Thread(target=self._lease_loop, name="matchmaker-job-lease", daemon=True)
+        self._lease_thread.start()
+
+    def _lease_loop(self):
+        """Renew the leases of this process's running jobs and pick up orphaned ones"""
+        interval = self.lease_seconds / 4
+        last_requeue = time.time()
+        while not self._stopped.wait(interval):
+            try:
+                self._heartbeat()
+                if time.time() - last_requeue >= self.lease_seconds:
+                    self._requeue()
+                    last_requeue = time.time()
+            except Exception as e:
+                logger.error(f"Matchmaker jobs: lease upkeep failed: {str(e)}")
+
+    def _heartbeat(self):
+        """Renew the leases of the jobs this process is running"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner = ?",
+                (time.time(), JOB_RUNNING, self.owner)
+            )
+            self._conn.commit()
+
+    def _requeue(self):
+        """Queue running jobs whose lease expired, and take on queued jobs not yet submitted here"""
+        with self._lock:
+            expired = self._conn.execute(
+                """UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL
+                WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)""",
+                (JOB_QUEUED, JOB_RUNNING, time.time() - self.lease_seconds)
+            ).rowcount
+            self._conn.commit()
+            job_ids = [
+                row[0] for row in self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at", (JOB_QUEUED,)
+                )
+                if row[0] not in self._submitted
+            ]
+
+        if expired:
+            logger.info(f"Matchmaker jobs: requeued {expired} jobs with an expired lease")
+        for job_id in job_ids:
+            self._submit(job_id)
+
+    def _submit(self, job_id: str):
+        """Hand a queued job to the local pool (once per process)"""
+        with self._lock:
+            if job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+        self._executor.submit(self._run, job_id)
+
+    def submit(self, jd_id: int, min_match_percentage: int = 60) -> Tuple[Dict, bool]:
+        """
+        Queue a matchmaking job (or join the active one for the same request)
+
+        Args:
+            jd_id: Job Description ID
+            min_match_percentage: Minimum match % to return
+
+        Returns:
+            (job, created) - created is False for a deduplicated submission
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"""SELECT {', '.join(_JOB_COLUMNS)} FROM jobs
+                WHERE jd_id = ? AND min_match_percentage = ? AND status IN (?, ?)
+                ORDER BY created_at LIMIT 1""",
+                (jd_id, min_match_percentage, *ACTIVE_STATES)
+            ).fetchone()
+            if row is not None:
+                logger.info(f"Matchmaker jobs: JD {jd_id} already has active job {row[0]}")
+                return dict(zip(_JOB_COLUMNS, row)), False
+
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                """INSERT INTO jobs (job_id, jd_id, min_match_percentage, status, created_at)
+                VALUES (?, ?, ?, ?, ?)""",
+                (job_id, jd_id, min_match_percentage, JOB_QUEUED, time.time())
+            )
+            self._conn.commit()
+
+        logger.info(f"Matchmaker jobs: queued job {job_id} for JD {jd_id}")
+        self._submit(job_id)
+        return self.get(job_id), True
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job state and progress (without the result), or None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(_JOB_COLUMNS, row)) if row else None
+
+    def get_result(self, job_id: str) -> Optional[Dict]:
+        """MatchmakerResponse fields of a completed job, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE job_id = ? AND status = ?", (job_id, JOB_COMPLETED)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def _update(self, job_id: str, **fields):
+        """Write columns of a job this process owns (a stale owner whose lease was taken over writes nothing)"""
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND owner = ?", (*fields.values(), job_id, self.owner)
+            )
+            self._conn.commit()
+
+    def _run(self, job_id: str):
+        """Run one job to completion on a worker thread (unless another process claimed it)"""
+        now = time.time()
+        with self._lock:
+            self._submitted.discard(job_id)
+            claimed = self._conn.execute(
+                """UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ?
+                WHERE job_id = ? AND status = ?""",
+                (JOB_RUNNING, now, self.owner, now, job_id, JOB_QUEUED)
+            ).rowcount
+            self._conn.commit()
+        if not claimed:
+            return
+
+        job = self.get(job_id)
+        logger.info(f"Matchmaker jobs: job {job_id} started (JD {job['jd_id']})")
+
+        db_session = get_db()
+        db = next(db_session)
+        try:
+            summary = None
+            matches: List = []
+            for event in get_matchmaker_service().stream_jd_to_cvs(
+                jd_id=job['jd_id'],
+                min_match_percentage=job['min_match_percentage'],
+                db=db
+            ):
+                if event['event'] == 'match':
+                    matches.append(event['data'])
+                elif event['event'] == 'progress':
+                    progress = event['data']
+                    self._update(
+                        job_id,
+                        scored_cvs=progress.scored_cvs,
+                        total_cvs=progress.total_cvs,
+                        batches_done=progress.batches_done,
+                        total_batches=progress.total_batches,
+                        heartbeat_at=time.time()
+                    )
+                elif event['event'] == 'summary':
+                    summary = event['data']
+
+            matches.sort(key=lambda m: m.match_percentage, reverse=True)
+            result = jsonable_encoder(summary)
+            result['matches'] = jsonable_encoder(matches)
+
+            self._update(
+                job_id,
+                status=JOB_COMPLETED,
+                total_cvs=summary.total_filtered_cvs,
+                total_matched_cvs=summary.total_matched_cvs,
+                result=json.dumps(result, ensure_ascii=False),
+                finished_at=time.time()
+            )
+            logger.info(f"Matchmaker jobs: job {job_id} completed ({summary.total_matched_cvs} matches)")
+
+        except Exception as e:
+            logger.error(f"Matchmaker jobs: job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(job_id, status=JOB_FAILED, error=str(e), finished_at=time.time())
+
+        finally:
+            db_session.close()
+
+    def get_stats(self) -> Dict:
+        """Job counts per state for monitoring"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {"workers": self.max_workers, **dict(rows)}
+
+    def shutdown(self, wait: bool = False):
+        """Stop taking jobs; unfinished ones are picked up again once their lease expires"""
+        self._stopped.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Singleton instance
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> MatchmakerJobManager:
+    """Get or create the singleton job manager (MATCH_JOB_STORE_PATH, MATCH_JOB_WORKERS, MATCH_JOB_LEASE_SECONDS)"""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = MatchmakerJobManager(
+                    config.MATCH_JOB_STORE_PATH, config.MATCH_JOB_WORKERS, config.MATCH_JOB_LEASE_SECONDS
+                )
+    return _job_manager
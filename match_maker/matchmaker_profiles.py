@@ -0,0 +1,226 @@
+"""
+Matchmaker Profiles
+Compact in-memory records for matching (no ORM objects, no unused columns)
+"""
+
+import os
+import re
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import and_, select
+
+# Add ai_modules path to import the shared skill taxonomy
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from utils.skill_taxonomy import canonicalize_skills
+
+
+# CV columns matching needs: Stage 2 scoring/prompts and Stage 3 metadata
+CANDIDATE_FIELDS = (
+    'cv_id',
+    'cv_name',
+    'cv_email',
+    'cv_mobile',
+    'cv_experience',
+    'cv_current_company',
+    'cv_role',
+    'cv_must_to_have',
+    'cv_good_to_have',
+    'cv_soft_skills',
+    'cv_domain_expertise',
+    'cv_accolades'
+)
+
+
+class CandidateRecord:
+    """
+    One CV as seen by the matchmaker.
+
+    Exposes the same attribute names as the CV model, so Stage 2 code works
+    with either; fields the table does not have are None.
+    """
+
+    __slots__ = CANDIDATE_FIELDS
+
+    def __init__(self, **fields):
+        for name in CANDIDATE_FIELDS:
+            setattr(self, name, fields.get(name))
+
+    def __repr__(self) -> str:
+        return f"CandidateRecord(cv_id={self.cv_id!r}, cv_name={self.cv_name!r})"
+
+
+# JD columns reverse (CV-to-JD) matching needs: scoring, prompts, hard filters, display
+JD_FIELDS = (
+    'id',
+    'job_title',
+    'company_name',
+    'must_have_skills',
+    'good_to_have_skills',
+    'soft_skills',
+    'domain_expertise',
+    'exception_skills',
+    'exception_list',
+    'op_experience_min',
+    'op_experience_max',
+    'op_budget_min',
+    'op_budget_max'
+)
+
+
+class JDRecord:
+    """One JD as seen by the matchmaker (same attribute names as the JD model)"""
+
+    __slots__ = JD_FIELDS
+
+    def __init__(self, **fields):
+        for name in JD_FIELDS:
+            setattr(self, name, fields.get(name))
+
+    def as_dict(self) -> Dict:
+        """All fields as a dict"""
+        return {name: getattr(self, name) for name in JD_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"JDRecord(id={self.id!r}, job_title={self.job_title!r})"
+
+
+def project_columns(model, fields: Tuple[str, ...]) -> Tuple[List, List[str]]:
+    """
+    Columns of `model` to project for a record type
+
+    Returns:
+        (columns, field names) for the fields the model defines
+    """
+    columns = []
+    names = []
+    for name in fields:
+        column = getattr(model, name, None)
+        if column is not None:
+            columns.append(column)
+            names.append(name)
+    return columns, names
+
+
+def iter_candidate_records(db, model, filters: List, chunk_size: int = 1000) -> Iterator[CandidateRecord]:
+    """
+    Stream matching CV rows as CandidateRecords
+
+    Selects only the candidate columns and fetches `chunk_size` rows at a
+    time (server-side cursor where the driver supports it), so memory does
+    not grow with the size of the CV table.
+
+    Args:
+        db: SQLAlchemy session
+        model: CV model class
+        filters: WHERE conditions
+        chunk_size: Rows fetched per round trip
+    """
+    columns, names = project_columns(model, CANDIDATE_FIELDS)
+    stmt = select(*columns).where(and_(*filters)).execution_options(yield_per=chunk_size)
+
+    for rows in db.execute(stmt).partitions(chunk_size):
+        for row in rows:
+            yield CandidateRecord(**dict(zip(names, row)))
+
+
+def load_jd_records(db, model, filters: List) -> List[JDRecord]:
+    """Load matching JD rows as JDRecords (projected columns only)"""
+    columns, names = project_columns(model, JD_FIELDS)
+    stmt = select(*columns)
+    if filters:
+        stmt = stmt.where(and_(*filters))
+    return [JDRecord(**dict(zip(names, row))) for row in db.execute(stmt)]
+
+
+def _parse_skills(skills_text: Optional[str]) -> Tuple[str, ...]:
+    """Comma-separated skills -> de-duplicated canonical skill IDs (JD order)"""
+    if not skills_text:
+        return ()
+    return tuple(canonicalize_skills(str(skills_text).split(',')))
+
+
+class CompiledJDProfile:
+    """
+    A JD prepared once for scoring many CVs.
+
+    Holds everything the scorer derives from the JD - canonical skills per
+    category (ordered tuples for matched/missing output, frozensets for
+    membership), domain tokens, exception skills, a compiled company
+    blacklist matcher and the experience bounds - so the per-CV hot loop
+    does no JD parsing. MatchmakerScoring accepts it wherever a JD dict is
+    accepted.
+    """
+
+    __slots__ = (
+        'must_have_skills',
+        'good_to_have_skills',
+        'soft_skills',
+        'must_have_set',
+        'good_to_have_set',
+        'soft_skills_set',
+        'domain_expertise',
+        'domain_tokens',
+        'exception_skills',
+        'exception_skill_set',
+        'blacklist',
+        'blacklist_pattern',
+        'op_experience_min',
+        'op_experience_max'
+    )
+
+    def __init__(self, jd: Dict):
+        """
+        Compile a JD
+
+        Args:
+            jd: JD fields (must_have_skills, good_to_have_skills, soft_skills,
+                domain_expertise, exception_skills, exception_list,
+                op_experience_min, op_experience_max)
+        """
+        self.must_have_skills = _parse_skills(jd.get('must_have_skills'))
+        self.good_to_have_skills = _parse_skills(jd.get('good_to_have_skills'))
+        self.soft_skills = _parse_skills(jd.get('soft_skills'))
+        self.must_have_set = frozenset(self.must_have_skills)
+        self.good_to_have_set = frozenset(self.good_to_have_skills)
+        self.soft_skills_set = frozenset(self.soft_skills)
+
+        self.domain_expertise = jd.get('domain_expertise')
+        self.domain_tokens = frozenset(self.domain_expertise.lower().split()) if self.domain_expertise else frozenset()
+
+        self.exception_skills = _parse_skills(jd.get('exception_skills'))
+        self.exception_skill_set = frozenset(self.exception_skills)
+
+        exception_list = jd.get('exception_list')
+        self.blacklist = tuple(
+            c.strip().lower() for c in exception_list.split(',') if c.strip()
+        ) if exception_list else ()
+        self.blacklist_pattern = re.compile(
+            '|'.join(re.escape(company) for company in self.blacklist)
+        ) if self.blacklist else None
+
+        self.op_experience_min = jd.get('op_experience_min')
+        self.op_experience_max = jd.get('op_experience_max')
+
+    def skills(self, jd_field: str) -> Tuple[str, ...]:
+        """Canonical skills of one category by JD field name (e.g. 'must_have_skills')"""
+        return getattr(self, jd_field)
+
+    @property
+    def all_skills(self) -> frozenset:
+        """Every canonical JD skill across categories"""
+        return self.must_have_set | self.good_to_have_set | self.soft_skills_set
+
+    def blacklisted_company(self, company: Optional[str]) -> Optional[str]:
+        """First blacklist entry contained in the company name, or None"""
+        if not company or self.blacklist_pattern is None:
+            return None
+        company_lower = company.lower()
+        if not self.blacklist_pattern.search(company_lower):
+            return None
+        return next(b for b in self.blacklist if b in company_lower)
+
+    def __repr__(self) -> str:
+        return (
+            f"CompiledJDProfile(must_have={len(self.must_have_skills)}, "
+            f"good_to_have={len(self.good_to_have_skills)}, soft={len(self.soft_skills)})"
+        )
@@ -1,14 +1,24 @@
 """
 Matchmaker Routes
-FastAPI endpoint for JD-to-CV matching
+FastAPI endpoints for JD-to-CV and CV-to-JD matching
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import Optional
+from itertools import chain
+import json
 import logging
 
 from matchmaker_service import get_matchmaker_service
-from matchmaker_schemas import MatchmakerRequest, MatchmakerResponse
+from matchmaker_jobs import get_job_manager, JOB_COMPLETED, JOB_FAILED
+from matchmaker_schemas import (
+    MatchmakerRequest, MatchmakerStreamRequest, MatchmakerJobRequest, MatchmakerResponse,
+    CVToJDRequest, CVToJDResponse, MatchmakerJob
+)
 
 # Import database dependency
 import sys
@@ -28,6 +38,18 @@ router = APIRouter(
 )
 
 
+@router.on_event("startup")
+def start_job_manager():
+    """Start the job manager with the app, so orphaned jobs resume without waiting for a request"""
+    get_job_manager()
+
+
+@router.on_event("shutdown")
+def stop_job_manager():
+    """Stop taking jobs; running ones are picked up by another worker once their lease expires"""
+    get_job_manager().shutdown()
+
+
 @router.post(
     "/jd-to-cv",
     response_model=MatchmakerResponse,
@@ -55,6 +77,10 @@ router = APIRouter(
     - 60-74%: 3 stars ⭐⭐⭐
     - 40-59%: 2 stars ⭐⭐
     - 0-39%: 1 star ⭐
+    
+    **Pagination:** `top_k` caps how many ranked matches are available,
+    `offset`/`limit` select the page returned (`has_more` tells if there is a
+    next one). All qualified CVs are still updated in Stage 3.
     """
 )
 async def match_jd_to_cv(
@@ -65,11 +91,11 @@ async def match_jd_to_cv(
     Match CVs to a Job Description
     
     Args:
-        request: MatchmakerRequest with jd_id and min_match_percentage
+        request: MatchmakerRequest with jd_id, min_match_percentage and optional top_k/offset/limit
         db: Database session (injected)
     
     Returns:
-        MatchmakerResponse with list of matched CVs sorted by match %
+        MatchmakerResponse with the requested page of matched CVs sorted by match %
     
     Raises:
         404: JD not found
@@ -85,7 +111,10 @@ async def match_jd_to_cv(
         result = service.match_jd_to_cvs(
             jd_id=request.jd_id,
             min_match_percentage=request.min_match_percentage,
-            db=db
+            db=db,
+            top_k=request.top_k,
+            offset=request.offset,
+            limit=request.limit
         )
         
         logger.info(f"Matchmaking complete: {result.total_matched_cvs}/{result.total_filtered_cvs} CVs matched")
@@ -109,6 +138,271 @@ async def match_jd_to_cv(
         )
 
 
+def _format_event(event: dict, fmt: str) -> str:
+    """Serialize a matchmaker stream event as one NDJSON line or one SSE message"""
+    if fmt == "sse":
+        return f"event: {event['event']}\ndata: {json.dumps(jsonable_encoder(event['data']))}\n\n"
+    return json.dumps(jsonable_encoder(event)) + "\n"
+
+
+@router.post(
+    "/jd-to-cv/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Match CVs to a Job Description (streamed)",
+    description="""
+    Same matching as `/jd-to-cv`, streamed while it runs.
+    
+    **Events** (in order):
+    - `start`: JD details and the number of CVs after Stage 1 (`null` unless the
+      skill index ranked them up front - Stage 1 is otherwise streamed)
+    - `progress`: CVs scored / AI batches finished so far (after every batch), out
+      of the Stage 1 CVs read so far
+    - `match`: one CVMatch per CV above the threshold, as soon as its batch finishes
+    - `summary`: the MatchmakerResponse totals, sent after Stage 3
+    - `error`: sent instead of `summary` if the run fails midway
+    
+    Matches arrive in completion order, not sorted by match %. Every match above
+    the threshold is streamed: `top_k`/`offset`/`limit` are rejected (422).
+    
+    **Formats:** `ndjson` (default, one `{"event": ..., "data": ...}` object per
+    line) or `sse` (Server-Sent Events, `event:` / `data:` messages).
+    """
+)
+async def stream_jd_to_cv(
+    request: MatchmakerStreamRequest,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="Stream format: ndjson or sse")
+):
+    """
+    Stream CV matches for a Job Description
+    
+    Args:
+        request: MatchmakerStreamRequest with jd_id and min_match_percentage
+        format: "ndjson" or "sse"
+    
+    Returns:
+        StreamingResponse of matchmaker events
+    
+    Raises:
+        404: JD not found
+        500: Processing error before the stream started
+    """
+    logger.info(f"Streamed matchmaking request: JD {request.jd_id}, min threshold {request.min_match_percentage}%")
+    
+    # The session has to outlive this handler, so the stream owns it
+    db_session = get_db()
+    db = next(db_session)
+    
+    service = get_matchmaker_service()
+    events = service.stream_jd_to_cvs(
+        jd_id=request.jd_id,
+        min_match_percentage=request.min_match_percentage,
+        db=db
+    )
+    
+    try:
+        # Stage 1 (DB stream, index build, JD expansion) blocks - keep it off the event loop
+        first_event = await run_in_threadpool(next, events)
+    except ValueError as e:
+        db_session.close()
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        db_session.close()
+        logger.error(f"Matchmaking failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Matchmaking failed: {str(e)}"
+        )
+    
+    def body():
+        try:
+            for event in chain([first_event], events):
+                yield _format_event(event, format)
+        except Exception as e:
+            logger.error(f"Streamed matchmaking failed: {str(e)}", exc_info=True)
+            yield _format_event({"event": "error", "data": {"detail": f"Matchmaking failed: {str(e)}"}}, format)
+        finally:
+            events.close()
+            db_session.close()
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+@router.post(
+    "/jobs",
+    response_model=MatchmakerJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a background JD-to-CV matching job",
+    description="""
+    Queue JD-to-CV matching as a background job and return its job ID right away.
+    
+    The job runs the same 3-stage matching as `/jd-to-cv` on a local worker pool
+    (`MATCH_JOB_WORKERS` at once), independent of this request. Poll
+    `GET /jobs/{job_id}` for status and progress, then fetch the matches from
+    `GET /jobs/{job_id}/result`.
+    
+    Submitting a JD (with the same threshold) while a job for it is queued or
+    running returns that job with `deduplicated: true`. Job state is persisted,
+    so unfinished jobs resume after a restart. Jobs keep every match above the
+    threshold; paginate with `offset`/`limit` on the result endpoint (`top_k`,
+    `offset` and `limit` are rejected here with 422).
+    """
+)
+async def submit_matchmaking_job(request: MatchmakerJobRequest):
+    """
+    Submit a background matchmaking job
+    
+    Args:
+        request: MatchmakerJobRequest with jd_id and min_match_percentage
+    
+    Returns:
+        MatchmakerJob with job ID and status
+    """
+    try:
+        job, created = get_job_manager().submit(
+            jd_id=request.jd_id,
+            min_match_percentage=request.min_match_percentage
+        )
+        return MatchmakerJob(**job, deduplicated=not created)
+    
+    except Exception as e:
+        logger.error(f"Job submission failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Job submission failed: {str(e)}"
+        )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=MatchmakerJob,
+    status_code=status.HTTP_200_OK,
+    summary="Get matchmaking job status",
+    description="Status (queued, running, completed, failed) and progress of a background matchmaking job"
+)
+async def get_matchmaking_job(job_id: str):
+    """Get status and progress of a background matchmaking job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    return MatchmakerJob(**job)
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=MatchmakerResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get matchmaking job result",
+    description="Matched CVs of a completed background job (409 while the job is still queued or running, or if it failed)"
+)
+async def get_matchmaking_job_result(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Ranked matches to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum matches to return (default all)")
+):
+    """Get the MatchmakerResponse of a completed background job (one page of its sorted matches)"""
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    
+    if job['status'] != JOB_COMPLETED:
+        detail = f"Job {job_id} failed: {job['error']}" if job['status'] == JOB_FAILED else f"Job {job_id} is {job['status']}"
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail
+        )
+    
+    result = manager.get_result(job_id)
+    matches = result.pop('matches')
+    end = None if limit is None else offset + limit
+    return MatchmakerResponse(
+        **result,
+        offset=offset,
+        has_more=end is not None and end < len(matches),
+        matches=matches[offset:end]
+    )
+
+
+@router.post(
+    "/cv-to-jd",
+    response_model=CVToJDResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Match open Job Descriptions to a CV",
+    description="""
+    Find matching open JDs for a given CV (reverse matching).
+    
+    **Local pass:** The CV is scored against every open JD from an in-memory
+    index of compiled JD profiles (exact and known-similar skills, same
+    100-point system and experience/budget filters as JD-to-CV)
+    **AI pass:** Only the top `ai_top_n` JDs with unresolved skill pairs get
+    AI similarity detection; their results are flagged `ai_refined`
+    
+    CV records are not updated.
+    """
+)
+async def match_cv_to_jd(
+    request: CVToJDRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Match open Job Descriptions to a CV
+    
+    Args:
+        request: CVToJDRequest with cv_id, min_match_percentage and ai_top_n
+        db: Database session (injected)
+    
+    Returns:
+        CVToJDResponse with list of matched JDs sorted by match %
+    
+    Raises:
+        404: CV not found
+        500: Processing error
+    """
+    try:
+        logger.info(f"CV-to-JD request: CV {request.cv_id}, min threshold {request.min_match_percentage}%")
+        
+        service = get_matchmaker_service()
+        
+        # Blocking DB reads and Gemini calls: keep them off the event loop
+        result = await run_in_threadpool(
+            service.match_cv_to_jds,
+            cv_id=request.cv_id,
+            min_match_percentage=request.min_match_percentage,
+            ai_top_n=request.ai_top_n,
+            db=db
+        )
+        
+        logger.info(f"CV-to-JD complete: {result.total_matched_jds}/{result.total_open_jds} JDs matched")
+        
+        return result
+        
+    except ValueError as e:
+        # CV not found or validation error
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    except Exception as e:
+        logger.error(f"CV-to-JD matching failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"CV-to-JD matching failed: {str(e)}"
+        )
+
+
 @router.get(
     "/health",
     status_code=status.HTTP_200_OK,
@@ -17,6 +17,51 @@ class MatchmakerRequest(BaseModel):
         le=100, 
         description="Minimum match percentage to return (default 60%)"
     )
+    top_k: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Only rank the best K matches (default all; /jd-to-cv only)"
+    )
+    offset: int = Field(
+        0,
+        ge=0,
+        description="Ranked matches to skip, for pagination (/jd-to-cv only)"
+    )
+    limit: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Maximum matches to return (default all; /jd-to-cv only)"
+    )
+
+
+class MatchmakerStreamRequest(BaseModel):
+    """Request schema for streamed JD-to-CV matching (every match is streamed, no pagination)"""
+    jd_id: int = Field(..., description="Job Description ID to match CVs against")
+    min_match_percentage: Optional[int] = Field(
+        60,
+        ge=0,
+        le=100,
+        description="Minimum match percentage to stream (default 60%)"
+    )
+    
+    class Config:
+        # top_k/offset/limit would be silently ignored - reject them instead
+        extra = "forbid"
+
+
+class MatchmakerJobRequest(BaseModel):
+    """Request schema for a background JD-to-CV matching job (results are paginated when fetched)"""
+    jd_id: int = Field(..., description="Job Description ID to match CVs against")
+    min_match_percentage: Optional[int] = Field(
+        60,
+        ge=0,
+        le=100,
+        description="Minimum match percentage to keep (default 60%)"
+    )
+    
+    class Config:
+        # Pagination belongs to GET /jobs/{job_id}/result; reject it here instead of ignoring it
+        extra = "forbid"
 
 
 class ScoreBreakdown(BaseModel):
@@ -54,6 +99,8 @@ class MatchmakerResponse(BaseModel):
     total_filtered_cvs: int = Field(..., description="CVs after Stage 1 SQL filtering")
     total_matched_cvs: int = Field(..., description="CVs above min match percentage")
     processing_time_seconds: float
+    offset: int = Field(0, description="Ranked matches skipped before this page")
+    has_more: bool = Field(False, description="More ranked matches after this page")
     matches: List[CVMatch] = Field(default_factory=list)
     
     class Config:
@@ -65,6 +112,8 @@ class MatchmakerResponse(BaseModel):
                 "total_filtered_cvs": 100,
                 "total_matched_cvs": 45,
                 "processing_time_seconds": 12.5,
+                "offset": 0,
+                "has_more": True,
                 "matches": [
                     {
                         "cv_id": 456,
@@ -93,6 +142,83 @@ class MatchmakerResponse(BaseModel):
         }
 
 
+class MatchmakerProgress(BaseModel):
+    """Progress event of a streamed JD-to-CV match"""
+    scored_cvs: int = Field(..., description="CVs scored so far")
+    total_cvs: int = Field(..., description="CVs read from Stage 1 so far (Stage 1 is streamed in chunks)")
+    batches_done: int = Field(..., description="AI batches finished so far")
+    total_batches: int = Field(..., description="AI batches planned for the Stage 1 chunks read so far")
+
+
+class MatchmakerSummary(BaseModel):
+    """Final event of a streamed JD-to-CV match (MatchmakerResponse totals, no matches)"""
+    jd_id: int
+    jd_title: str
+    jd_company: str
+    total_filtered_cvs: int = Field(..., description="CVs after Stage 1 SQL filtering")
+    total_matched_cvs: int = Field(..., description="CVs above min match percentage")
+    processing_time_seconds: float
+
+
+class MatchmakerJob(BaseModel):
+    """State and progress of a background matchmaking job"""
+    job_id: str
+    jd_id: int
+    min_match_percentage: int
+    status: str = Field(..., description="queued, running, completed or failed")
+    scored_cvs: int = Field(0, description="CVs scored so far")
+    total_cvs: int = Field(0, description="CVs after Stage 1 filtering")
+    batches_done: int = Field(0, description="AI batches finished so far")
+    total_batches: int = Field(0, description="AI batches in this run")
+    total_matched_cvs: Optional[int] = Field(None, description="CVs above min match percentage (once completed)")
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    deduplicated: bool = Field(False, description="Submission joined an already active job for this JD")
+
+
+class CVToJDRequest(BaseModel):
+    """Request schema for CV-to-JD matching"""
+    cv_id: int = Field(..., description="CV ID to match against all open JDs")
+    min_match_percentage: Optional[int] = Field(
+        60,
+        ge=0,
+        le=100,
+        description="Minimum match percentage to return (default 60%)"
+    )
+    ai_top_n: Optional[int] = Field(
+        None,
+        ge=0,
+        le=100,
+        description="Best local matches refined with AI similarity detection (default from config)"
+    )
+
+
+class JDMatch(BaseModel):
+    """Individual JD match result for a CV"""
+    jd_id: int
+    jd_title: Optional[str]
+    jd_company: Optional[str]
+    match_percentage: int = Field(..., ge=0, le=100)
+    rating: int = Field(..., ge=1, le=5, description="Star rating (1-5)")
+    breakdown: ScoreBreakdown
+    matched_skills: List[str] = Field(default_factory=list)
+    missing_skills: List[str] = Field(default_factory=list)
+    ai_refined: bool = Field(False, description="Similar skills checked by AI (otherwise exact/known matches only)")
+
+
+class CVToJDResponse(BaseModel):
+    """Response schema for CV-to-JD matching"""
+    cv_id: int
+    cv_name: Optional[str]
+    total_open_jds: int = Field(..., description="Open JDs the CV was scored against")
+    total_matched_jds: int = Field(..., description="JDs above min match percentage")
+    ai_refined_jds: int = Field(..., description="Top JDs re-scored with AI similarity detection")
+    processing_time_seconds: float
+    matches: List[JDMatch] = Field(default_factory=list)
+
+
 class AIBatchRequest(BaseModel):
     """Internal schema for AI batch processing"""
     jd_keywords: Dict[str, List[str]]
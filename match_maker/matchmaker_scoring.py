@@ -3,11 +3,31 @@ Matchmaker Scoring Algorithm
 Calculates match percentage using 100-point scoring system
 """
 
-from typing import List, Dict, Optional
+import gc
+import os
+import sys
+from typing import List, Dict, Optional, Iterable
 import logging
+from itertools import chain
+
+# Add ai_modules path to import the shared skill taxonomy
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from utils.skill_taxonomy import canonicalize_skill, canonicalize_skills
+from matchmaker_profiles import CompiledJDProfile
+
+# NumPy powers the batch scorer (optional - falls back to per-CV scoring)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Bump when the scoring rules change: stored match results scored under another version are not reused
+SCORING_VERSION = 1
+
 
 class MatchmakerScoring:
     """
@@ -23,21 +43,35 @@ class MatchmakerScoring:
     - Exception penalty: -50 points per violation
     """
     
+    # (JD field, CV field, AI similar-pairs key) for each skill category
+    SKILL_CATEGORIES = (
+        ('must_have_skills', 'cv_must_to_have', 'must_have_similar'),
+        ('good_to_have_skills', 'cv_good_to_have', 'good_to_have_similar'),
+        ('soft_skills', 'cv_soft_skills', 'soft_skills_similar'),
+    )
+    
+    @staticmethod
+    def compile_jd(jd) -> CompiledJDProfile:
+        """Prepare a JD dict for scoring (compiled profiles are returned as-is)"""
+        if isinstance(jd, CompiledJDProfile):
+            return jd
+        return CompiledJDProfile(jd)
+    
     @staticmethod
     def parse_skills(skills_text: Optional[str]) -> List[str]:
-        """Parse comma-separated skills string into list"""
+        """Parse comma-separated skills string into de-duplicated canonical skill IDs"""
         if not skills_text:
             return []
         
-        # Split by comma and clean each skill
-        skills = [s.strip().lower() for s in str(skills_text).split(',') if s.strip()]
-        return skills
+        # Split by comma and map each skill to its canonical ID ("ReactJS" -> "react")
+        return canonicalize_skills(str(skills_text).split(','))
     
     @staticmethod
     def calculate_skill_match(
         jd_skills: List[str], 
         cv_skills: List[str], 
-        ai_similar_skills: List[str] = None
+        ai_similar_skills: List[str] = None,
+        skill_equivalents: Optional[Dict[str, Iterable[str]]] = None
     ) -> tuple[int, List[str], List[str]]:
         """
         Calculate skill match count
@@ -46,6 +80,8 @@ class MatchmakerScoring:
             jd_skills: Skills required by JD
             cv_skills: Skills from CV
             ai_similar_skills: Similar skills detected by AI (e.g., "Flask~Django")
+            skill_equivalents: Precomputed JD skill -> equivalent skills map
+                (e.g., {"django": {"flask", "fastapi"}}), resolved locally
         
         Returns:
             (match_count, matched_skills, missing_skills)
@@ -53,15 +89,28 @@ class MatchmakerScoring:
         if not jd_skills:
             return 0, [], []
         
+        # Normalize to canonical skill IDs for comparison
+        return MatchmakerScoring._match_skills(
+            [canonicalize_skill(s) for s in jd_skills],
+            [canonicalize_skill(s) for s in cv_skills],
+            ai_similar_skills,
+            skill_equivalents
+        )
+    
+    @staticmethod
+    def _match_skills(
+        jd_skills: Iterable[str],
+        cv_skills: List[str],
+        ai_similar_skills: List[str] = None,
+        skill_equivalents: Optional[Dict[str, Iterable[str]]] = None
+    ) -> tuple[int, List[str], List[str]]:
+        """calculate_skill_match for skills that are already canonical IDs"""
         matched = []
         missing = []
+        cv_set = set(cv_skills)
         
-        # Normalize for comparison
-        jd_normalized = [s.lower().strip() for s in jd_skills]
-        cv_normalized = [s.lower().strip() for s in cv_skills]
-        
-        for jd_skill in jd_normalized:
-            if jd_skill in cv_normalized:
+        for jd_skill in jd_skills:
+            if jd_skill in cv_set:
                 matched.append(jd_skill)
             else:
                 missing.append(jd_skill)
@@ -71,13 +120,81 @@ class MatchmakerScoring:
             for similar in ai_similar_skills:
                 # Format: "Flask~Django" means Flask (CV) is similar to Django (JD)
                 if '~' in similar:
-                    cv_skill, jd_skill = similar.split('~')
-                    if jd_skill.lower().strip() in missing:
+                    cv_skill, jd_skill = similar.split('~', 1)
+                    cv_skill = canonicalize_skill(cv_skill)
+                    jd_skill = canonicalize_skill(jd_skill)
+                    if jd_skill in missing:
                         matched.append(f"{jd_skill} (similar: {cv_skill})")
-                        missing.remove(jd_skill.lower().strip())
+                        missing.remove(jd_skill)
+        
+        # Resolve remaining gaps locally (first CV skill listed as equivalent wins)
+        if skill_equivalents and missing:
+            still_missing = []
+            for jd_skill in missing:
+                equivalents = skill_equivalents.get(jd_skill)
+                cv_skill = None
+                if equivalents:
+                    cv_skill = next((s for s in cv_skills if s in equivalents), None)
+                if cv_skill:
+                    matched.append(f"{jd_skill} (similar: {cv_skill})")
+                else:
+                    still_missing.append(jd_skill)
+            missing = still_missing
         
         return len(matched), matched, missing
     
+    @classmethod
+    def candidate_similarity_pairs(cls, jd, cv: Dict) -> Dict[str, List[tuple]]:
+        """
+        (cv_skill, jd_skill) pairs the AI could report as similar
+        
+        Per category: every CV skill against every JD skill the CV lacks.
+        
+        Args:
+            jd: JD data with keywords, or a CompiledJDProfile
+            cv: CV data with keywords
+        
+        Returns:
+            {ai_similar_key: [(cv_skill, jd_skill), ...]}
+        """
+        profile = cls.compile_jd(jd)
+        pairs = {}
+        for jd_field, cv_field, similar_key in cls.SKILL_CATEGORIES:
+            jd_skills = profile.skills(jd_field)
+            cv_skills = cls.parse_skills(cv.get(cv_field))
+            cv_set = set(cv_skills)
+            missing = [s for s in dict.fromkeys(jd_skills) if s not in cv_set]
+            pairs[similar_key] = [
+                (cv_skill, jd_skill)
+                for jd_skill in missing
+                for cv_skill in dict.fromkeys(cv_skills)
+            ]
+        return pairs
+    
+    @classmethod
+    def needs_ai_similarity(
+        cls,
+        jd,
+        cv: Dict,
+        known_pairs: Dict[str, Dict[str, bool]]
+    ) -> bool:
+        """
+        Decide whether a CV still needs the LLM for similar-skill detection
+        
+        Args:
+            jd: JD data with keywords, or a CompiledJDProfile
+            cv: CV data with keywords
+            known_pairs: {jd_skill: {cv_skill: is_similar}} from the skill graph
+        
+        Returns:
+            True if any candidate (cv_skill, jd_skill) pair is not yet known
+        """
+        for pairs in cls.candidate_similarity_pairs(jd, cv).values():
+            for cv_skill, jd_skill in pairs:
+                if cv_skill not in known_pairs.get(jd_skill, {}):
+                    return True
+        return False
+    
     @staticmethod
     def calculate_experience_score(
         cv_experience: Optional[float],
@@ -162,53 +279,72 @@ class MatchmakerScoring:
         - Has exception skill: -50
         - Worked at blacklisted company: -50
         """
+        profile = CompiledJDProfile({
+            'exception_skills': jd_exception_skills,
+            'exception_list': jd_exception_list
+        })
+        return MatchmakerScoring._exception_penalty(
+            profile, [canonicalize_skill(s) for s in cv_skills], cv_companies
+        )
+    
+    @staticmethod
+    def _exception_penalty(
+        profile: CompiledJDProfile,
+        cv_skills: List[str],
+        cv_companies: Optional[str]
+    ) -> int:
+        """check_exceptions against a compiled JD (cv_skills already canonical)"""
         penalty = 0
         
         # Check exception skills
-        if jd_exception_skills:
-            exception_skills = [s.strip().lower() for s in jd_exception_skills.split(',') if s.strip()]
-            cv_skills_lower = [s.lower() for s in cv_skills]
-            
-            for exc_skill in exception_skills:
-                if exc_skill in cv_skills_lower:
-                    penalty -= 50
-                    logger.warning(f"Exception skill found: {exc_skill}")
-                    break  # Only penalize once
+        if profile.exception_skill_set:
+            cv_skill_set = set(cv_skills)
+            exc_skill = next((s for s in profile.exception_skills if s in cv_skill_set), None)
+            if exc_skill:
+                penalty -= 50
+                logger.warning(f"Exception skill found: {exc_skill}")
         
         # Check blacklisted companies
-        if jd_exception_list and cv_companies:
-            blacklist = [c.strip().lower() for c in jd_exception_list.split(',') if c.strip()]
-            
-            for blacklisted in blacklist:
-                if blacklisted in cv_companies.lower():
-                    penalty -= 50
-                    logger.warning(f"Blacklisted company found: {blacklisted}")
-                    break  # Only penalize once
+        blacklisted = profile.blacklisted_company(cv_companies)
+        if blacklisted:
+            penalty -= 50
+            logger.warning(f"Blacklisted company found: {blacklisted}")
         
         return penalty
     
+    @staticmethod
+    def _domain_score(profile: CompiledJDProfile, cv_domain: Optional[str]) -> int:
+        """calculate_domain_match against a compiled JD"""
+        if not profile.domain_expertise or not cv_domain:
+            return 0
+        return 0 if profile.domain_tokens.isdisjoint(cv_domain.lower().split()) else 10
+    
     @classmethod
     def calculate_total_score(
         cls,
-        jd: Dict,
+        jd,
         cv: Dict,
-        ai_matches: Dict
+        ai_matches: Dict,
+        skill_equivalents: Optional[Dict[str, Iterable[str]]] = None
     ) -> Dict:
         """
         Calculate total match score using 100-point system
         
         Args:
-            jd: JD data with keywords
+            jd: JD data with keywords, or a CompiledJDProfile (parsed once per run)
             cv: CV data with keywords
             ai_matches: AI-detected matches and similar skills
+            skill_equivalents: Optional JD skill -> equivalent skills map used to
+                resolve similar matches without AI (see calculate_skill_match)
         
         Returns:
             Dict with total score, breakdown, rating, matched/missing skills
         """
-        # Parse skills
-        jd_must_have = cls.parse_skills(jd.get('must_have_skills'))
-        jd_good_to_have = cls.parse_skills(jd.get('good_to_have_skills'))
-        jd_soft_skills = cls.parse_skills(jd.get('soft_skills'))
+        # Parse skills (JD side comes precompiled)
+        profile = cls.compile_jd(jd)
+        jd_must_have = profile.must_have_skills
+        jd_good_to_have = profile.good_to_have_skills
+        jd_soft_skills = profile.soft_skills
         
         cv_must_have = cls.parse_skills(cv.get('cv_must_to_have'))
         cv_good_to_have = cls.parse_skills(cv.get('cv_good_to_have'))
@@ -220,40 +356,37 @@ class MatchmakerScoring:
         ai_soft_similar = ai_matches.get('soft_skills_similar', [])
         
         # 1. Must-have skills (40 points)
-        must_match_count, must_matched, must_missing = cls.calculate_skill_match(
-            jd_must_have, cv_must_have, ai_must_similar
+        must_match_count, must_matched, must_missing = cls._match_skills(
+            jd_must_have, cv_must_have, ai_must_similar, skill_equivalents
         )
         must_have_score = 0
         if jd_must_have:
             must_have_score = int((must_match_count / len(jd_must_have)) * 40)
         
         # 2. Good-to-have skills (25 points)
-        good_match_count, good_matched, good_missing = cls.calculate_skill_match(
-            jd_good_to_have, cv_good_to_have, ai_good_similar
+        good_match_count, good_matched, good_missing = cls._match_skills(
+            jd_good_to_have, cv_good_to_have, ai_good_similar, skill_equivalents
         )
         good_to_have_score = 0
         if jd_good_to_have:
             good_to_have_score = int((good_match_count / len(jd_good_to_have)) * 25)
         
         # 3. Soft skills (15 points)
-        soft_match_count, soft_matched, soft_missing = cls.calculate_skill_match(
-            jd_soft_skills, cv_soft_skills, ai_soft_similar
+        soft_match_count, soft_matched, soft_missing = cls._match_skills(
+            jd_soft_skills, cv_soft_skills, ai_soft_similar, skill_equivalents
         )
         soft_skills_score = 0
         if jd_soft_skills:
             soft_skills_score = int((soft_match_count / len(jd_soft_skills)) * 15)
         
         # 4. Domain expertise (10 points)
-        domain_score = cls.calculate_domain_match(
-            jd.get('domain_expertise'),
-            cv.get('cv_domain_expertise')
-        )
+        domain_score = cls._domain_score(profile, cv.get('cv_domain_expertise'))
         
         # 5. Experience fit (10 points)
         experience_score = cls.calculate_experience_score(
             cv.get('cv_experience'),
-            jd.get('op_experience_min'),
-            jd.get('op_experience_max')
+            profile.op_experience_min,
+            profile.op_experience_max
         )
         
         # 6. Accolades bonus (+10 points)
@@ -261,11 +394,8 @@ class MatchmakerScoring:
         
         # 7. Exception penalties (-50 per violation)
         all_cv_skills = cv_must_have + cv_good_to_have
-        exception_penalty = cls.check_exceptions(
-            all_cv_skills,
-            cv.get('cv_current_company'),
-            jd.get('exception_skills'),
-            jd.get('exception_list')
+        exception_penalty = cls._exception_penalty(
+            profile, all_cv_skills, cv.get('cv_current_company')
         )
         
         # Calculate total score (cap at 0-100)
@@ -311,4 +441,367 @@ class MatchmakerScoring:
             },
             'matched_skills': all_matched,
             'missing_skills': all_missing
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def calculate_total_scores(
+        cls,
+        jd,
+        cvs: List[Dict],
+        ai_matches_list: Optional[List[Optional[Dict]]] = None,
+        skill_equivalents: Optional[Dict[str, Iterable[str]]] = None
+    ) -> List[Dict]:
+        """
+        Score one JD against many CVs in a single vectorized pass
+        
+        Returns exactly what calculate_total_score returns for each CV (same
+        breakdown, rating, matched/missing skills and order): the rows of
+        score_columns, or per-CV scoring when NumPy is not installed.
+        
+        Args:
+            jd: JD data with keywords, or a CompiledJDProfile
+            cvs: CV data dicts with keywords
+            ai_matches_list: Optional AI matches per CV (aligned with cvs, None = no AI)
+            skill_equivalents: Optional JD skill -> equivalent skills map
+        
+        Returns:
+            List of score dicts, aligned with cvs
+        """
+        if not cvs:
+            return []
+        
+        if not NUMPY_AVAILABLE:
+            profile = cls.compile_jd(jd)
+            return [
+                cls.calculate_total_score(
+                    profile, cv, (ai_matches_list[i] if ai_matches_list else None) or {}, skill_equivalents
+                )
+                for i, cv in enumerate(cvs)
+            ]
+        
+        return cls.score_columns(jd, cvs, ai_matches_list, skill_equivalents).rows()
+    
+    @classmethod
+    def score_columns(
+        cls,
+        jd,
+        cvs: List[Dict],
+        ai_matches_list: Optional[List[Optional[Dict]]] = None,
+        skill_equivalents: Optional[Dict[str, Iterable[str]]] = None
+    ) -> 'ScoreColumns':
+        """
+        Columnar form of calculate_total_scores (requires NumPy)
+        
+        Each distinct CV skill string is canonicalized and encoded once per
+        call: CVs sharing a field value share one row of a pattern x skill
+        matrix, and scores, matched/missing lists and exception hits are
+        computed per pattern and gathered per CV. Only CVs with AI similar
+        pairs are handled row by row.
+        
+        Returns:
+            ScoreColumns (NumPy score columns plus per-CV skill lists)
+        """
+        n = len(cvs)
+        profile = cls.compile_jd(jd)
+        
+        # Shared vocabulary: JD skills, their equivalents and exception skills
+        vocab = {}
+        
+        def vocab_id(skill: str) -> int:
+            return vocab.setdefault(skill, len(vocab))
+        
+        categories = []
+        for (jd_field, cv_field, similar_key), weight in zip(cls.SKILL_CATEGORIES, (40, 25, 15)):
+            jd_skills = profile.skills(jd_field)
+            columns = [vocab_id(s) for s in jd_skills]
+            equivalent_ids = [
+                sorted(vocab_id(e) for e in (skill_equivalents.get(s) or ())) if skill_equivalents else []
+                for s in jd_skills
+            ]
+            categories.append((cv_field, similar_key, weight, jd_skills, columns, equivalent_ids))
+        
+        exception_ids = [vocab_id(s) for s in profile.exception_skills]
+        
+        vocab_names = [None] * len(vocab)
+        for skill, idx in vocab.items():
+            vocab_names[idx] = skill
+        
+        # Raw skill token -> vocabulary id (-1 = not relevant to this JD), memoized per call
+        token_ids = {}
+        
+        # Each distinct field value is handled once: row -> value code, code -> value
+        def intern(field: str, falsy_as_none: bool = False):
+            values = [cv.get(field) for cv in cvs]
+            if falsy_as_none:
+                values = [value or None for value in values]
+            codes = {value: code for code, value in enumerate(dict.fromkeys(values))}
+            return np.array([codes[value] for value in values], dtype=np.int64), list(codes)
+        
+        # Skill strings: one pattern row per distinct string. Tokens outside the JD vocabulary
+        # have id -1, which lands in the spare last column of the pattern x skill matrix.
+        encoded = []
+        for cv_field, *_ in categories:
+            rows, texts = intern(cv_field, falsy_as_none=True)
+            token_lists = [str(text).split(',') if text else [] for text in texts]
+            for token in set(chain.from_iterable(token_lists)).difference(token_ids):
+                canonical = canonicalize_skill(token)
+                token_ids[token] = vocab.get(canonical, -1) if canonical else -1
+            pattern_ids = [[token_ids[token] for token in tokens] for tokens in token_lists]
+            matrix = np.zeros((len(pattern_ids), len(vocab) + 1), dtype=bool)
+            matrix[
+                np.repeat(np.arange(len(pattern_ids)), [len(ids) for ids in pattern_ids]),
+                list(chain.from_iterable(pattern_ids))
+            ] = True
+            encoded.append((rows, pattern_ids, matrix))
+        
+        # 1-3. Skill categories
+        skill_scores = []
+        skill_lists = []
+        for (cv_field, similar_key, weight, jd_skills, columns, equivalent_ids), (rows, pattern_ids, matrix) in zip(
+            categories, encoded
+        ):
+            num_skills = len(jd_skills)
+            if not num_skills:
+                skill_scores.append(np.zeros(n, dtype=np.int64))
+                skill_lists.append(None)
+                continue
+            
+            # Per pattern: exact hits, then locally resolved equivalents for what is still missing
+            exact = matrix[:, columns]
+            equivalent_hits = np.zeros_like(exact)
+            for p, ids in enumerate(equivalent_ids):
+                if ids:
+                    equivalent_hits[:, p] = matrix[:, ids].any(axis=1)
+            equivalent_hits &= ~exact
+            
+            match_count = (exact.sum(axis=1) + equivalent_hits.sum(axis=1))[rows]
+            
+            def skill_lists_for(ids, exact_row, ai_row, equivalent_row, ai_labels=()):
+                matched = [jd_skills[p] for p in range(num_skills) if exact_row[p]]
+                matched.extend(ai_labels)
+                missing = []
+                for p in range(num_skills):
+                    if exact_row[p] or ai_row[p]:
+                        continue
+                    if equivalent_row[p]:
+                        equivalents = set(equivalent_ids[p])
+                        cv_skill = next(vocab_names[v] for v in ids if v in equivalents)
+                        matched.append(f"{jd_skills[p]} (similar: {cv_skill})")
+                    else:
+                        missing.append(jd_skills[p])
+                return matched, missing
+            
+            no_ai = [False] * num_skills
+            exact_rows = exact.tolist()
+            equivalent_rows = equivalent_hits.tolist()
+            
+            # Patterns with only exact hits share one (matched, missing) pair per hit combination
+            packed = np.packbits(exact, axis=1)
+            if packed.shape[1] <= 8:
+                # Up to 64 JD skills: one uint64 key per pattern makes the unique a 1-D sort
+                keys = np.zeros((len(packed), 8), dtype=np.uint8)
+                keys[:, :packed.shape[1]] = packed
+                codes, inverse = np.unique(keys.view(np.uint64).reshape(-1), return_inverse=True)
+                combinations = codes.reshape(-1, 1).view(np.uint8)[:, :packed.shape[1]]
+            else:
+                combinations, inverse = np.unique(packed, axis=0, return_inverse=True)
+            combination_lists = [
+                skill_lists_for((), combination, no_ai, no_ai)
+                for combination in np.unpackbits(combinations, axis=1, count=num_skills).astype(bool).tolist()
+            ]
+            inverse = inverse.reshape(-1).tolist()
+            pattern_lists = [
+                skill_lists_for(ids, exact_rows[pattern], no_ai, equivalent_rows[pattern]) if has_equivalent
+                else combination_lists[inverse[pattern]]
+                for pattern, (ids, has_equivalent) in enumerate(zip(pattern_ids, equivalent_hits.any(axis=1).tolist()))
+            ]
+            row_lists = {}
+            
+            # AI-detected similar skills (sequential, same semantics as calculate_skill_match)
+            if ai_matches_list:
+                row_patterns = rows.tolist()
+                for i, ai_matches in enumerate(ai_matches_list):
+                    pairs = (ai_matches or {}).get(similar_key) or []
+                    if not pairs:
+                        continue
+                    pattern = row_patterns[i]
+                    exact_row = exact_rows[pattern]
+                    ai_row = [False] * num_skills
+                    labels = []
+                    for similar in pairs:
+                        if '~' not in similar:
+                            continue
+                        cv_skill, jd_skill = similar.split('~', 1)
+                        cv_skill = canonicalize_skill(cv_skill)
+                        jd_skill = canonicalize_skill(jd_skill)
+                        position = next(
+                            (p for p in range(num_skills)
+                             if jd_skills[p] == jd_skill and not exact_row[p] and not ai_row[p]),
+                            None
+                        )
+                        if position is not None:
+                            ai_row[position] = True
+                            labels.append(f"{jd_skill} (similar: {cv_skill})")
+                    if not labels:
+                        continue
+                    equivalent_row = [
+                        hit and not ai_hit for hit, ai_hit in zip(equivalent_rows[pattern], ai_row)
+                    ]
+                    match_count[i] = sum(exact_row) + len(labels) + sum(equivalent_row)
+                    row_lists[i] = skill_lists_for(
+                        pattern_ids[pattern], exact_row, ai_row, equivalent_row, labels
+                    )
+            
+            skill_scores.append(((match_count / num_skills) * weight).astype(np.int64))
+            skill_lists.append((rows, pattern_lists, row_lists))
+        
+        # 4. Domain expertise
+        codes, domains = intern('cv_domain_expertise')
+        domain_scores = np.array([cls._domain_score(profile, d) for d in domains], dtype=np.int64)[codes]
+        
+        # 5. Experience fit
+        codes, experiences = intern('cv_experience')
+        experience_scores = np.array([
+            cls.calculate_experience_score(e, profile.op_experience_min, profile.op_experience_max)
+            for e in experiences
+        ], dtype=np.int64)[codes]
+        
+        # 6. Accolades bonus
+        codes, accolades = intern('cv_accolades', falsy_as_none=True)
+        accolades_bonus = np.array([cls.calculate_accolades_bonus(a) for a in accolades], dtype=np.int64)[codes]
+        
+        # 7. Exception penalties (must-have and good-to-have skills)
+        penalties = np.zeros(n, dtype=np.int64)
+        if exception_ids:
+            has_exception = np.zeros(n, dtype=bool)
+            for rows, _, matrix in encoded[:2]:
+                has_exception |= matrix[:, exception_ids].any(axis=1)[rows]
+            penalties -= np.where(has_exception, 50, 0)
+            if has_exception.any():
+                logger.warning(f"Exception skill found in {int(has_exception.sum())} CVs")
+        
+        if profile.blacklist:
+            codes, companies = intern('cv_current_company', falsy_as_none=True)
+            blacklisted = np.array([
+                bool(company) and profile.blacklisted_company(company) is not None for company in companies
+            ], dtype=bool)[codes]
+            penalties -= np.where(blacklisted, 50, 0)
+            if blacklisted.any():
+                logger.warning(f"Blacklisted company found in {int(blacklisted.sum())} CVs")
+        
+        # Totals and ratings
+        must_scores, good_scores, soft_scores = skill_scores
+        total = must_scores + good_scores + soft_scores + domain_scores + experience_scores + accolades_bonus + penalties
+        match_percentage = np.clip(total, 0, 100)
+        rating = np.select(
+            [match_percentage >= 90, match_percentage >= 75, match_percentage >= 60, match_percentage >= 40],
+            [5, 4, 3, 2],
+            default=1
+        )
+        
+        return ScoreColumns(
+            match_percentage, rating,
+            np.stack([must_scores, good_scores, soft_scores, domain_scores, experience_scores,
+                      accolades_bonus, penalties], axis=1),
+            skill_lists
+        )
+
+
+class ScoreColumns:
+    """
+    Scores of one JD against many CVs, column by column
+    
+    `match_percentage` and `rating` are NumPy arrays aligned with the CVs;
+    `breakdown` is an (n, 7) array in BREAKDOWN_FIELDS order. Matched and
+    missing skills are kept per distinct CV skill string and only expanded
+    into lists by row()/rows().
+    """
+    
+    __slots__ = ('match_percentage', 'rating', 'breakdown', '_skill_lists')
+    
+    BREAKDOWN_FIELDS = ('must_have', 'good_to_have', 'soft_skills', 'domain', 'experience', 'accolades', 'penalties')
+    
+    def __init__(self, match_percentage, rating, breakdown, skill_lists):
+        self.match_percentage = match_percentage
+        self.rating = rating
+        self.breakdown = breakdown
+        # Per category: None (JD has no such skills) or (row -> pattern, pattern lists, {row: lists})
+        self._skill_lists = skill_lists
+    
+    def __len__(self) -> int:
+        return len(self.match_percentage)
+    
+    def _skill_lists_at(self, i: int) -> List[tuple]:
+        """(matched, missing) of one row for each skill category"""
+        lists = []
+        for category in self._skill_lists:
+            if category is None:
+                lists.append(([], []))
+                continue
+            rows, pattern_lists, row_lists = category
+            pair = row_lists.get(i)
+            lists.append(pair if pair is not None else pattern_lists[rows[i]])
+        return lists
+    
+    def row(self, i: int) -> Dict:
+        """Score dict of one CV (calculate_total_score format)"""
+        must, good, soft = self._skill_lists_at(i)
+        return {
+            'match_percentage': int(self.match_percentage[i]),
+            'rating': int(self.rating[i]),
+            'breakdown': dict(zip(self.BREAKDOWN_FIELDS, self.breakdown[i].tolist())),
+            'matched_skills': must[0] + good[0] + soft[0],
+            'missing_skills': must[1] + good[1] + soft[1]
+        }
+    
+    def rows(self) -> List[Dict]:
+        """
+        Score dicts of every CV (calculate_total_score format)
+        
+        The cyclic garbage collector is paused while the dicts are built: none
+        of them can form a cycle, and with 100k rows the collections triggered
+        by the allocations cost more than building the rows.
+        """
+        n = len(self)
+        empty = [([], [])] * n
+        per_category = []
+        for category in self._skill_lists:
+            if category is None:
+                per_category.append(empty)
+                continue
+            rows, pattern_lists, row_lists = category
+            lists = [pattern_lists[pattern] for pattern in rows.tolist()]
+            for i, pair in row_lists.items():
+                lists[i] = pair
+            per_category.append(lists)
+        
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._build_rows(per_category)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    
+    def _build_rows(self, per_category: List[List[tuple]]) -> List[Dict]:
+        """One score dict per row from the columns and per-category (matched, missing) lists"""
+        rows = []
+        columns = zip(self.match_percentage.tolist(), self.rating.tolist(), self.breakdown.tolist(), *per_category)
+        for percentage, stars, breakdown, must, good, soft in columns:
+            must_have, good_to_have, soft_skills, domain, experience, accolades, penalties = breakdown
+            rows.append({
+                'match_percentage': percentage,
+                'rating': stars,
+                'breakdown': {
+                    'must_have': must_have,
+                    'good_to_have': good_to_have,
+                    'soft_skills': soft_skills,
+                    'domain': domain,
+                    'experience': experience,
+                    'accolades': accolades,
+                    'penalties': penalties
+                },
+                'matched_skills': must[0] + good[0] + soft[0],
+                'missing_skills': must[1] + good[1] + soft[1]
+            })
+        return rows
@@ -7,10 +7,17 @@ import os
 import sys
 import json
 import time
+import heapq
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import statistics
+import threading
+from itertools import islice
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import bindparam, update
 from dotenv import load_dotenv
 import google.generativeai as genai
 
@@ -18,11 +25,27 @@ import google.generativeai as genai
 backend_path = os.path.join(os.path.dirname(__file__), '..', '..')
 sys.path.insert(0, backend_path)
 
+# Add ai_modules path to import shared config and clients
+ai_modules_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ai_modules_path)
+
+from config import config
+from clients.rate_limiter import get_rate_limiter
+from utils.token_utils import estimate_tokens
+from utils.skill_taxonomy import canonicalize_skill, taxonomy_version
+from utils.skill_index import get_skill_index
 from backend.models.database import get_db
 from backend.models.jd_models import JD
 from backend.models.cv_models import CV
-from matchmaker_scoring import MatchmakerScoring
-from matchmaker_schemas import MatchmakerResponse, CVMatch, ScoreBreakdown
+from matchmaker_scoring import MatchmakerScoring, SCORING_VERSION
+from skill_graph import SkillSimilarityGraph
+from match_store import MatchResultStore, fingerprint
+from jd_index import OpenJDIndex
+from matchmaker_profiles import CandidateRecord, CompiledJDProfile, iter_candidate_records
+from matchmaker_schemas import (
+    MatchmakerResponse, CVMatch, ScoreBreakdown, CVToJDResponse, JDMatch,
+    MatchmakerProgress, MatchmakerSummary
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,46 +64,134 @@ else:
     logger.info("Gemini API configured successfully")
 
 
+def _empty_ai_matches() -> Dict:
+    """AI match structure with no matches (exact matching only)"""
+    return {
+        'must_have_matches': [],
+        'must_have_similar': [],
+        'good_to_have_matches': [],
+        'good_to_have_similar': [],
+        'soft_skills_matches': [],
+        'soft_skills_similar': []
+    }
+
+
 class MatchmakerService:
     """
     Three-stage matchmaking orchestrator
     
-    Stage 1: SQL + Python pre-filtering
-    Stage 2: AI-powered batch matching (10 CVs per batch)
+    Stage 1: SQL + Python pre-filtering, then skill-index candidate retrieval
+    Stage 2: AI-powered batch matching (token-budget packed batches, run concurrently)
     Stage 3: Database updates
     """
     
+    # Expected response tokens per CV beyond the echoed skill names (JSON keys, ids, brackets)
+    OUTPUT_TOKENS_PER_CV = 60
+    
     def __init__(self):
         self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        self.batch_size = 10
+        self.max_batch_size = max(1, config.MATCH_BATCH_MAX_CVS)
+        self.max_prompt_tokens = config.MATCH_BATCH_MAX_PROMPT_TOKENS
+        self.max_output_tokens = config.MATCH_BATCH_MAX_OUTPUT_TOKENS
         self.max_retries = 3
+        self.similarity_mode = config.MATCH_SIMILARITY_MODE
+        self.max_concurrent_batches = max(1, config.MATCH_MAX_CONCURRENT_BATCHES)
+        self.rate_limiter = get_rate_limiter()
         self.scorer = MatchmakerScoring()
+        
+        # Learned skill-similarity graph (optional)
+        self.skill_graph = None
+        if config.MATCH_SKILL_GRAPH_ENABLED:
+            self.skill_graph = SkillSimilarityGraph(
+                path=config.MATCH_SKILL_GRAPH_PATH,
+                min_observations=config.MATCH_SKILL_GRAPH_MIN_OBSERVATIONS,
+                min_confidence=config.MATCH_SKILL_GRAPH_MIN_CONFIDENCE
+            )
+        
+        # Scores from previous runs, reused for unchanged CVs (optional)
+        self.match_store = None
+        if config.MATCH_RESULT_STORE_ENABLED:
+            self.match_store = MatchResultStore(config.MATCH_RESULT_STORE_PATH)
+        
+        # Compiled open JDs for CV-to-JD matching
+        self.jd_index = OpenJDIndex(
+            compile_jd=self._compile_jd,
+            refresh_seconds=config.MATCH_JD_INDEX_REFRESH_SECONDS,
+            status_field=config.MATCH_OPEN_JD_STATUS_FIELD,
+            open_statuses=tuple(s.strip() for s in config.MATCH_OPEN_JD_STATUSES.split(',') if s.strip())
+        )
+        self.cv_to_jd_ai_top_n = max(0, config.MATCH_CV_TO_JD_AI_TOP_N)
+        
+        # Inverted skill index for candidate retrieval (optional)
+        self.skill_index = get_skill_index() if config.MATCH_SKILL_INDEX_ENABLED else None
+        self.index_min_hits = config.MATCH_SKILL_INDEX_MIN_HITS
+        self.db_read_chunk_size = max(1, config.MATCH_DB_READ_CHUNK_SIZE)
+        self.db_write_chunk_size = max(1, config.MATCH_DB_WRITE_CHUNK_SIZE)
+        
+        # Per-JD skill equivalence expansions (jd_expansion mode), LRU by JD skill text
+        self._expansion_lock = threading.Lock()
+        self._expansion_cache = OrderedDict()
+        self._expansion_cache_size = max(1, config.MATCH_EXPANSION_CACHE_SIZE)
+        
+        # Cumulative Stage 2 batch metrics (see get_metrics)
+        self._metrics_lock = threading.Lock()
+        self._batch_size_histogram = Counter()
+        self._batches_total = 0
+    
+    def get_metrics(self) -> Dict:
+        """Cumulative Stage 2 batch-size distribution since service start"""
+        with self._metrics_lock:
+            return {
+                'batches_total': self._batches_total,
+                'cvs_total': sum(size * n for size, n in self._batch_size_histogram.items()),
+                'batch_size_histogram': dict(sorted(self._batch_size_histogram.items()))
+            }
     
     def match_jd_to_cvs(
         self, 
         jd_id: int, 
         min_match_percentage: int = 60,
-        db: Session = None
+        db: Session = None,
+        top_k: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
     ) -> MatchmakerResponse:
         """
         Main entry point for JD-to-CV matching
         
+        Every qualified CV is scored and written in Stage 3; `top_k`, `offset`
+        and `limit` only select which of them are returned.
+        
         Args:
             jd_id: Job Description ID
             min_match_percentage: Minimum match % to return (default 60)
             db: Database session
+            top_k: Only rank the best K qualified matches (default all)
+            offset: Ranked matches to skip (default 0)
+            limit: Maximum matches to return (default all)
         
         Returns:
-            MatchmakerResponse with all matched CVs
+            MatchmakerResponse with the requested page of matched CVs
         """
         start_time = time.time()
         
         try:
-            # Stage 1: Pre-filter CVs
-            logger.info(f"Stage 1: Pre-filtering CVs for JD {jd_id}")
-            jd, filtered_cvs = self._stage1_prefilter(jd_id, db)
+            # Stage 1: Pre-filter CVs (streamed)
+            jd, profile, candidates = self._stage1_candidates(jd_id, db)
+            
+            # Stage 2: AI matching with batching, one Stage 1 chunk at a time;
+            # only matches above the minimum percentage are kept
+            self._log_stage2_start()
+            total_filtered = 0
+            qualified_matches = []
+            for chunk in self._iter_candidate_chunks(candidates):
+                total_filtered += len(chunk)
+                qualified_matches.extend(
+                    m for m in self._stage2_incremental(jd, chunk, profile)
+                    if m['match_percentage'] >= min_match_percentage
+                )
             
-            if not filtered_cvs:
+            if not total_filtered:
                 logger.warning(f"No CVs found after Stage 1 filtering for JD {jd_id}")
                 return MatchmakerResponse(
                     jd_id=jd_id,
@@ -92,40 +203,28 @@ class MatchmakerService:
                     matches=[]
                 )
             
-            logger.info(f"Stage 1 complete: {len(filtered_cvs)} CVs filtered")
-            
-            # Stage 2: AI matching with batching
-            logger.info(f"Stage 2: AI matching with batch size {self.batch_size}")
-            match_results = self._stage2_ai_matching(jd, filtered_cvs)
-            
-            logger.info(f"Stage 2 complete: {len(match_results)} CVs scored")
-            
-            # Filter by minimum match percentage
-            qualified_matches = [
-                m for m in match_results 
-                if m['match_percentage'] >= min_match_percentage
-            ]
-            
-            # Sort by match percentage (descending)
-            qualified_matches.sort(key=lambda x: x['match_percentage'], reverse=True)
-            
+            logger.info(f"Stage 2 complete: {total_filtered} CVs scored")
             logger.info(f"Found {len(qualified_matches)} CVs above {min_match_percentage}% threshold")
             
             # Stage 3: Update database
             logger.info("Stage 3: Updating CV table with match results")
-            self._stage3_update_cvs(qualified_matches, jd_id, db)
+            self._stage3_update_cvs(qualified_matches, jd, db)
             
-            logger.info("Stage 3 complete: Database updated")
+            # Rank only as far as the requested page reaches
+            page = self._select_page(qualified_matches, top_k, offset, limit)
+            ranked_total = len(qualified_matches) if top_k is None else min(top_k, len(qualified_matches))
             
             # Build response
             response = MatchmakerResponse(
                 jd_id=jd_id,
                 jd_title=jd.job_title,
                 jd_company=jd.company_name,
-                total_filtered_cvs=len(filtered_cvs),
+                total_filtered_cvs=total_filtered,
                 total_matched_cvs=len(qualified_matches),
                 processing_time_seconds=time.time() - start_time,
-                matches=[self._build_cv_match(m) for m in qualified_matches]
+                offset=offset,
+                has_more=offset + len(page) < ranked_total,
+                matches=[self._build_cv_match(m) for m in page]
             )
             
             logger.info(f"Matchmaking complete in {response.processing_time_seconds:.2f}s")
@@ -135,6 +234,296 @@ class MatchmakerService:
             logger.error(f"Matchmaking failed: {str(e)}", exc_info=True)
             raise
     
+    def stream_jd_to_cvs(
+        self,
+        jd_id: int,
+        min_match_percentage: int = 60,
+        db: Session = None
+    ) -> Iterator[Dict]:
+        """
+        Streaming variant of match_jd_to_cvs
+        
+        Yields events as the run progresses instead of one response at the end:
+        
+        - ``start``: JD details and the Stage 1 candidate count (None while
+          Stage 1 is still streaming, i.e. without the skill index)
+        - ``progress``: MatchmakerProgress after every finished group of CVs
+          (per Stage 1 chunk: stored/graph-resolved scores first, then each
+          AI batch); totals cover the Stage 1 chunks read so far
+        - ``match``: CVMatch for every CV above the threshold, in completion order
+        - ``summary``: MatchmakerSummary with the MatchmakerResponse totals,
+          sent after Stage 3 has updated the CV table
+        
+        Each event is a dict ``{"event": name, "data": payload}``. A missing JD
+        raises ValueError on the first iteration, before any event.
+        
+        Args:
+            jd_id: Job Description ID
+            min_match_percentage: Minimum match % to return (default 60)
+            db: Database session
+        """
+        start_time = time.time()
+        
+        try:
+            jd, profile, candidates = self._stage1_candidates(jd_id, db)
+            
+            yield {
+                "event": "start",
+                "data": {
+                    "jd_id": jd_id,
+                    "jd_title": jd.job_title,
+                    "jd_company": jd.company_name,
+                    # Known up front only when the skill index ranked the candidates
+                    "total_filtered_cvs": len(candidates) if isinstance(candidates, list) else None
+                }
+            }
+            
+            qualified_matches = []
+            total_filtered = 0
+            scored = 0
+            batches_before = 0
+            self._log_stage2_start()
+            for chunk in self._iter_candidate_chunks(candidates):
+                total_filtered += len(chunk)
+                chunk_batches = 0
+                for pairs, batches_done, total_batches in self._iter_stage2_incremental(jd, chunk, profile):
+                    chunk_batches = total_batches
+                    scored += len(pairs)
+                    for _, result in pairs:
+                        if result['match_percentage'] >= min_match_percentage:
+                            qualified_matches.append(result)
+                            yield {"event": "match", "data": self._build_cv_match(result)}
+                    
+                    yield {
+                        "event": "progress",
+                        "data": MatchmakerProgress(
+                            scored_cvs=scored,
+                            total_cvs=total_filtered,
+                            batches_done=batches_before + batches_done,
+                            total_batches=batches_before + total_batches
+                        )
+                    }
+                batches_before += chunk_batches
+            
+            if total_filtered:
+                logger.info(f"Stage 2 complete: {scored} CVs scored")
+                
+                qualified_matches.sort(key=lambda x: x['match_percentage'], reverse=True)
+                logger.info("Stage 3: Updating CV table with match results")
+                self._stage3_update_cvs(qualified_matches, jd, db)
+            else:
+                logger.warning(f"No CVs found after Stage 1 filtering for JD {jd_id}")
+            
+            summary = MatchmakerSummary(
+                jd_id=jd_id,
+                jd_title=jd.job_title,
+                jd_company=jd.company_name,
+                total_filtered_cvs=total_filtered,
+                total_matched_cvs=len(qualified_matches),
+                processing_time_seconds=time.time() - start_time
+            )
+            logger.info(f"Streamed matchmaking complete in {summary.processing_time_seconds:.2f}s")
+            yield {"event": "summary", "data": summary}
+            
+        except Exception as e:
+            logger.error(f"Streamed matchmaking failed: {str(e)}", exc_info=True)
+            raise
+    
+    def match_cv_to_jds(
+        self,
+        cv_id: int,
+        min_match_percentage: int = 60,
+        ai_top_n: Optional[int] = None,
+        db: Session = None
+    ) -> CVToJDResponse:
+        """
+        Reverse entry point: match one CV against every open JD
+        
+        The CV is scored locally against all compiled open-JD profiles
+        (exact and skill-graph matches only); just the `ai_top_n` best JDs
+        that still have unresolved skill pairs get AI similarity detection.
+        CV rows are not updated.
+        
+        Args:
+            cv_id: CV ID
+            min_match_percentage: Minimum match % to return (default 60)
+            ai_top_n: JDs to refine with AI (default MATCH_CV_TO_JD_AI_TOP_N)
+            db: Database session
+        
+        Returns:
+            CVToJDResponse with matched JDs sorted by match %
+        """
+        start_time = time.time()
+        ai_top_n = self.cv_to_jd_ai_top_n if ai_top_n is None else max(0, ai_top_n)
+        
+        try:
+            cv = db.query(CV).filter(CV.cv_id == cv_id).first()
+            if not cv:
+                raise ValueError(f"CV with id {cv_id} not found")
+            
+            self.jd_index.refresh(db, JD)
+            open_jds = [
+                (record, profile) for record, profile in self.jd_index.entries()
+                if self._cv_fits_jd_filters(cv, record)
+            ]
+            logger.info(f"CV-to-JD: CV {cv_id} eligible for {len(open_jds)}/{len(self.jd_index)} open JDs")
+            
+            # Local pass over every open JD (one skill-graph query for all of them)
+            cv_dict = self._build_cv_dict(cv)
+            known_pairs = {}
+            skill_equivalents = {}
+            if self.skill_graph is not None and open_jds:
+                known_pairs = self.skill_graph.load_known_pairs(
+                    frozenset().union(*(profile.all_skills for _, profile in open_jds))
+                )
+                skill_equivalents = SkillSimilarityGraph.similar_skills(known_pairs)
+            
+            scored = []
+            for record, profile in open_jds:
+                result = self.scorer.calculate_total_score(profile, cv_dict, _empty_ai_matches(), skill_equivalents)
+                scored.append([record, profile, result, False])
+            scored.sort(key=lambda item: item[2]['match_percentage'], reverse=True)
+            
+            # AI pass for the best candidates only
+            refine = [
+                item for item in scored[:ai_top_n]
+                if self.scorer.needs_ai_similarity(item[1], cv_dict, known_pairs)
+            ]
+            if refine:
+                logger.info(f"CV-to-JD: refining top {len(refine)} JDs with AI")
+                for item, (result, ai_refined) in zip(refine, self._refine_cv_against_jds(cv, refine)):
+                    item[2] = result
+                    item[3] = ai_refined
+                scored.sort(key=lambda item: item[2]['match_percentage'], reverse=True)
+            
+            matches = [
+                JDMatch(
+                    jd_id=record.id,
+                    jd_title=record.job_title,
+                    jd_company=record.company_name,
+                    match_percentage=result['match_percentage'],
+                    rating=result['rating'],
+                    breakdown=ScoreBreakdown(**result['breakdown']),
+                    matched_skills=result['matched_skills'],
+                    missing_skills=result['missing_skills'],
+                    ai_refined=ai_refined
+                )
+                for record, _, result, ai_refined in scored
+                if result['match_percentage'] >= min_match_percentage
+            ]
+            
+            response = CVToJDResponse(
+                cv_id=cv_id,
+                cv_name=cv.cv_name,
+                total_open_jds=len(open_jds),
+                total_matched_jds=len(matches),
+                ai_refined_jds=sum(1 for item in scored if item[3]),
+                processing_time_seconds=time.time() - start_time,
+                matches=matches
+            )
+            
+            logger.info(f"CV-to-JD matching complete in {response.processing_time_seconds:.2f}s")
+            return response
+            
+        except Exception as e:
+            logger.error(f"CV-to-JD matching failed: {str(e)}", exc_info=True)
+            raise
+    
+    @staticmethod
+    def _cv_fits_jd_filters(cv, jd) -> bool:
+        """Stage 1 experience/budget filters of one JD, applied to one CV"""
+        if jd.op_experience_min is not None and jd.op_experience_max is not None:
+            if cv.cv_experience is None or not (jd.op_experience_min <= cv.cv_experience <= jd.op_experience_max):
+                return False
+        
+        if jd.op_budget_min is not None and jd.op_budget_max is not None:
+            cv_ectc = getattr(cv, 'cv_ectc', None)
+            if cv_ectc is None or not (jd.op_budget_min <= cv_ectc <= jd.op_budget_max):
+                return False
+        
+        return True
+    
+    def _refine_cv_against_jds(self, cv, items: List) -> List[tuple]:
+        """
+        AI-refined scores of one CV against several JDs
+        
+        Stored scores (match store) are reused when the CV and JD are
+        unchanged; the rest run concurrently as single-CV AI batches.
+        
+        Args:
+            cv: CV object
+            items: [JD record, compiled profile, local result, ai_refined] entries
+        
+        Returns:
+            [(score result, ai_refined)] aligned with items
+        """
+        cv_fp = fingerprint(self._build_cv_dict(cv))
+        outcomes = [None] * len(items)
+        pending = []
+        
+        for idx, (record, profile, local_result, _) in enumerate(items):
+            jd_fp = self._jd_fingerprint(record)
+            entry = None
+            if self.match_store is not None:
+                try:
+                    entry = self.match_store.get(record.id, jd_fp, cv.cv_id)
+                except Exception as e:
+                    logger.warning(f"Match store unavailable: {str(e)}")
+            if entry is not None and entry[0] == cv_fp:
+                outcomes[idx] = (entry[1], True)
+            else:
+                pending.append((idx, record, profile, jd_fp))
+        
+        if pending:
+            workers = max(1, min(self.max_concurrent_batches, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="matchmaker-cv2jd") as executor:
+                futures = [
+                    executor.submit(self._process_batch_with_retry, record, [cv], profile)
+                    for _, record, profile, _ in pending
+                ]
+                for (idx, record, _, jd_fp), future in zip(pending, futures):
+                    result = future.result()[0]
+                    ai_refined = not result.get('ai_fallback')
+                    outcomes[idx] = (result, ai_refined)
+                    
+                    if ai_refined and self.match_store is not None:
+                        try:
+                            self.match_store.save(record.id, jd_fp, [(cv.cv_id, cv_fp, result)])
+                        except Exception as e:
+                            logger.warning(f"Match store update failed: {str(e)}")
+        
+        return outcomes
+    
+    def _stage1_candidates(self, jd_id: int, db: Session) -> tuple:
+        """
+        Stage 1 for a matching run: SQL pre-filter, JD compilation, index retrieval
+        
+        Returns:
+            (jd, compiled JD profile, candidate CVs) - a ranked list when the
+            skill index is on, otherwise the lazy Stage 1 stream (consume it
+            with _iter_candidate_chunks)
+        """
+        logger.info(f"Stage 1: Pre-filtering CVs for JD {jd_id}")
+        jd, candidates = self._stage1_prefilter(jd_id, db)
+        
+        # JD skills/exceptions parsed once for every CV in this run
+        profile = self._compile_jd(jd)
+        
+        if self.skill_index is not None:
+            candidates = self._stage1_retrieve_candidates(jd, candidates, profile)
+            if candidates:
+                logger.info(f"Stage 1 complete: {len(candidates)} CVs filtered")
+        return jd, profile, candidates
+    
+    def _iter_candidate_chunks(self, candidates: Iterable) -> Iterator[List]:
+        """Stage 1 candidates in chunks of `db_read_chunk_size` (Stage 2 runs chunk by chunk)"""
+        candidates = iter(candidates)
+        while True:
+            chunk = list(islice(candidates, self.db_read_chunk_size))
+            if not chunk:
+                return
+            yield chunk
+    
     def _stage1_prefilter(self, jd_id: int, db: Session) -> tuple:
         """
         Stage 1: SQL + Python filtering
@@ -146,8 +535,11 @@ class MatchmakerService:
         - cv_experience in range
         - cv_ectc in budget range
         
+        Only the columns matching needs are selected, streamed in chunks of
+        `db_read_chunk_size` rows into compact CandidateRecords.
+        
         Returns:
-            (jd_object, list_of_filtered_cvs)
+            (jd_object, iterator_of_candidate_records)
         """
         # Get JD
         jd = db.query(JD).filter(JD.id == jd_id).first()
@@ -171,45 +563,357 @@ class MatchmakerService:
             filters.append(CV.cv_ectc >= jd.op_budget_min)
             filters.append(CV.cv_ectc <= jd.op_budget_max)
         
-        # Execute query
-        cvs = db.query(CV).filter(and_(*filters)).all()
+        # Stream projected rows (no ORM objects, no large text columns)
+        return jd, iter_candidate_records(db, CV, filters, self.db_read_chunk_size)
+    
+    def _stage1_retrieve_candidates(
+        self,
+        jd,
+        cvs: Iterable[CandidateRecord],
+        profile: Optional[CompiledJDProfile] = None
+    ) -> List[CandidateRecord]:
+        """
+        Stage 1 (retrieval): keep CVs that cover enough JD must-have skills
+        
+        Consumes the Stage 1 stream chunk by chunk, querying the inverted
+        skill index for CVs hitting at least `index_min_hits` of the JD's
+        must-have skills, exactly or via known equivalents (skill graph, plus
+        the JD expansion in jd_expansion mode). Only survivors are kept,
+        ranked by overlap. Index failures never fail matching - from the
+        failing chunk on, CVs are passed through unfiltered.
+        
+        Returns:
+            Candidate CVs, best skill overlap first
+        """
+        profile = profile or self._compile_jd(jd)
+        jd_skills = profile.must_have_skills
+        if not jd_skills or self.index_min_hits <= 0:
+            return list(cvs)
+        
+        min_hits = min(self.index_min_hits, len(jd_skills))
+        skill_equivalents = {}
+        try:
+            if self.skill_graph is not None:
+                known_pairs = self.skill_graph.load_known_pairs(jd_skills)
+                skill_equivalents.update(SkillSimilarityGraph.similar_skills(known_pairs))
+            if self.similarity_mode == 'jd_expansion':
+                for jd_skill, equivalents in (self._get_skill_equivalents(jd) or {}).items():
+                    skill_equivalents[jd_skill] = skill_equivalents.get(jd_skill, frozenset()) | equivalents
+        except Exception as e:
+            logger.warning(f"Skill equivalents unavailable for retrieval, using exact skills: {str(e)}")
         
-        logger.info(f"Stage 1: Found {len(cvs)} CVs matching criteria")
+        ranked = []
+        total = 0
+        index_ok = True
+        cvs = iter(cvs)
+        while True:
+            chunk = list(islice(cvs, self.db_read_chunk_size))
+            if not chunk:
+                break
+            total += len(chunk)
+            
+            if index_ok:
+                try:
+                    self.skill_index.ensure_indexed(chunk)
+                    hits = dict(self.skill_index.query(
+                        jd_skills, skill_equivalents, min_hits, cv_ids=[cv.cv_id for cv in chunk]
+                    ))
+                except Exception as e:
+                    logger.warning(f"Skill index retrieval failed, passing remaining Stage 1 CVs through: {str(e)}")
+                    index_ok = False
+            
+            if index_ok:
+                ranked.extend((hits[cv.cv_id], cv) for cv in chunk if cv.cv_id in hits)
+            else:
+                ranked.extend((0, cv) for cv in chunk)
+        
+        ranked.sort(key=lambda item: (-item[0], item[1].cv_id))
+        
+        logger.info(
+            f"Stage 1: {total} CVs matched criteria, skill index kept {len(ranked)} "
+            f"covering >= {min_hits} of {len(jd_skills)} must-have skills"
+        )
+        return [cv for _, cv in ranked]
+    
+    def _log_stage2_start(self):
+        logger.info(
+            f"Stage 2: AI matching (budget {self.max_prompt_tokens} prompt / "
+            f"{self.max_output_tokens} output tokens, max {self.max_batch_size} CVs per batch, "
+            f"{self.max_concurrent_batches} concurrent batches)"
+        )
+    
+    @staticmethod
+    def _collect_stage2(chunks: Iterator[tuple], count: int) -> List[Dict]:
+        """Gather streamed Stage 2 chunks back into input order"""
+        results = [None] * count
+        for pairs, _, _ in chunks:
+            for idx, result in pairs:
+                results[idx] = result
+        return results
+    
+    def _stage2_incremental(
+        self,
+        jd,
+        cvs: List,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> List[Dict]:
+        """
+        Stage 2 with reuse of stored scores
         
-        return jd, cvs
+        Returns:
+            List of dicts with cv_id, match_percentage, rating, breakdown (input order)
+        """
+        return self._collect_stage2(self._iter_stage2_incremental(jd, cvs, profile), len(cvs))
     
-    def _stage2_ai_matching(self, jd, cvs: List) -> List[Dict]:
+    def _iter_stage2_incremental(
+        self,
+        jd,
+        cvs: List,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> Iterator[tuple]:
         """
-        Stage 2: AI-powered batch matching
+        Stage 2 with reuse of stored scores, streamed like _iter_stage2
+        
+        CVs whose keyword fields (and the JD profile) are unchanged since they
+        were last scored for this JD get their stored score back in the first
+        chunk; only new or changed CVs go through _iter_stage2. Fresh scores
+        are stored chunk by chunk, except fallback scores from failed AI batches.
+        """
+        if self.match_store is None:
+            yield from self._iter_stage2(jd, cvs, profile)
+            return
+        
+        jd_fp = self._jd_fingerprint(jd)
+        try:
+            stored = self.match_store.load(jd.id, jd_fp, [cv.cv_id for cv in cvs])
+        except Exception as e:
+            logger.warning(f"Match store unavailable, scoring all CVs: {str(e)}")
+            yield from self._iter_stage2(jd, cvs, profile)
+            return
+        
+        reused = []
+        stale = []
+        for idx, cv in enumerate(cvs):
+            cv_fp = fingerprint(self._build_cv_dict(cv))
+            entry = stored.get(cv.cv_id)
+            if entry is not None and entry[0] == cv_fp:
+                reused.append((idx, self._attach_cv_metadata(entry[1], cv)))
+            else:
+                stale.append((idx, cv, cv_fp))
         
-        Processes CVs in batches of 10, sends to Gemini for similarity detection
+        logger.info(f"Stage 2: reusing {len(reused)} stored scores, {len(stale)} CVs new or changed")
+        
+        if not stale:
+            yield reused, 0, 0
+            return
+        
+        first = True
+        for pairs, batches_done, total_batches in self._iter_stage2(jd, [cv for _, cv, _ in stale], profile):
+            fresh = [(stale[i], result) for i, result in pairs]
+            try:
+                self.match_store.save(jd.id, jd_fp, [
+                    (cv.cv_id, cv_fp, result)
+                    for (_, cv, cv_fp), result in fresh
+                    if not result.get('ai_fallback')
+                ])
+            except Exception as e:
+                logger.warning(f"Match store update failed: {str(e)}")
+            
+            pairs = [(idx, result) for (idx, _, _), result in fresh]
+            if first:
+                pairs = reused + pairs
+                first = False
+            yield pairs, batches_done, total_batches
+    
+    def _stage2_ai_matching(
+        self,
+        jd,
+        cvs: List,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> List[Dict]:
+        """
+        Stage 2: AI-powered batch matching
         
         Returns:
-            List of dicts with cv_id, match_percentage, rating, breakdown
+            List of dicts with cv_id, match_percentage, rating, breakdown (input order)
+        """
+        return self._collect_stage2(self._iter_stage2(jd, cvs, profile), len(cvs))
+    
+    def _iter_stage2(
+        self,
+        jd,
+        cvs: List,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> Iterator[Tuple[List[Tuple[int, Dict]], int, int]]:
+        """
+        Stage 2 as a stream of scored chunks, in completion order
+        
+        Packs CVs into token-budgeted batches, sends them to Gemini for similarity
+        detection. Up to `max_concurrent_batches` batches are in flight at once
+        (all calls go through the shared rate limiter).
+        
+        In "jd_expansion" mode Gemini is asked once per JD for equivalent skills
+        and every CV is scored locally against that map instead.
+        
+        Yields:
+            (pairs, batches_done, total_batches) - pairs are (input index, score
+            result). The first chunk holds every CV scored without an AI batch
+            (possibly none); each further chunk is one finished AI batch.
         """
-        all_results = []
+        profile = profile or self._compile_jd(jd)
         
-        # Split into batches
-        num_batches = (len(cvs) + self.batch_size - 1) // self.batch_size
+        if self.similarity_mode == 'jd_expansion':
+            skill_equivalents = self._get_skill_equivalents(jd)
+            if skill_equivalents is not None:
+                logger.info(f"Stage 2: scoring {len(cvs)} CVs locally with JD skill expansion")
+                yield list(enumerate(self._score_cvs(profile, cvs, skill_equivalents=skill_equivalents))), 0, 0
+                return
+            logger.warning("JD skill expansion unavailable - falling back to per-batch AI matching")
         
-        for i in range(num_batches):
-            start_idx = i * self.batch_size
-            end_idx = min((i + 1) * self.batch_size, len(cvs))
-            batch = cvs[start_idx:end_idx]
+        # Score CVs whose every candidate skill pair is already known to the graph locally
+        local_pairs = []
+        ai_idx = list(range(len(cvs)))
+        if self.skill_graph is not None:
+            known_pairs = self.skill_graph.load_known_pairs(profile.all_skills)
+            skill_equivalents = SkillSimilarityGraph.similar_skills(known_pairs)
             
-            logger.info(f"Processing batch {i+1}/{num_batches} ({len(batch)} CVs)")
+            ai_idx = []
+            local_idx = []
+            for idx, cv in enumerate(cvs):
+                if self.scorer.needs_ai_similarity(profile, self._build_cv_dict(cv), known_pairs):
+                    ai_idx.append(idx)
+                else:
+                    local_idx.append(idx)
+            
+            local_scores = self._score_cvs(
+                profile, [cvs[idx] for idx in local_idx], skill_equivalents=skill_equivalents
+            )
+            local_pairs = list(zip(local_idx, local_scores))
             
-            # Process batch with retry logic
-            batch_results = self._process_batch_with_retry(jd, batch)
-            all_results.extend(batch_results)
+            logger.info(f"Stage 2: {len(local_pairs)} CVs resolved from skill graph, {len(ai_idx)} need AI")
+        
+        batches = list(self._pack_batches(jd, [cvs[idx] for idx in ai_idx]))
+        self._record_batch_sizes([len(batch) for batch in batches])
+        
+        # Input indices covered by each batch (batches are packed in order)
+        offsets = [0]
+        for batch in batches:
+            offsets.append(offsets[-1] + len(batch))
         
-        return all_results
+        yield local_pairs, 0, len(batches)
+        
+        for done, (batch_no, batch_results) in enumerate(self._run_batches(jd, batches, len(batches), profile), 1):
+            batch_idx = ai_idx[offsets[batch_no]:offsets[batch_no + 1]]
+            yield list(zip(batch_idx, batch_results)), done, len(batches)
     
-    def _process_batch_with_retry(self, jd, batch: List) -> List[Dict]:
+    def _pack_batches(self, jd, cvs: Iterable) -> Iterator[List]:
+        """
+        Greedily pack CVs (in order) into the largest batches that fit the budgets
+        
+        A batch is closed when adding the next CV would exceed the prompt-token
+        budget, the expected-output-token budget or `max_batch_size`. A single
+        CV that alone exceeds a budget still gets its own batch.
+        """
+        base_prompt_tokens = estimate_tokens(self._build_ai_prompt(jd, []))
+        jd_skill_tokens = estimate_tokens(
+            f"{jd.must_have_skills or ''} {jd.good_to_have_skills or ''} {jd.soft_skills or ''}"
+        )
+        
+        batch = []
+        prompt_tokens = base_prompt_tokens
+        output_tokens = 0
+        
+        for cv in cvs:
+            cv_prompt_tokens = estimate_tokens(self._format_cv_block(cv))
+            # The response echoes matched skills: at most the JD skills, at most the CV skills (x2 for "a~b" pairs)
+            cv_output_tokens = self.OUTPUT_TOKENS_PER_CV + 2 * min(jd_skill_tokens, cv_prompt_tokens)
+            
+            if batch and (
+                len(batch) >= self.max_batch_size
+                or prompt_tokens + cv_prompt_tokens > self.max_prompt_tokens
+                or output_tokens + cv_output_tokens > self.max_output_tokens
+            ):
+                yield batch
+                batch = []
+                prompt_tokens = base_prompt_tokens
+                output_tokens = 0
+            
+            batch.append(cv)
+            prompt_tokens += cv_prompt_tokens
+            output_tokens += cv_output_tokens
+        
+        if batch:
+            yield batch
+    
+    def _record_batch_sizes(self, sizes: List[int]):
+        """Log this run's batch-size distribution and add it to the cumulative metrics"""
+        if not sizes:
+            return
+        
+        with self._metrics_lock:
+            self._batch_size_histogram.update(sizes)
+            self._batches_total += len(sizes)
+        
+        logger.info(
+            f"Stage 2 batch sizes: {len(sizes)} batches, {sum(sizes)} CVs "
+            f"(min {min(sizes)}, median {statistics.median(sizes):g}, "
+            f"mean {statistics.mean(sizes):.1f}, max {max(sizes)})"
+        )
+    
+    def _run_batches(
+        self,
+        jd,
+        batches: Iterable[List],
+        num_batches: Optional[int] = None,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Run batches on a bounded thread pool, yielding results as batches finish
+        
+        At most 2x `max_concurrent_batches` batches are submitted ahead of the
+        consumer, so a lazily produced batch stream is never fully buffered.
+        
+        Yields:
+            (batch number, batch results) in completion order
+        """
+        profile = profile or self._compile_jd(jd)
+        total = num_batches if num_batches is not None else '?'
+        workers = self.max_concurrent_batches
+        if num_batches is not None:
+            workers = max(1, min(workers, num_batches))
+        
+        if workers == 1:
+            for i, batch in enumerate(batches):
+                logger.info(f"Processing batch {i+1}/{total} ({len(batch)} CVs)")
+                yield i, self._process_batch_with_retry(jd, batch, profile)
+            return
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="matchmaker-batch") as executor:
+            pending = {}
+            for i, batch in enumerate(batches):
+                logger.info(f"Dispatching batch {i+1}/{total} ({len(batch)} CVs)")
+                pending[executor.submit(self._process_batch_with_retry, jd, batch, profile)] = i
+                
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+    
+    def _process_batch_with_retry(
+        self,
+        jd,
+        batch: List,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> List[Dict]:
         """Process a batch of CVs with retry logic"""
         for attempt in range(self.max_retries):
             try:
-                return self._process_batch(jd, batch)
+                return self._process_batch(jd, batch, profile)
             except Exception as e:
                 logger.warning(f"Batch processing attempt {attempt + 1} failed: {str(e)}")
                 if attempt < self.max_retries - 1:
@@ -217,9 +921,14 @@ class MatchmakerService:
                 else:
                     logger.error(f"Batch processing failed after {self.max_retries} attempts")
                     # Return zero scores for this batch as fallback
-                    return self._fallback_scoring(jd, batch)
+                    return self._fallback_scoring(jd, batch, profile)
     
-    def _process_batch(self, jd, batch: List) -> List[Dict]:
+    def _process_batch(
+        self,
+        jd,
+        batch: List,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> List[Dict]:
         """
         Process a batch of CVs through AI
         
@@ -229,7 +938,8 @@ class MatchmakerService:
         # Build prompt
         prompt = self._build_ai_prompt(jd, batch)
         
-        # Call Gemini API
+        # Call Gemini API (shared RPM/TPM limiter across threads and workers)
+        self.rate_limiter.acquire(estimate_tokens(prompt))
         logger.debug("Sending batch to Gemini API")
         response = self.model.generate_content(prompt)
         
@@ -237,55 +947,230 @@ class MatchmakerService:
         ai_response = self._parse_ai_response(response.text)
         
         # Calculate scores using Python scoring algorithm
-        results = []
+        profile = profile or self._compile_jd(jd)
+        matches_by_cv = {}
+        for m in ai_response['matches']:
+            matches_by_cv.setdefault(m.get('cv_id'), m)
+        
+        ai_matches_list = []
+        answered = []
         for cv in batch:
             # Find AI matches for this CV
-            ai_matches = next(
-                (m for m in ai_response['matches'] if m['cv_id'] == cv.cv_id),
-                {'must_have_matches': [], 'must_have_similar': [], 
-                 'good_to_have_matches': [], 'good_to_have_similar': [],
-                 'soft_skills_matches': [], 'soft_skills_similar': []}
-            )
-            
-            # Calculate score
-            jd_dict = {
-                'must_have_skills': jd.must_have_skills,
-                'good_to_have_skills': jd.good_to_have_skills,
-                'soft_skills': jd.soft_skills,
-                'domain_expertise': getattr(jd, 'domain_expertise', None),
-                'exception_skills': jd.exception_skills,
-                'exception_list': getattr(jd, 'exception_list', None),
-                'op_experience_min': jd.op_experience_min,
-                'op_experience_max': jd.op_experience_max
-            }
-            
-            cv_dict = {
-                'cv_must_to_have': cv.cv_must_to_have,
-                'cv_good_to_have': cv.cv_good_to_have,
-                'cv_soft_skills': cv.cv_soft_skills,
-                'cv_domain_expertise': getattr(cv, 'cv_domain_expertise', None),
-                'cv_accolades': getattr(cv, 'cv_accolades', None),
-                'cv_experience': cv.cv_experience,
-                'cv_current_company': cv.cv_current_company
-            }
-            
-            score_result = self.scorer.calculate_total_score(
-                jd_dict, cv_dict, ai_matches
-            )
-            
-            # Add CV metadata
-            score_result['cv_id'] = cv.cv_id
-            score_result['cv_name'] = cv.cv_name
-            score_result['cv_email'] = cv.cv_email
-            score_result['cv_mobile'] = cv.cv_mobile
-            score_result['cv_experience'] = cv.cv_experience
-            score_result['cv_current_company'] = cv.cv_current_company
-            score_result['cv_role'] = cv.cv_role
-            
-            results.append(score_result)
+            ai_matches = matches_by_cv.get(cv.cv_id)
+            if ai_matches is None:
+                ai_matches = _empty_ai_matches()
+            else:
+                answered.append((cv, ai_matches))
+            ai_matches_list.append(ai_matches)
+        
+        results = self._score_cvs(profile, batch, ai_matches_list)
+        
+        if self.skill_graph is not None and answered:
+            self._learn_similarity(profile, answered)
         
         return results
     
+    def _learn_similarity(self, profile: CompiledJDProfile, answered: List[tuple]):
+        """
+        Feed AI verdicts into the skill graph
+        
+        Every candidate pair the AI saw counts as an observation; pairs it
+        reported in *_similar ("Flask~Django") also count as similar.
+        Failures are logged only - learning must never fail a batch.
+        """
+        try:
+            observations = []
+            for cv, ai_matches in answered:
+                candidate_pairs = self.scorer.candidate_similarity_pairs(profile, self._build_cv_dict(cv))
+                for similar_key, pairs in candidate_pairs.items():
+                    reported = set()
+                    for similar in ai_matches.get(similar_key) or []:
+                        if '~' in str(similar):
+                            cv_skill, jd_skill = str(similar).split('~', 1)
+                            reported.add((canonicalize_skill(cv_skill), canonicalize_skill(jd_skill)))
+                    
+                    observations.extend((c, j, (c, j) in reported) for c, j in pairs)
+                    observations.extend((c, j, True) for c, j in reported.difference(pairs))
+            
+            edges = self.skill_graph.record_observations(observations)
+            logger.debug(f"Skill graph: recorded {len(observations)} observations on {edges} edges")
+        except Exception as e:
+            logger.warning(f"Skill graph update failed: {str(e)}")
+    
+    @staticmethod
+    def _build_jd_dict(jd) -> Dict:
+        """JD fields used by the scorer"""
+        return {
+            'must_have_skills': jd.must_have_skills,
+            'good_to_have_skills': jd.good_to_have_skills,
+            'soft_skills': jd.soft_skills,
+            'domain_expertise': getattr(jd, 'domain_expertise', None),
+            'exception_skills': jd.exception_skills,
+            'exception_list': getattr(jd, 'exception_list', None),
+            'op_experience_min': jd.op_experience_min,
+            'op_experience_max': jd.op_experience_max
+        }
+    
+    def _jd_fingerprint(self, jd) -> str:
+        """
+        Fingerprint of everything a stored JD-CV score depends on (JD side)
+        
+        Besides the JD fields this covers the scoring rules, the alias table
+        and, when the skill graph is on, its generation: a change to any of
+        them re-scores the stored CVs instead of serving stale results.
+        """
+        return fingerprint({
+            'jd': self._build_jd_dict(jd),
+            'similarity_mode': self.similarity_mode,
+            'scoring_version': SCORING_VERSION,
+            'taxonomy_version': taxonomy_version(),
+            'skill_graph_generation': self.skill_graph.generation if self.skill_graph is not None else None
+        })
+    
+    def _compile_jd(self, jd) -> CompiledJDProfile:
+        """Compile a JD once for scoring many CVs"""
+        return self.scorer.compile_jd(self._build_jd_dict(jd))
+    
+    @staticmethod
+    def _build_cv_dict(cv) -> Dict:
+        """CV fields used by the scorer"""
+        return {
+            'cv_must_to_have': cv.cv_must_to_have,
+            'cv_good_to_have': cv.cv_good_to_have,
+            'cv_soft_skills': cv.cv_soft_skills,
+            'cv_domain_expertise': getattr(cv, 'cv_domain_expertise', None),
+            'cv_accolades': getattr(cv, 'cv_accolades', None),
+            'cv_experience': cv.cv_experience,
+            'cv_current_company': cv.cv_current_company
+        }
+    
+    def _score_cvs(
+        self,
+        profile: CompiledJDProfile,
+        cvs: List,
+        ai_matches_list: Optional[List[Dict]] = None,
+        skill_equivalents: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Score many CVs in one vectorized pass and attach their metadata"""
+        score_results = self.scorer.calculate_total_scores(
+            profile, [self._build_cv_dict(cv) for cv in cvs], ai_matches_list, skill_equivalents
+        )
+        return [self._attach_cv_metadata(score_result, cv) for score_result, cv in zip(score_results, cvs)]
+    
+    @staticmethod
+    def _attach_cv_metadata(score_result: Dict, cv) -> Dict:
+        """Add CV metadata to a score result"""
+        score_result['cv_id'] = cv.cv_id
+        score_result['cv_name'] = cv.cv_name
+        score_result['cv_email'] = cv.cv_email
+        score_result['cv_mobile'] = cv.cv_mobile
+        score_result['cv_experience'] = cv.cv_experience
+        score_result['cv_current_company'] = cv.cv_current_company
+        score_result['cv_role'] = cv.cv_role
+        
+        return score_result
+    
+    def _get_skill_equivalents(self, jd) -> Optional[Dict[str, frozenset]]:
+        """
+        Get the JD skill -> equivalent skills map (one Gemini call per JD)
+        
+        Cached in memory by the JD's skill text, so re-running a JD (or another
+        JD with identical requirements) costs no API call.
+        
+        Returns:
+            Equivalence map, or None if Gemini failed after all retries
+        """
+        cache_key = hashlib.sha256(
+            json.dumps([jd.must_have_skills, jd.good_to_have_skills, jd.soft_skills]).encode('utf-8')
+        ).hexdigest()
+        
+        with self._expansion_lock:
+            if cache_key in self._expansion_cache:
+                self._expansion_cache.move_to_end(cache_key)
+                logger.info("Using cached JD skill expansion")
+                return self._expansion_cache[cache_key]
+        
+        prompt = self._build_expansion_prompt(jd)
+        
+        for attempt in range(self.max_retries):
+            try:
+                self.rate_limiter.acquire(estimate_tokens(prompt))
+                logger.info("Requesting JD skill expansion from Gemini")
+                response = self.model.generate_content(prompt)
+                data = self._parse_ai_response(response.text)
+                skill_equivalents = self._normalize_equivalents(data.get('equivalents', {}))
+                break
+            except Exception as e:
+                logger.warning(f"Skill expansion attempt {attempt + 1} failed: {str(e)}")
+                if attempt < self.max_retries - 1:
+                    time.sleep(2 ** attempt)  # Exponential backoff
+                else:
+                    logger.error(f"Skill expansion failed after {self.max_retries} attempts")
+                    return None
+        
+        with self._expansion_lock:
+            self._expansion_cache[cache_key] = skill_equivalents
+            while len(self._expansion_cache) > self._expansion_cache_size:
+                self._expansion_cache.popitem(last=False)
+        
+        logger.info(f"JD skill expansion: {sum(len(v) for v in skill_equivalents.values())} equivalents "
+                    f"for {len(skill_equivalents)} JD skills")
+        return skill_equivalents
+    
+    def _normalize_equivalents(self, raw: Dict) -> Dict[str, frozenset]:
+        """Normalize AI equivalence output to canonical skill -> frozenset"""
+        skill_equivalents = {}
+        if not isinstance(raw, dict):
+            return skill_equivalents
+        
+        for jd_skill, equivalents in raw.items():
+            key = canonicalize_skill(str(jd_skill))
+            if isinstance(equivalents, str):
+                equivalents = equivalents.split(',')
+            values = frozenset(
+                canonicalize_skill(str(e)) for e in (equivalents or [])
+            ).difference({'', key})
+            if key and values:
+                skill_equivalents[key] = values
+        
+        return skill_equivalents
+    
+    def _build_expansion_prompt(self, jd) -> str:
+        """
+        Build the one-per-JD skill expansion prompt
+        
+        Asks for technically equivalent/substitutable skills for every JD skill,
+        so similar matches can be resolved locally for any number of CVs.
+        """
+        return f"""You are a technical recruiter preparing to screen CVs for a job.
+
+JOB REQUIREMENTS:
+Must-Have Skills: {jd.must_have_skills or 'None'}
+Good-to-Have Skills: {jd.good_to_have_skills or 'None'}
+Soft Skills: {jd.soft_skills or 'None'}
+
+TASK:
+For EACH skill above, list skills a candidate could have instead that are
+technically equivalent or directly transferable (e.g., django -> flask, fastapi;
+postgresql -> mysql; react -> vue, angular).
+
+IMPORTANT:
+- Only list TECHNICAL equivalents (for soft skills, close synonyms only)
+- Use lowercase, hyphenate multi-word skills (e.g., "aws-lambda")
+- Use the JD skill exactly as written (lowercase) as the key
+- Use an empty list where there is no real equivalent
+- Return ONLY valid JSON, no markdown, no comments
+
+OUTPUT FORMAT (STRICT JSON):
+{{
+  "equivalents": {{
+    "django": ["flask", "fastapi"],
+    "postgresql": ["mysql", "mariadb"],
+    "leadership": ["team-leadership", "people-management"]
+  }}
+}}
+"""
+    
     def _build_ai_prompt(self, jd, batch: List) -> str:
         """
         Build prompt for Gemini API
@@ -305,13 +1190,8 @@ Soft Skills: {jd.soft_skills or 'None'}
 CVs TO MATCH ({len(batch)} candidates):
 """
         
-        for i, cv in enumerate(batch, 1):
-            prompt += f"""
-[CV-{cv.cv_id}]
-Must-Have: {cv.cv_must_to_have or 'None'}
-Good-to-Have: {cv.cv_good_to_have or 'None'}
-Soft Skills: {cv.cv_soft_skills or 'None'}
-"""
+        for cv in batch:
+            prompt += self._format_cv_block(cv)
         
         prompt += """
 
@@ -343,6 +1223,16 @@ OUTPUT FORMAT (STRICT JSON):
         
         return prompt
     
+    @staticmethod
+    def _format_cv_block(cv) -> str:
+        """Prompt block for one CV (also used for token estimation)"""
+        return f"""
+[CV-{cv.cv_id}]
+Must-Have: {cv.cv_must_to_have or 'None'}
+Good-to-Have: {cv.cv_good_to_have or 'None'}
+Soft Skills: {cv.cv_soft_skills or 'None'}
+"""
+    
     def _parse_ai_response(self, response_text: str) -> Dict:
         """Parse Gemini API response as JSON"""
         try:
@@ -365,63 +1255,47 @@ OUTPUT FORMAT (STRICT JSON):
             logger.error(f"Response text: {response_text[:500]}")
             raise ValueError("AI returned invalid JSON")
     
-    def _fallback_scoring(self, jd, batch: List) -> List[Dict]:
+    def _fallback_scoring(
+        self,
+        jd,
+        batch: List,
+        profile: Optional[CompiledJDProfile] = None
+    ) -> List[Dict]:
         """
         Fallback scoring if AI fails
         Uses exact string matching only (no AI similarity detection)
         """
         logger.warning("Using fallback scoring without AI similarity detection")
         
-        results = []
-        for cv in batch:
-            jd_dict = {
-                'must_have_skills': jd.must_have_skills,
-                'good_to_have_skills': jd.good_to_have_skills,
-                'soft_skills': jd.soft_skills,
-                'domain_expertise': getattr(jd, 'domain_expertise', None),
-                'exception_skills': jd.exception_skills,
-                'exception_list': getattr(jd, 'exception_list', None),
-                'op_experience_min': jd.op_experience_min,
-                'op_experience_max': jd.op_experience_max
-            }
-            
-            cv_dict = {
-                'cv_must_to_have': cv.cv_must_to_have,
-                'cv_good_to_have': cv.cv_good_to_have,
-                'cv_soft_skills': cv.cv_soft_skills,
-                'cv_domain_expertise': getattr(cv, 'cv_domain_expertise', None),
-                'cv_accolades': getattr(cv, 'cv_accolades', None),
-                'cv_experience': cv.cv_experience,
-                'cv_current_company': cv.cv_current_company
-            }
-            
-            # No AI matches, only exact matching
-            ai_matches = {
-                'must_have_matches': [],
-                'must_have_similar': [],
-                'good_to_have_matches': [],
-                'good_to_have_similar': [],
-                'soft_skills_matches': [],
-                'soft_skills_similar': []
-            }
-            
-            score_result = self.scorer.calculate_total_score(
-                jd_dict, cv_dict, ai_matches
-            )
-            
-            score_result['cv_id'] = cv.cv_id
-            score_result['cv_name'] = cv.cv_name
-            score_result['cv_email'] = cv.cv_email
-            score_result['cv_mobile'] = cv.cv_mobile
-            score_result['cv_experience'] = cv.cv_experience
-            score_result['cv_current_company'] = cv.cv_current_company
-            score_result['cv_role'] = cv.cv_role
-            
-            results.append(score_result)
-        
+        # No AI matches, only exact matching (flagged so degraded scores are not stored)
+        results = self._score_cvs(profile or self._compile_jd(jd), batch)
+        for result in results:
+            result['ai_fallback'] = True
         return results
     
-    def _stage3_update_cvs(self, match_results: List[Dict], jd_id: int, db: Session):
+    @staticmethod
+    def _select_page(
+        matches: List[Dict],
+        top_k: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        One page of matches ranked by match % (descending, ties in input order)
+        
+        With a `top_k` or `limit`, only the first offset + limit (at most
+        top_k) matches are selected with a heap instead of sorting them all.
+        """
+        end = None if limit is None else offset + limit
+        if top_k is not None:
+            end = top_k if end is None else min(end, top_k)
+        
+        key = lambda m: m['match_percentage']
+        if end is None:
+            return sorted(matches, key=key, reverse=True)[offset:]
+        return heapq.nlargest(end, matches, key=key)[offset:]
+    
+    def _stage3_update_cvs(self, match_results: List[Dict], jd, db: Session) -> int:
         """
         Stage 3: Update CV table with match results
         
@@ -430,23 +1304,58 @@ OUTPUT FORMAT (STRICT JSON):
         - cv_match_perc
         - cv_rating
         - date_of_match
+        
+        Uses the JD loaded in Stage 1 and one executemany UPDATE per chunk of
+        `db_write_chunk_size` rows (no per-CV SELECT), committed once.
+        
+        Returns:
+            Number of rows written
         """
         from datetime import datetime
         
-        # Get JD title for updating matched_jd_title
-        jd = db.query(JD).filter(JD.id == jd_id).first()
-        jd_title = jd.job_title if jd else f"JD-{jd_id}"
-        
-        for result in match_results:
-            cv = db.query(CV).filter(CV.cv_id == result['cv_id']).first()
-            if cv:
-                cv.matched_jd_title = jd_title
-                cv.cv_match_perc = result['match_percentage']
-                cv.cv_rating = result['rating']
-                cv.date_of_match = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        db.commit()
-        logger.info(f"Updated {len(match_results)} CVs in database")
+        if not match_results:
+            logger.info("Stage 3 complete: no CVs to update")
+            return 0
+        
+        start_time = time.time()
+        jd_title = jd.job_title if jd.job_title else f"JD-{jd.id}"
+        matched_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        stmt = (
+            update(CV.__table__)
+            .where(CV.cv_id == bindparam('b_cv_id'))
+            .values({
+                CV.matched_jd_title: jd_title,
+                CV.cv_match_perc: bindparam('b_match_perc'),
+                CV.cv_rating: bindparam('b_rating'),
+                CV.date_of_match: matched_at
+            })
+        )
+        
+        rows_written = 0
+        try:
+            for offset in range(0, len(match_results), self.db_write_chunk_size):
+                chunk = match_results[offset:offset + self.db_write_chunk_size]
+                result = db.execute(stmt, [
+                    {
+                        'b_cv_id': m['cv_id'],
+                        'b_match_perc': m['match_percentage'],
+                        'b_rating': m['rating']
+                    }
+                    for m in chunk
+                ])
+                # Some drivers cannot report executemany row counts (-1)
+                rows_written += result.rowcount if result.rowcount >= 0 else len(chunk)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        logger.info(
+            f"Stage 3 complete: updated {rows_written} CVs in "
+            f"{time.time() - start_time:.3f}s (chunks of {self.db_write_chunk_size})"
+        )
+        return rows_written
     
     def _build_cv_match(self, result: Dict) -> CVMatch:
         """Convert dict result to CVMatch schema"""
@@ -0,0 +1,187 @@
+"""
+Skill Similarity Graph
+Persistent (SQLite) record of CV-skill ~ JD-skill similarity learned from AI match results
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SkillSimilarityGraph:
+    """
+    Weighted graph of (cv_skill, jd_skill) edges.
+
+    Every time Gemini evaluates a CV skill against a JD skill the CV lacks,
+    the edge's `observed` count goes up; if Gemini called them similar
+    ("Flask~Django"), `similar` goes up too. confidence = similar / observed.
+
+    An edge observed at least `min_observations` times is "known": the scorer
+    can decide it without the LLM (similar if confidence >= min_confidence).
+    `generation` goes up whenever an edge becomes known or its verdict flips,
+    so scores computed with the graph can be tied to the state they saw.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        min_observations: int = 3,
+        min_confidence: float = 0.6
+    ):
+        """
+        Initialize the graph
+
+        Args:
+            path: SQLite file path
+            min_observations: Observations needed before an edge is trusted
+            min_confidence: Similar/observed ratio for a known edge to count as similar
+        """
+        self.path = path
+        self.min_observations = min_observations
+        self.min_confidence = min_confidence
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS skill_pairs (
+                cv_skill TEXT NOT NULL,
+                jd_skill TEXT NOT NULL,
+                observed INTEGER NOT NULL DEFAULT 0,
+                similar INTEGER NOT NULL DEFAULT 0,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (jd_skill, cv_skill)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS graph_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )"""
+        )
+        self._conn.execute("INSERT OR IGNORE INTO graph_meta (key, value) VALUES ('generation', 0)")
+        self._conn.commit()
+
+    def _verdict(self, observed: int, similar: int) -> Optional[bool]:
+        """Known verdict of an edge (True/False), or None while it has too few observations"""
+        if observed < self.min_observations:
+            return None
+        return similar / observed >= self.min_confidence
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped whenever the set of known verdicts changes"""
+        with self._lock:
+            return self._conn.execute("SELECT value FROM graph_meta WHERE key = 'generation'").fetchone()[0]
+
+    def record_observations(self, observations: Iterable[Tuple[str, str, bool]]) -> int:
+        """
+        Add AI verdicts to the graph
+
+        Args:
+            observations: (cv_skill, jd_skill, is_similar) tuples
+
+        Returns:
+            Number of distinct edges updated
+        """
+        counts = defaultdict(lambda: [0, 0])
+        for cv_skill, jd_skill, is_similar in observations:
+            if not cv_skill or not jd_skill or cv_skill == jd_skill:
+                continue
+            edge = counts[(cv_skill, jd_skill)]
+            edge[0] += 1
+            edge[1] += 1 if is_similar else 0
+
+        if not counts:
+            return 0
+
+        now = time.time()
+        with self._lock:
+            changed = False
+            for (cv, jd), (obs, sim) in counts.items():
+                row = self._conn.execute(
+                    "SELECT observed, similar FROM skill_pairs WHERE jd_skill = ? AND cv_skill = ?", (jd, cv)
+                ).fetchone()
+                before = row or (0, 0)
+                if self._verdict(*before) != self._verdict(before[0] + obs, before[1] + sim):
+                    changed = True
+                    break
+
+            self._conn.executemany(
+                """INSERT INTO skill_pairs (cv_skill, jd_skill, observed, similar, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (jd_skill, cv_skill) DO UPDATE SET
+                    observed = observed + excluded.observed,
+                    similar = similar + excluded.similar,
+                    last_seen = excluded.last_seen""",
+                [(cv, jd, obs, sim, now) for (cv, jd), (obs, sim) in counts.items()]
+            )
+            if changed:
+                self._conn.execute("UPDATE graph_meta SET value = value + 1 WHERE key = 'generation'")
+            self._conn.commit()
+
+        return len(counts)
+
+    def load_known_pairs(self, jd_skills: Iterable[str]) -> Dict[str, Dict[str, bool]]:
+        """
+        Load every known edge for a JD's skills (one query per matching run)
+
+        Returns:
+            {jd_skill: {cv_skill: is_similar}} for edges with enough observations
+        """
+        jd_skills = sorted(set(s for s in jd_skills if s))
+        known = {}
+        if not jd_skills:
+            return known
+
+        placeholders = ",".join("?" * len(jd_skills))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT jd_skill, cv_skill, observed, similar FROM skill_pairs
+                WHERE jd_skill IN ({placeholders}) AND observed >= ?""",
+                (*jd_skills, self.min_observations)
+            ).fetchall()
+
+        for jd_skill, cv_skill, observed, similar in rows:
+            known.setdefault(jd_skill, {})[cv_skill] = self._verdict(observed, similar)
+
+        return known
+
+    @staticmethod
+    def similar_skills(known_pairs: Dict[str, Dict[str, bool]]) -> Dict[str, frozenset]:
+        """Known-similar edges as a scorer skill_equivalents map"""
+        equivalents = {}
+        for jd_skill, edges in known_pairs.items():
+            similar = frozenset(cv_skill for cv_skill, is_similar in edges.items() if is_similar)
+            if similar:
+                equivalents[jd_skill] = similar
+        return equivalents
+
+    def get_stats(self) -> Dict:
+        """Edge counts for monitoring"""
+        with self._lock:
+            total, known, similar = self._conn.execute(
+                """SELECT COUNT(*),
+                    COALESCE(SUM(observed >= ?), 0),
+                    COALESCE(SUM(observed >= ? AND similar * 1.0 / observed >= ?), 0)
+                FROM skill_pairs""",
+                (self.min_observations, self.min_observations, self.min_confidence)
+            ).fetchone()
+        return {
+            "edges": total,
+            "known_edges": known,
+            "known_similar_edges": similar,
+            "generation": self.generation,
+            "min_observations": self.min_observations,
+            "min_confidence": self.min_confidence
+        }
@@ -1,38 +1,267 @@
 """
 File Text Extraction Utilities
-Supports: PDF (.pdf), Word (.docx, .doc)
+Supports: PDF (.pdf), Word (.docx)
 """
 
 import fitz  # PyMuPDF
-import docx
-from typing import Optional
+import re
+import tempfile
+import threading
+import multiprocessing
+import zipfile
+import xml.etree.ElementTree as ET
+from io import BytesIO
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import BinaryIO, Iterator, List, Optional, Union
 import os
 
+# Import config from parent directory
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# A file path, the file's bytes, or a readable binary file object
+FileSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+# Lines at the top/bottom of a page checked for repeated headers/footers
+_EDGE_LINES = 3
+# Digits are ignored when comparing header/footer lines ("Page 2 of 5")
+_DIGITS = re.compile(r"\d+")
+
+# Shared pool for parallel PDF page extraction (created on first use). Processes
+# that are themselves pool workers extract serially instead of nesting pools.
+# Workers are started from a clean process (forkserver/spawn), never forked from
+# a server that may already be running threads holding locks.
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+_parallel_pages_allowed = True
+
+# WordprocessingML tags read by the streaming DOCX extractor
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+_W_TBL, _W_TR, _W_TC = _W + "tbl", _W + "tr", _W + "tc"
+# Legacy (VML) copy of text boxes/shapes, duplicating the mc:Choice content
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+
+def disable_parallel_pages():
+    """Extract PDF pages serially in this process (initializer for worker pools)"""
+    global _parallel_pages_allowed
+    _parallel_pages_allowed = False
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Shared page-extraction pool (PDF_PARALLEL_WORKERS processes)"""
+    global _page_pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                start_methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in start_methods else "spawn")
+                _page_pool = ProcessPoolExecutor(
+                    max_workers=max(1, config.PDF_PARALLEL_WORKERS),
+                    mp_context=context,
+                    initializer=disable_parallel_pages
+                )
+    return _page_pool
+
+
+def _open_pdf(source: Union[str, bytes]) -> fitz.Document:
+    """Open a PDF from a path or its bytes"""
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _pdf_page_texts(source: Union[str, bytes], start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) - module level so worker processes can run it"""
+    doc = _open_pdf(source)
+    try:
+        return [doc[i].get_text() for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def strip_repeated_edges(pages: List[str], min_pages: int = 3) -> List[str]:
+    """
+    Remove headers/footers repeated across pages.
+
+    A line among the first/last few lines of a page counts as a header or
+    footer when it appears there on more than half of the pages (digits
+    ignored, so page numbers match). The first page keeps its copy, since a
+    repeated header usually carries the candidate's name.
+    """
+    if len(pages) < min_pages:
+        return pages
+    
+    def edge_keys(lines: List[str]) -> set:
+        content = [line.strip() for line in lines if line.strip()]
+        edges = content[:_EDGE_LINES] + content[-_EDGE_LINES:]
+        return {_DIGITS.sub("#", line.lower()) for line in edges}
+    
+    page_lines = [page.splitlines() for page in pages]
+    counts = Counter()
+    for lines in page_lines:
+        counts.update(edge_keys(lines))
+    
+    repeated = {key for key, count in counts.items() if count > len(pages) / 2}
+    if not repeated:
+        return pages
+    
+    cleaned = [pages[0]]
+    for lines in page_lines[1:]:
+        content_idx = [i for i, line in enumerate(lines) if line.strip()]
+        edge_idx = set(content_idx[:_EDGE_LINES] + content_idx[-_EDGE_LINES:])
+        cleaned.append("\n".join(
+            line for i, line in enumerate(lines)
+            if i not in edge_idx or _DIGITS.sub("#", line.strip().lower()) not in repeated
+        ))
+    return cleaned
+
+
+def iter_docx_blocks(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """
+    Stream the text blocks of a DOCX body in document order.
+
+    Iterparses word/document.xml straight from the zip instead of building
+    the python-docx object model. Yields one block per non-empty paragraph
+    and one per table row ("cell | cell | ..."), so skills laid out in tables
+    are kept; paragraphs inside a cell are joined with spaces. Duplicate
+    legacy copies of text boxes (mc:Fallback) are skipped.
+
+    Args:
+        source: Path to DOCX file or a seekable binary file object
+    """
+    with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as xml:
+        paragraphs: List[List[str]] = []   # open paragraphs (text boxes nest them)
+        rows: List[List[str]] = []         # open table rows (tables nest)
+        cells: List[List[str]] = []        # paragraphs of the open table cells
+        fallback_depth = 0
+        
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if tag == _MC_FALLBACK:
+                fallback_depth += 1 if event == "start" else -1
+                continue
+            if fallback_depth:
+                continue
+            
+            if event == "start":
+                if tag == _W_P:
+                    paragraphs.append([])
+                elif tag == _W_TR:
+                    rows.append([])
+                elif tag == _W_TC:
+                    cells.append([])
+                continue
+            
+            if tag == _W_T:
+                if paragraphs and elem.text:
+                    paragraphs[-1].append(elem.text)
+            elif tag == _W_TAB:
+                if paragraphs:
+                    paragraphs[-1].append("\t")
+            elif tag in (_W_BR, _W_CR):
+                if paragraphs:
+                    paragraphs[-1].append("\n")
+            elif tag == _W_P:
+                text = "".join(paragraphs.pop()).strip()
+                elem.clear()
+                if not text:
+                    continue
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif tag == _W_TC:
+                text = " ".join(cells.pop())
+                if rows and text:
+                    rows[-1].append(text)
+            elif tag == _W_TR:
+                row = rows.pop()
+                if not row:
+                    continue
+                text = " | ".join(row)
+                if cells:
+                    cells[-1].append(text)  # nested table row inside an outer cell
+                else:
+                    yield text
+            elif tag == _W_TBL:
+                elem.clear()
+
+
 class FileTextExtractor:
-    """Extract text from various file formats"""
+    """Extract text from various file formats (paths or in-memory content)"""
     
     @staticmethod
-    def extract_from_pdf(file_path: str) -> Optional[str]:
+    def _read_bytes(source: FileSource) -> Union[bytes, bytearray, memoryview]:
+        """In-memory content of a bytes or file-like source"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return source
+        return source.read()
+    
+    @staticmethod
+    def extract_from_pdf(
+        source: FileSource,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        parallel_min_pages: Optional[int] = None
+    ) -> Optional[str]:
         """
         Extract text from PDF file using PyMuPDF.
         
+        Reads at most `max_pages` pages and keeps at most `max_chars`
+        characters (a CV's skills are on its first pages, not in a 60-page
+        portfolio appendix). Documents with at least `parallel_min_pages`
+        pages are split into page ranges on a shared pool of
+        PDF_PARALLEL_WORKERS processes (serially inside pool workers, see
+        disable_parallel_pages); no further ranges are submitted once
+        `max_chars` is reached.
+        Headers and footers repeated on every page are removed.
+        
         Args:
-            file_path: Path to PDF file
+            source: Path to PDF file, PDF bytes or binary file object
+            max_pages: Page ceiling (default PDF_MAX_PAGES, 0 = all)
+            max_chars: Character ceiling (default PDF_MAX_CHARS, 0 = unlimited)
+            parallel_min_pages: Page count from which to extract in parallel
+                (default PDF_PARALLEL_MIN_PAGES, 0 = never)
         
         Returns:
             Extracted text or None if failed
         """
+        max_pages = config.PDF_MAX_PAGES if max_pages is None else max_pages
+        max_chars = config.PDF_MAX_CHARS if max_chars is None else max_chars
+        parallel_min_pages = config.PDF_PARALLEL_MIN_PAGES if parallel_min_pages is None else parallel_min_pages
+        
         try:
-            doc = fitz.open(file_path)
+            if not isinstance(source, str):
+                source = bytes(FileTextExtractor._read_bytes(source))
+            
             text_parts = []
+            doc = _open_pdf(source)
+            try:
+                total_pages = doc.page_count
+                page_count = min(total_pages, max_pages) if max_pages else total_pages
+                parallel = _parallel_pages_allowed and bool(parallel_min_pages) and page_count >= parallel_min_pages
+                
+                chars = 0
+                for i in range(0 if parallel else page_count):
+                    text_parts.append(doc[i].get_text())
+                    chars += len(text_parts[-1])
+                    if max_chars and chars >= max_chars:
+                        break
+            finally:
+                doc.close()
             
-            for page in doc:
-                text_parts.append(page.get_text())
+            if parallel:
+                text_parts = FileTextExtractor._extract_pdf_pages_parallel(source, page_count, max_chars)
             
-            full_text = "\n".join(text_parts)
-            doc.close()
+            full_text = "\n".join(strip_repeated_edges(text_parts))
+            if max_chars and len(full_text) > max_chars:
+                full_text = full_text[:max_chars]
             
-            print(f"✅ Extracted {len(full_text)} chars from PDF ({len(text_parts)} pages)")
+            print(f"✅ Extracted {len(full_text)} chars from PDF ({len(text_parts)}/{total_pages} pages)")
             return full_text
             
         except Exception as e:
@@ -40,27 +269,85 @@ class FileTextExtractor:
             return None
     
     @staticmethod
-    def extract_from_docx(file_path: str) -> Optional[str]:
+    def _extract_pdf_pages_parallel(source: Union[str, bytes], page_count: int, max_chars: int = 0) -> List[str]:
+        """
+        Text of the first `page_count` pages, extracted in page ranges on the shared pool
+        
+        At most one range per worker is in flight; ranges are consumed in page
+        order and nothing more is submitted once `max_chars` is reached.
+        Workers reopen the document themselves (a fitz.Document can't be
+        shared): PDF bytes are written to a temp file once, so each range
+        pickles a path instead of the whole document.
         """
-        Extract text from DOCX file.
+        workers = max(1, min(config.PDF_PARALLEL_WORKERS, page_count))
+        # Two ranges per worker, so a char ceiling hit early skips real work
+        step = max(1, -(-page_count // (workers * 2)))
+        ranges = iter([(start, min(start + step, page_count)) for start in range(0, page_count, step)])
+        
+        temp_path = None
+        if not isinstance(source, str):
+            fd, temp_path = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(fd, "wb") as f:
+                f.write(source)
+            source = temp_path
+        
+        pool = _get_page_pool()
+        futures = []
+        try:
+            for start, stop in ranges:
+                futures.append(pool.submit(_pdf_page_texts, source, start, stop))
+                if len(futures) >= workers:
+                    break
+            
+            text_parts = []
+            chars = 0
+            done = 0
+            while done < len(futures):
+                wait(futures[done:], return_when=FIRST_COMPLETED)
+                # Consume finished ranges in page order
+                while done < len(futures) and futures[done].done():
+                    pages = futures[done].result()
+                    done += 1
+                    for text in pages:
+                        text_parts.append(text)
+                        chars += len(text)
+                        if max_chars and chars >= max_chars:
+                            return text_parts
+                # Refill the freed worker slots
+                for start, stop in ranges:
+                    futures.append(pool.submit(_pdf_page_texts, source, start, stop))
+                    if len(futures) - done >= workers:
+                        break
+            return text_parts
+        finally:
+            for future in futures:
+                future.cancel()
+            if temp_path:
+                # Ranges still running have the file open already (or fail unread)
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def extract_from_docx(source: FileSource) -> Optional[str]:
+        """
+        Extract text from DOCX file (paragraphs and table rows, in order).
         
         Args:
-            file_path: Path to DOCX file
+            source: Path to DOCX file, DOCX bytes or binary file object
         
         Returns:
             Extracted text or None if failed
         """
         try:
-            doc = docx.Document(file_path)
-            text_parts = []
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
+            if not isinstance(source, str):
+                source = BytesIO(FileTextExtractor._read_bytes(source))
+            text_parts = list(iter_docx_blocks(source))
             
             full_text = "\n".join(text_parts)
             
-            print(f"✅ Extracted {len(full_text)} chars from DOCX ({len(text_parts)} paragraphs)")
+            print(f"✅ Extracted {len(full_text)} chars from DOCX ({len(text_parts)} blocks)")
             return full_text
             
         except Exception as e:
@@ -68,30 +355,49 @@ class FileTextExtractor:
             return None
     
     @staticmethod
-    def extract_text(file_path: str) -> Optional[str]:
+    def extract_text(source: FileSource, filename: Optional[str] = None) -> Optional[str]:
         """
         Auto-detect file type and extract text.
         
         Args:
-            file_path: Path to file (PDF or DOCX)
+            source: Path to file (PDF or DOCX), or its bytes / binary file object
+            filename: Name or key used for type detection of in-memory content
+                (without it, the type is sniffed from the content)
         
         Returns:
             Extracted text or None if failed
         """
-        if not os.path.exists(file_path):
-            print(f"❌ File not found: {file_path}")
-            return None
+        if isinstance(source, str):
+            if not os.path.exists(source):
+                print(f"❌ File not found: {source}")
+                return None
+            filename = source
         
-        file_ext = os.path.splitext(file_path)[1].lower()
+        if filename:
+            file_ext = os.path.splitext(filename)[1].lower()
+        else:
+            if not isinstance(source, (bytes, bytearray, memoryview)):
+                source = source.read()
+            file_ext = FileTextExtractor.sniff_extension(source)
         
         if file_ext == '.pdf':
-            return FileTextExtractor.extract_from_pdf(file_path)
-        elif file_ext in ['.docx', '.doc']:
-            return FileTextExtractor.extract_from_docx(file_path)
+            return FileTextExtractor.extract_from_pdf(source)
+        elif file_ext == '.docx':
+            return FileTextExtractor.extract_from_docx(source)
         else:
-            print(f"❌ Unsupported file type: {file_ext}")
+            print(f"❌ Unsupported file type: {file_ext or 'unknown'}")
             return None
     
+    @staticmethod
+    def sniff_extension(data: Union[bytes, bytearray, memoryview]) -> str:
+        """File extension from the content's magic bytes ('' if unknown)"""
+        header = bytes(data[:4])
+        if header.startswith(b'%PDF'):
+            return '.pdf'
+        if header.startswith(b'PK'):
+            return '.docx'  # ZIP container
+        return ''
+    
     @staticmethod
     def get_word_count(text: str) -> int:
         """Get word count from text"""
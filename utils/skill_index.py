@@ -0,0 +1,233 @@
+"""
+Inverted Skill Index
+Canonical skill -> CV IDs, persisted in SQLite and held in memory for retrieval
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Import config from parent directory
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from utils.skill_taxonomy import canonicalize_skills
+
+logger = logging.getLogger(__name__)
+
+
+class SkillIndex:
+    """
+    Inverted index of CV must-have skills.
+
+    Postings (canonical skill -> set of CV IDs) live in memory and are
+    mirrored to SQLite so the index survives restarts. Every indexed CV also
+    keeps the source key of its skills (the sorted canonical skill IDs), so
+    a list from the extractor and the comma-separated DB column of the same
+    CV compare equal; `ensure_indexed` only re-indexes CVs whose key changed.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the index and load existing postings
+
+        Args:
+            path: SQLite file path
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._postings: Dict[str, set] = {}
+        self._cv_skills: Dict[int, frozenset] = {}
+        self._cv_sources: Dict[int, str] = {}
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS indexed_cvs (
+                cv_id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cv_skills (
+                skill TEXT NOT NULL,
+                cv_id INTEGER NOT NULL,
+                PRIMARY KEY (skill, cv_id)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cv_skills_cv_id ON cv_skills(cv_id)")
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        """Rebuild the in-memory postings from SQLite"""
+        for cv_id, source in self._conn.execute("SELECT cv_id, source FROM indexed_cvs"):
+            self._cv_sources[cv_id] = source
+
+        skills_by_cv = {}
+        for skill, cv_id in self._conn.execute("SELECT skill, cv_id FROM cv_skills"):
+            self._postings.setdefault(skill, set()).add(cv_id)
+            skills_by_cv.setdefault(cv_id, set()).add(skill)
+        self._cv_skills = {cv_id: frozenset(skills) for cv_id, skills in skills_by_cv.items()}
+
+        logger.info(f"Skill index loaded: {len(self._cv_sources)} CVs, {len(self._postings)} skills")
+
+    @staticmethod
+    def _parse(skills: Union[str, Iterable[str], None]) -> Tuple[str, frozenset]:
+        """(source key, canonical skill set) for a skills string or list"""
+        if not skills:
+            return "", frozenset()
+        raw = skills.split(',') if isinstance(skills, str) else [str(s) for s in skills]
+        canonical = frozenset(canonicalize_skills(raw))
+        return ','.join(sorted(canonical)), canonical
+
+    def upsert_cv(self, cv_id: int, skills: Union[str, Iterable[str], None]):
+        """Index (or re-index) one CV from its must-have skills (string or list)"""
+        self.upsert_many([(cv_id, skills)])
+
+    def upsert_many(self, items: Iterable[Tuple[int, Union[str, Iterable[str], None]]]) -> int:
+        """
+        Index many CVs in one transaction
+
+        Args:
+            items: (cv_id, must-have skills) pairs
+
+        Returns:
+            Number of CVs written
+        """
+        return self._write([(cv_id, *self._parse(skills)) for cv_id, skills in items])
+
+    def _write(self, parsed: List[Tuple[int, str, frozenset]]) -> int:
+        """Apply (cv_id, source key, canonical skills) entries to memory and SQLite"""
+        if not parsed:
+            return 0
+
+        now = time.time()
+        with self._lock:
+            for cv_id, source, skills in parsed:
+                for skill in self._cv_skills.get(cv_id, ()):
+                    if skill not in skills:
+                        self._postings[skill].discard(cv_id)
+                for skill in skills:
+                    self._postings.setdefault(skill, set()).add(cv_id)
+                self._cv_skills[cv_id] = skills
+                self._cv_sources[cv_id] = source
+
+            ids = [(cv_id,) for cv_id, _, _ in parsed]
+            self._conn.executemany("DELETE FROM cv_skills WHERE cv_id = ?", ids)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cv_skills (skill, cv_id) VALUES (?, ?)",
+                [(skill, cv_id) for cv_id, _, skills in parsed for skill in skills]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO indexed_cvs (cv_id, source, updated_at) VALUES (?, ?, ?)",
+                [(cv_id, source, now) for cv_id, source, _ in parsed]
+            )
+            self._conn.commit()
+
+        return len(parsed)
+
+    def remove_cv(self, cv_id: int):
+        """Drop a CV from the index"""
+        with self._lock:
+            for skill in self._cv_skills.pop(cv_id, ()):
+                self._postings[skill].discard(cv_id)
+            self._cv_sources.pop(cv_id, None)
+            self._conn.execute("DELETE FROM cv_skills WHERE cv_id = ?", (cv_id,))
+            self._conn.execute("DELETE FROM indexed_cvs WHERE cv_id = ?", (cv_id,))
+            self._conn.commit()
+
+    def ensure_indexed(self, cvs: Iterable, field: str = 'cv_must_to_have') -> int:
+        """
+        Bring the index up to date for CV rows (new or changed skills only)
+
+        Args:
+            cvs: CV objects with cv_id and the skills field
+            field: CV attribute holding comma-separated must-have skills
+
+        Returns:
+            Number of CVs (re-)indexed
+        """
+        stale = []
+        for cv in cvs:
+            source, skills = self._parse(getattr(cv, field, None))
+            if self._cv_sources.get(cv.cv_id) != source:
+                stale.append((cv.cv_id, source, skills))
+
+        if stale:
+            logger.info(f"Skill index: indexing {len(stale)} new/changed CVs")
+        return self._write(stale)
+
+    def query(
+        self,
+        jd_skills: Iterable[str],
+        skill_equivalents: Optional[Dict[str, Iterable[str]]] = None,
+        min_hits: int = 1,
+        cv_ids: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        CVs covering at least `min_hits` of the JD skills, best first
+
+        A JD skill counts as covered if the CV has it or one of its equivalents.
+
+        Args:
+            jd_skills: Canonical JD must-have skills
+            skill_equivalents: Optional JD skill -> equivalent skills map
+            min_hits: Minimum number of covered JD skills
+            cv_ids: Optional restriction to these CV IDs (e.g. Stage 1 survivors)
+
+        Returns:
+            [(cv_id, hits)] sorted by hits (descending), then cv_id
+        """
+        allowed = set(cv_ids) if cv_ids is not None else None
+        hits = Counter()
+        empty = frozenset()
+
+        with self._lock:
+            for jd_skill in set(jd_skills):
+                skills = [jd_skill, *(skill_equivalents or {}).get(jd_skill, ())]
+                if allowed is not None:
+                    # Set & iterates the smaller side, so a small cv_ids chunk never
+                    # pays for copying a large posting list
+                    covered = set().union(*(self._postings.get(skill, empty) & allowed for skill in skills))
+                else:
+                    covered = set().union(*(self._postings.get(skill, empty) for skill in skills))
+                hits.update(covered)
+
+        ranked = [(cv_id, count) for cv_id, count in hits.items() if count >= min_hits]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+    def get_stats(self) -> Dict:
+        """Index size for monitoring"""
+        with self._lock:
+            return {
+                "cvs": len(self._cv_sources),
+                "skills": sum(1 for postings in self._postings.values() if postings),
+                "postings": sum(len(postings) for postings in self._postings.values())
+            }
+
+
+# Singleton instance
+_skill_index = None
+_skill_index_lock = threading.Lock()
+
+
+def get_skill_index() -> SkillIndex:
+    """Get or create the singleton skill index (MATCH_SKILL_INDEX_PATH)"""
+    global _skill_index
+    if _skill_index is None:
+        with _skill_index_lock:
+            if _skill_index is None:
+                _skill_index = SkillIndex(config.MATCH_SKILL_INDEX_PATH)
+    return _skill_index
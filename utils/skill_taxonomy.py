@@ -0,0 +1,184 @@
+"""
+Canonical Skill Taxonomy
+Maps raw skill strings ("ReactJS", "react.js", "React 18") to canonical skill IDs ("react")
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional
+
+# Import config from parent directory
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_aliases.json")
+
+# Trailing version numbers: "python 3.11", "react v18", "angular 15.x"
+_VERSION_SUFFIX = re.compile(r"\s+v?(\d+)(\.\d+)*(\.x)?\+?$")
+# Major versions that name a different skill: (canonical ID, major) -> canonical ID
+_VERSIONED_SKILLS = {
+    ("angular", "1"): "angularjs",
+}
+# Everything that does not distinguish skills (keep + and # for c++, c#)
+_KEY_NOISE = re.compile(r"[^a-z0-9+#]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SkillTaxonomy:
+    """
+    Alias table mapping raw skill strings to canonical skill IDs.
+
+    Lookups go through a compact key (lowercase, no punctuation/spaces, no
+    trailing version), so "ReactJS", "React.js" and "react-js" share one
+    dict entry. Skills without an alias entry are standardized the way the
+    extraction prompts ask for: lowercase, hyphenated, no spaces.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Initialize the taxonomy
+
+        Args:
+            aliases: {canonical_id: [alias, ...]} to register up front
+        """
+        self._lock = threading.Lock()
+        self._index: Dict[str, str] = {}
+        self._memo: Dict[str, str] = {}
+        self._version: Optional[str] = None
+        if aliases:
+            self.register_many(aliases)
+
+    @staticmethod
+    def lookup_key(raw: str) -> str:
+        """Compact lookup key for a raw skill string"""
+        text = str(raw).lower().strip()
+        text = _VERSION_SUFFIX.sub("", text)
+        return _KEY_NOISE.sub("", text)
+
+    @staticmethod
+    def standardize(raw: str) -> str:
+        """Prompt-style standard name: lowercase, hyphens instead of spaces"""
+        text = _WHITESPACE.sub("-", str(raw).lower().strip())
+        return text.strip("-,;")
+
+    def register(self, canonical: str, aliases: Iterable[str] = ()):
+        """
+        Add (or extend) a canonical skill and its aliases
+
+        Later registrations win on conflicting aliases.
+        """
+        canonical = self.standardize(canonical)
+        with self._lock:
+            for name in [canonical, *aliases]:
+                key = self.lookup_key(name)
+                if not key:
+                    continue
+                previous = self._index.get(key)
+                if previous and previous != canonical:
+                    logger.debug(f"Skill alias '{name}' remapped: {previous} -> {canonical}")
+                self._index[key] = canonical
+            self._memo.clear()
+            self._version = None
+
+    def register_many(self, aliases: Dict[str, Iterable[str]]):
+        """Register a {canonical_id: [alias, ...]} table"""
+        for canonical, names in aliases.items():
+            self.register(canonical, names or ())
+
+    def load_file(self, path: str):
+        """Register aliases from a JSON file ({canonical_id: [alias, ...]})"""
+        with open(path, "r", encoding="utf-8") as f:
+            self.register_many(json.load(f))
+
+    def canonicalize(self, raw: Optional[str]) -> str:
+        """
+        Canonical ID for a raw skill string
+
+        Returns:
+            Canonical ID if known, otherwise the standardized name ("" for empty input)
+        """
+        if not raw:
+            return ""
+        cached = self._memo.get(raw)
+        if cached is not None:
+            return cached
+
+        canonical = self._index.get(self.lookup_key(raw))
+        if canonical is None:
+            canonical = self.standardize(raw)
+        else:
+            # The lookup key drops the version; keep the ones that change the skill
+            version = _VERSION_SUFFIX.search(str(raw).lower().strip())
+            if version:
+                canonical = _VERSIONED_SKILLS.get((canonical, version.group(1)), canonical)
+
+        if len(self._memo) < 100000:
+            self._memo[raw] = canonical
+        return canonical
+
+    def canonicalize_many(self, skills: Iterable[str]) -> List[str]:
+        """Canonicalize a list of skills, dropping empties and duplicates (order kept)"""
+        result = []
+        seen = set()
+        for raw in skills or []:
+            canonical = self.canonicalize(raw)
+            if canonical and canonical not in seen:
+                seen.add(canonical)
+                result.append(canonical)
+        return result
+
+    @property
+    def version(self) -> str:
+        """Short hash of the alias table; changes whenever canonicalization may change"""
+        if self._version is None:
+            with self._lock:
+                table = json.dumps([sorted(self._index.items()), sorted(_VERSIONED_SKILLS.items())])
+                self._version = hashlib.sha1(table.encode("utf-8")).hexdigest()[:12]
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+# Singleton instance
+_skill_taxonomy = None
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Get or create the singleton taxonomy (bundled table + optional SKILL_ALIASES_PATH)"""
+    global _skill_taxonomy
+    if _skill_taxonomy is None:
+        taxonomy = SkillTaxonomy()
+        taxonomy.load_file(BUNDLED_ALIASES_PATH)
+
+        extra_path = config.SKILL_ALIASES_PATH
+        if extra_path:
+            if os.path.exists(extra_path):
+                taxonomy.load_file(extra_path)
+            else:
+                logger.warning(f"⚠️ SKILL_ALIASES_PATH not found: {extra_path}")
+
+        _skill_taxonomy = taxonomy
+    return _skill_taxonomy
+
+
+def taxonomy_version() -> str:
+    """Alias table version of the singleton taxonomy"""
+    return get_skill_taxonomy().version
+
+
+def canonicalize_skill(raw: Optional[str]) -> str:
+    """Canonical ID for a raw skill string (singleton taxonomy)"""
+    return get_skill_taxonomy().canonicalize(raw)
+
+
+def canonicalize_skills(skills: Iterable[str]) -> List[str]:
+    """Canonicalize and de-duplicate a list of skills (singleton taxonomy)"""
+    return get_skill_taxonomy().canonicalize_many(skills)
@@ -0,0 +1,301 @@
+"""
+Prompt Text Compaction
+Shrinks extracted CV/JD text before it is embedded in a Gemini prompt
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Import config from parent directory
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from utils.token_utils import CHARS_PER_TOKEN, estimate_tokens
+
+# Section headings (normalized) -> section kind
+_SECTION_HEADINGS = {
+    **dict.fromkeys((
+        "experience", "work experience", "professional experience", "employment history",
+        "employment details", "work history", "career history", "experience summary"
+    ), "experience"),
+    **dict.fromkeys(("projects", "key projects", "project details", "project experience"), "projects"),
+    **dict.fromkeys((
+        "personal details", "personal information", "personal profile", "personal data",
+        "declaration", "references"
+    ), "personal"),
+    **dict.fromkeys((
+        "hobbies", "interests", "hobbies and interests", "hobbies interests",
+        "extra curricular activities", "extracurricular activities", "languages known"
+    ), "optional"),
+    **dict.fromkeys((
+        "summary", "profile", "professional summary", "profile summary", "career objective", "objective",
+        "skills", "technical skills", "key skills", "core competencies", "skill set", "technical expertise",
+        "education", "educational qualification", "educational qualifications", "academic qualifications",
+        "certifications", "certificates", "achievements", "awards", "accomplishments", "training",
+        "publications", "requirements", "qualifications", "about us", "benefits"
+    ), "other"),
+}
+# Sections whose dated entries may be dropped for the token budget
+_DATED_KINDS = ("experience", "projects")
+
+# Contact/personal lines; the prompts exclude personal details anyway
+_CONTACT_LABEL = re.compile(
+    r"^(e-?mail|phone|mobile|mob|contact|tel|address|dob|date of birth|marital status|nationality|"
+    r"gender|father'?s name|passport|linkedin|github)\s*[:\-]",
+    re.I
+)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"\+?\d[\d\s().-]{8,}\d")
+# Phone numbers have at least this many digits (a "2015 - 2018" range has 8)
+_PHONE_MIN_DIGITS = 10
+_URL = re.compile(r"(https?://|www\.)\S+", re.I)
+
+# "Jan 2015 - Mar 2018", "01/2015 to present", "2019 – till date"
+_MONTH = r"(?:[A-Za-z]{3,9}\.?,?\s*|\d{1,2}\s*[/.-]\s*)?"
+_DATE_RANGE = re.compile(
+    rf"{_MONTH}((?:19|20)\d{{2}})\s*(?:-|–|—|to|till|until)\s*{_MONTH}"
+    r"((?:19|20)\d{2}|present|current|now|ongoing|date)",
+    re.I
+)
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_NON_WORD = re.compile(r"[^a-z ]+")
+_BLANK_RUNS = re.compile(r"\n{3,}")
+
+
+class CompactionResult:
+    """Compacted text with its token accounting"""
+
+    __slots__ = ('text', 'original_tokens', 'tokens', 'dropped')
+
+    def __init__(self, text: str, original_tokens: int, dropped: List[str]):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.tokens = estimate_tokens(text)
+        self.dropped = dropped
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+    def summary(self) -> str:
+        """One-line report, e.g. "2140 -> 1385 tokens (-35%)" """
+        saved_pct = round(100 * self.saved_tokens / self.original_tokens) if self.original_tokens else 0
+        report = f"{self.original_tokens} -> {self.tokens} tokens (-{saved_pct}%)"
+        if self.dropped:
+            report += f", dropped {', '.join(self.dropped)}"
+        return report
+
+
+def normalize_whitespace(text: str) -> List[str]:
+    """Lines with collapsed spaces, trimmed, and at most one blank line in a row"""
+    lines = []
+    for raw in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = _SPACES.sub(" ", raw).strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _strip_phones(line: str) -> str:
+    """Line with phone numbers blanked out"""
+    return _PHONE.sub(
+        lambda match: " " if sum(c.isdigit() for c in match.group()) >= _PHONE_MIN_DIGITS else match.group(),
+        line
+    )
+
+
+def _is_contact_line(line: str) -> bool:
+    """
+    Contact details or personal data (labelled, or little besides an email/phone/URL)
+
+    Date ranges are never taken for phone numbers:
+
+    >>> _is_contact_line("+91 98765 43210 | rahul@example.com")
+    True
+    >>> _is_contact_line("Email: rahul@example.com")
+    True
+    >>> _is_contact_line("Infosys 2015 - 2018")
+    False
+    >>> _is_contact_line("Software Engineer, TCS (2012 - 2016)")
+    False
+    >>> _is_contact_line("B.Tech 2008 - 2012, 8.2 CGPA")
+    False
+    >>> _is_contact_line("2010 - 2014")
+    False
+    >>> _is_contact_line("Mobile app development, Jan 2019 - Present")
+    False
+    """
+    if _CONTACT_LABEL.match(line):
+        return True
+    undated = _DATE_RANGE.sub(" ", line)
+    rest = _URL.sub(" ", _strip_phones(_EMAIL.sub(" ", undated)))
+    return rest != undated and len(re.findall(r"[A-Za-z]{2,}", rest)) <= 3
+
+
+def _section_kind(line: str) -> Optional[str]:
+    """Section kind if the line is a known heading"""
+    if len(line) > 40:
+        return None
+    return _SECTION_HEADINGS.get(" ".join(_NON_WORD.sub(" ", line.lower()).split()))
+
+
+def _split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """(kind, lines) blocks split at known headings; text before the first one is "preamble" """
+    sections = [("preamble", [])]
+    for line in lines:
+        kind = _section_kind(line) if line else None
+        if kind:
+            sections.append((kind, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [s for s in sections if s[1]]
+
+
+def _dated_entries(lines: List[str], current_year: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Entries of an experience/projects section as (start, stop, start_year, end_year)
+
+    An entry starts at a line with a date range, or at the short title line
+    just above it, and runs to the next entry.
+    """
+    starts = []
+    for i, line in enumerate(lines):
+        match = _DATE_RANGE.search(line)
+        if not match:
+            continue
+        start = i
+        previous = lines[i - 1] if i > 0 else ""
+        if (
+            previous and i - 1 > 0 and len(previous.split()) <= 8
+            and not _DATE_RANGE.search(previous) and (not starts or starts[-1][0] < i - 1)
+        ):
+            start = i - 1
+        end = match.group(2)
+        end_year = int(end) if end.isdigit() else current_year
+        starts.append((start, int(match.group(1)), end_year))
+
+    entries = []
+    for n, (start, start_year, end_year) in enumerate(starts):
+        stop = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        entries.append((start, stop, start_year, end_year))
+    return entries
+
+
+def compact_text(
+    text: str,
+    max_tokens: int = 0,
+    recent_years: Optional[int] = None,
+    current_year: Optional[int] = None
+) -> CompactionResult:
+    """
+    Compact document text for prompting.
+
+    Always: collapses whitespace, drops contact/personal lines and sections
+    (personal details, declaration, references) and lines of four or more
+    words repeated within the same section. Over `max_tokens`, trims in
+    this order until the text fits:
+    dated entries under an experience/projects heading that ended more than
+    `recent_years` ago (oldest first, replaced by a one-line note so the
+    career span stays visible), optional sections (hobbies, languages), and
+    finally the tail of the text.
+
+    Args:
+        text: Extracted CV or JD text
+        max_tokens: Token budget (0 = no trimming)
+        recent_years: Entries ending within this many years are never dropped
+            (None = do not drop entries)
+        current_year: Year "present" means (default: this year)
+
+    Returns:
+        CompactionResult
+    """
+    original_tokens = estimate_tokens(text)
+    current_year = current_year or datetime.now().year
+    dropped: List[str] = []
+
+    sections = []
+    for kind, section_lines in _split_sections(normalize_whitespace(text or "")):
+        if kind == "personal":
+            dropped.append(f"'{section_lines[0]}' section")
+            continue
+        seen = set()
+        kept = []
+        for line in section_lines:
+            if line and _is_contact_line(line):
+                continue
+            key = line.lower()
+            if len(line.split()) >= 4:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+        sections.append([kind, kept])
+
+    def render() -> str:
+        text = "\n".join(line for _, lines in sections for line in lines if line is not None)
+        return _BLANK_RUNS.sub("\n\n", text).strip()
+
+    compacted = render()
+    if not max_tokens or estimate_tokens(compacted) <= max_tokens:
+        return CompactionResult(compacted, original_tokens, dropped)
+
+    # 1. Old dated entries, oldest first
+    if recent_years is not None:
+        cutoff = current_year - recent_years
+        # Only under an experience/projects heading: elsewhere a date range may
+        # just as well be a degree or a certification
+        old_entries = []
+        for section in sections:
+            if section[0] in _DATED_KINDS:
+                for start, stop, start_year, end_year in _dated_entries(section[1], current_year):
+                    if end_year < cutoff:
+                        old_entries.append((end_year, start_year, section, start, stop))
+        old_entries.sort(key=lambda entry: (entry[0], entry[1]))
+
+        notes = {}
+        for end_year, start_year, section, start, stop in old_entries:
+            lines = section[1]
+            for i in range(start, stop):
+                lines[i] = None
+            # One note per section, at the position of its earliest dropped entry
+            first, span = notes.get(id(section), (start, (start_year, end_year)))
+            lines[first] = None
+            first = min(first, start)
+            span = (min(span[0], start_year), max(span[1], end_year))
+            notes[id(section)] = (first, span)
+            lines[first] = f"(Earlier entries {span[0]}-{span[1]} omitted)"
+            dropped.append(f"{section[0]} {start_year}-{end_year}")
+            compacted = render()
+            if estimate_tokens(compacted) <= max_tokens:
+                return CompactionResult(compacted, original_tokens, dropped)
+
+    # 2. Optional sections
+    for section in reversed(sections):
+        if section[0] == "optional":
+            dropped.append(f"'{section[1][0]}' section")
+            section[1] = []
+            compacted = render()
+            if estimate_tokens(compacted) <= max_tokens:
+                return CompactionResult(compacted, original_tokens, dropped)
+
+    # 3. Hard cut at the budget (on a line boundary where possible)
+    limit = max_tokens * CHARS_PER_TOKEN
+    cut = compacted.rfind("\n", 0, limit)
+    compacted = compacted[:cut if cut > limit // 2 else limit].rstrip()
+    dropped.append("text over budget")
+    return CompactionResult(compacted, original_tokens, dropped)
+
+
+def compact_cv_text(cv_text: str) -> CompactionResult:
+    """Compact CV text (CV_PROMPT_MAX_TOKENS budget, keeps CV_RECENT_EXPERIENCE_YEARS of history)"""
+    return compact_text(cv_text, config.CV_PROMPT_MAX_TOKENS, config.CV_RECENT_EXPERIENCE_YEARS)
+
+
+def compact_jd_text(jd_text: str) -> CompactionResult:
+    """Compact JD text (JD_PROMPT_MAX_TOKENS budget)"""
+    return compact_text(jd_text, config.JD_PROMPT_MAX_TOKENS)
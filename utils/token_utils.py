@@ -0,0 +1,24 @@
+"""
+Token Estimation Utilities
+Cheap local token estimates for budgeting Gemini requests (no API call)
+"""
+
+from typing import Optional
+
+# Gemini tokenizes English prose at roughly 4 characters per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Estimate the number of tokens in a piece of text.
+
+    Args:
+        text: Prompt or document text
+
+    Returns:
+        Approximate token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN